@@ -0,0 +1,19 @@
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Conditional GET for stored JSON bodies: every response carries the body's
+# ETag, and a request whose If-None-Match already names it gets an empty 304.
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+def conditional_response(request: Request, body: bytes, etag: str) -> Response:
+    # no-cache: clients may keep the body but must revalidate on every poll
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
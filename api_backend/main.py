@@ -1,10 +1,42 @@
-from fastapi import FastAPI
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
+from datetime import datetime
+from functools import lru_cache
 import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from packages.analytics import DOWNSAMPLE_METHODS, downsample_indices, feature_importance, period_drawdowns, tear_sheet
+from packages.core.materialize import MaterializedResults
+from packages.data.cache import get_history_cache
+from packages.data.providers import get_provider
+from packages.features import ATR, RSI, SMA, FeatureStore, RollReturn, ZScore, compute_panel
+from packages.models import ModelCache, ModelRegistry
+from packages.models.registry import check_name
+from packages.orchestration.flows.backtest import backtest, normalize_request, result_tables
+from packages.orchestration.flows.train import GBM_FEATURES, normalize_train_request, train_gbm
+from packages.orchestration.jobs import JobQueue, QueueFull
+
+from .caching import conditional_response
+from .tables import FORMATS, table_response
 
 app = FastAPI()
 
+feature_store = FeatureStore()
+model_registry = ModelRegistry(os.environ.get("JULIAN_MODEL_DIR", "data/models"))
+model_cache = ModelCache(model_registry, max_bytes=int(os.environ.get("JULIAN_MODEL_CACHE_MB", "512")) * 2 ** 20)
+backtest_jobs = JobQueue(backtest, max_workers=int(os.environ.get("JULIAN_BACKTEST_WORKERS", "0")) or None,
+                         result_dir=os.environ.get("JULIAN_BACKTEST_DIR", "data/backtests"))
+model_jobs = JobQueue(train_gbm, max_workers=int(os.environ.get("JULIAN_TRAIN_WORKERS", "0")) or None,
+                      result_dir=os.environ.get("JULIAN_TRAIN_DIR", "data/training"))
+analytics_results = MaterializedResults(os.environ.get("JULIAN_ANALYTICS_DIR", "data/analytics"),
+                                        max_disk_bytes=int(os.environ.get("JULIAN_ANALYTICS_MB", "256")) * 2 ** 20)
+
 # Allow all CORS for local dev
 app.add_middleware(
     CORSMiddleware,
@@ -23,39 +55,136 @@ def health():
     return {"status": "ok"}
 
 # Analytics endpoints
+# Each is computed once per version of its inputs and then served from
+# analytics_results with a content ETag; a poll sending If-None-Match gets a
+# 304 without recomputing or re-sending anything. Keys carry the backtest run
+# (job id and finish time), the version of any prices read through the
+# history cache, or the model version (SHAP values only read the model and
+# the background sample saved with it). jobId defaults to the most recently
+# finished backtest.
+def _finite(x) -> Optional[float]:
+    return float(x) if np.isfinite(x) else None
+
+def _analytics_job(job_id: Optional[str]) -> str:
+    job_id = job_id or backtest_jobs.latest()
+    if job_id is None:
+        raise HTTPException(status_code=404, detail="no finished backtest; run one with POST /api/backtesting/run")
+    return job_id
+
+def _job_version(job_id: str) -> str:
+    # A job id is its request hash; a rerun of the same request (after a
+    # failure, or with its result gone) finishes at a new time
+    return f"{job_id}@{get_backtest_job(job_id)['finished']}"
+
+def _equity(job_id: str) -> pd.Series:
+    curve = _job_result(job_id)["equityCurve"]
+    return pd.Series(curve["y"], index=pd.to_datetime(curve["x"]), dtype=float)
+
+def _materialized(request: Request, name: str, key: str, compute):
+    return conditional_response(request, *analytics_results.get(name, key, compute))
+
+# width (pixels) bounds a series to ~2 points per pixel column, see
+# packages.analytics.downsample; troughs and peaks are always kept
+_WIDTH = Query(None, ge=2, le=20000)
+_METHOD = Query("lttb", pattern=f"^({'|'.join(DOWNSAMPLE_METHODS)})$")
+
+def _chart(x: list, y, width: Optional[int], method: str) -> dict:
+    y = np.asarray(y, dtype=float)
+    if width is None:
+        return {"x": x, "y": y.tolist()}
+    keep = downsample_indices(y, width, method, pd.to_datetime(x))
+    return {"x": [x[i] for i in keep], "y": y[keep].tolist()}
+
 @app.get("/api/analytics/performance")
-def get_performance_metrics():
-    return {
-        "sharpe": 1.87,
-        "sortino": 2.34,
-        "maxDrawdown": -0.032,
-        "alpha": 0.021,
-        "beta": 0.89,
-        "cvar": -0.045
-    }
+def get_performance_metrics(request: Request, jobId: Optional[str] = None, benchmark: str = "SPY"):
+    job_id = _analytics_job(jobId)
+
+    def compute():
+        returns = _equity(job_id).pct_change().dropna()
+        panel = get_history_cache().load([benchmark], start=returns.index[0],
+                                         end=returns.index[-1] + pd.Timedelta(days=1))
+        bench = panel["Close"][benchmark].pct_change() if not panel.empty else None
+        row = tear_sheet(returns, bench, n_boot=0).iloc[0]
+        return {
+            "sharpe": _finite(row["sharpe"]),
+            "sortino": _finite(row["sortino"]),
+            "maxDrawdown": _finite(row["max_drawdown"]),
+            "alpha": _finite(row["alpha"]) if bench is not None else None,
+            "beta": _finite(row["beta"]) if bench is not None else None,
+            "cvar": _finite(row["cvar"]),
+        }
+
+    # The benchmark range is fixed by the finished job, so its prices only
+    # change with the provider's data version; a poll loads nothing
+    key = f"{_job_version(job_id)}:{benchmark}:{get_history_cache().data_version()}"
+    return _materialized(request, "performance", key, compute)
 
 @app.get("/api/analytics/equity-curve")
-def get_equity_curve():
-    return {
-        "x": ["Jan", "Feb", "Mar", "Apr", "May", "Jun"],
-        "y": [100, 110, 120, 115, 130, 140]
-    }
+def get_equity_curve(request: Request, jobId: Optional[str] = None, width: Optional[int] = _WIDTH,
+                     method: str = _METHOD):
+    job_id = _analytics_job(jobId)
+
+    def compute():
+        curve = _job_result(job_id)["equityCurve"]
+        return _chart(curve["x"], curve["y"], width, method)
+
+    return _materialized(request, "equity-curve", f"{_job_version(job_id)}:{width}:{method}", compute)
 
 @app.get("/api/analytics/drawdown")
-def get_drawdown():
-    return {
-        "x": ["Jan", "Feb", "Mar", "Apr", "May", "Jun"],
-        "y": [0, -0.02, -0.01, -0.032, -0.015, 0]
-    }
+def get_drawdown(request: Request, jobId: Optional[str] = None, width: Optional[int] = _WIDTH,
+                 method: str = _METHOD):
+    job_id = _analytics_job(jobId)
+
+    def compute():
+        curve = _job_result(job_id)["equityCurve"]
+        equity = np.asarray(curve["y"], dtype=float)
+        return _chart(curve["x"], equity / np.maximum.accumulate(equity) - 1, width, method)
+
+    return _materialized(request, "drawdown", f"{_job_version(job_id)}:{width}:{method}", compute)
+
+# Worst drawdown of each asset in each calendar period (freq W/M/Q/Y) or each
+# block of `bucket` bars, from the cached price history. Keyed by the history
+# cache entry's version, so it is only recomputed when the prices change.
+@app.get("/api/analytics/drawdown-heatmap")
+def get_drawdown_heatmap(request: Request, symbols: str = Query(..., min_length=1),
+                         start: Optional[str] = None, end: Optional[str] = None,
+                         freq: str = Query("Y", pattern="^(W|M|Q|Y)$"),
+                         bucket: Optional[int] = Query(None, ge=2)):
+    tickers = sorted({s.strip().upper() for s in symbols.split(",") if s.strip()})
+    try:
+        panel, prices = get_history_cache().load_with_version(tickers, start=start, end=end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if panel.empty:
+        raise HTTPException(status_code=404, detail=f"no price data for {', '.join(tickers)}")
+
+    def compute():
+        matrix = period_drawdowns(panel["Close"], bucket or freq)
+        z = matrix.to_numpy()
+        return {
+            "assets": [str(a) for a in matrix.index],
+            "periods": list(matrix.columns),
+            "z": np.where(np.isnan(z), None, z.round(6)).tolist(),
+        }
+
+    return _materialized(request, "drawdown-heatmap", f"{','.join(tickers)}:{prices}:{bucket or freq}", compute)
 
 @app.get("/api/analytics/shap-features")
-def get_shap_features():
-    return [
-        {"feature": "Momentum", "importance": 0.45, "direction": "positive"},
-        {"feature": "Volatility", "importance": 0.32, "direction": "negative"},
-        {"feature": "Sentiment", "importance": 0.28, "direction": "positive"},
-        {"feature": "Volume", "importance": 0.15, "direction": "negative"}
-    ]
+def get_shap_features(request: Request, modelId: Optional[str] = None):
+    # Mean |SHAP| over the model's background sample; modelId defaults to the
+    # most recently trained GBM
+    models = [m for m in model_registry.list() if m["kind"] == "gbm" and modelId in (None, m["id"])]
+    if not models:
+        raise HTTPException(status_code=404, detail="no trained GBM model")
+    meta = max(models, key=lambda m: m["created"])
+
+    def compute():
+        model = model_cache.get(meta["id"], meta["version"])
+        table = feature_importance(model.shap_values(model.background), model.background)
+        return [{"feature": feature, "importance": float(row.importance), "direction": row.direction}
+                for feature, row in table.iterrows()]
+
+    return _materialized(request, "shap-features", f"{meta['id']}@{meta['version']}", compute)
 
 # Backtesting endpoints
 @app.get("/api/backtesting/strategies")
@@ -67,80 +196,194 @@ def get_backtesting_strategies():
         {"id": "mean_reversion", "name": "Mean Reversion", "description": "Simple mean reversion strategy"}
     ]
 
-@app.post("/api/backtesting/run")
-def run_backtest(request: Dict[str, Any]):
-    # Mock backtest execution
+@app.post("/api/backtesting/run", status_code=202)
+def run_backtest(response: Response, request: Dict[str, Any] = Body(default={})):
+    # Queues the backtest and returns its job at once; poll
+    # /api/backtesting/jobs/{jobId}. Identical requests share one job and
+    # finished ones are answered from the stored result (200 instead of 202).
+    try:
+        job = backtest_jobs.submit(normalize_request(request))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    if job["status"] == "done":
+        response.status_code = 200
+    return {"jobId": job["id"], **job}
+
+@app.get("/api/backtesting/jobs")
+def get_backtest_jobs():
+    return backtest_jobs.jobs()
+
+@app.get("/api/backtesting/jobs/{job_id}")
+def get_backtest_job(job_id: str):
+    try:
+        return backtest_jobs.status(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"unknown job {job_id}")
+
+def _job_result(job_id: str) -> dict:
+    job = get_backtest_job(job_id)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    try:
+        return backtest_jobs.result(job_id)
+    except KeyError:
+        raise HTTPException(status_code=409, detail=f"job {job_id} is {job['status']}")
+
+@app.get("/api/backtesting/jobs/{job_id}/result")
+def get_backtest_result(job_id: str, summary: bool = False):
+    # summary=true leaves out the equity curve and trades; page or stream
+    # those from /equity and /trades instead
+    result = _job_result(job_id)
+    if summary:
+        return {k: v for k, v in result.items() if k not in ("equityCurve", "trades")}
+    return result
+
+def _job_tables(job_id: str) -> dict:
+    # Built once per stored result and kept by the queue alongside it
+    _job_result(job_id)
+    try:
+        return backtest_jobs.view(job_id, result_tables)
+    except KeyError:
+        raise HTTPException(status_code=409, detail=f"job {job_id} has no result")
+
+@lru_cache(maxsize=64)
+def _downsampled_equity(width: int, method: str) -> Callable[[dict], pa.Table]:
+    # One view function per (width, method), so the queue keeps each
+    # downsampled table per job next to its full one
+    def view(result: dict) -> pa.Table:
+        table = result_tables(result)["equity"]
+        keep = downsample_indices(table.column("equity").to_numpy(), width, method,
+                                  pd.to_datetime(result["equityCurve"]["x"]))
+        return table.take(keep)
+    return view
+
+_FORMAT = Query("json", pattern=f"^({'|'.join(FORMATS)})$")
+
+@app.get("/api/backtesting/jobs/{job_id}/trades")
+def get_backtest_trades(job_id: str, format: str = _FORMAT, offset: int = Query(0, ge=0),
+                        limit: Optional[int] = Query(None, ge=1)):
+    # format: json (a page of `limit` rows), ndjson or arrow (IPC stream)
+    return table_response(_job_tables(job_id)["trades"], format, offset, limit)
+
+@app.get("/api/backtesting/jobs/{job_id}/equity")
+def get_backtest_equity(job_id: str, format: str = _FORMAT, offset: int = Query(0, ge=0),
+                        limit: Optional[int] = Query(None, ge=1), width: Optional[int] = _WIDTH,
+                        method: str = _METHOD):
+    # width downsamples the curve for charting before paging/streaming
+    if width is None:
+        return table_response(_job_tables(job_id)["equity"], format, offset, limit)
+    _job_result(job_id)
+    try:
+        table = backtest_jobs.view(job_id, _downsampled_equity(width, method))
+    except KeyError:
+        raise HTTPException(status_code=409, detail=f"job {job_id} has no result")
+    return table_response(table, format, offset, limit)
+
+# Models endpoints
+def _model_summary(meta: dict) -> dict:
     return {
-        "strategy": request.get("strategy", "momentum"),
-        "period": f"{request.get('startDate', '2023-01-01')} to {request.get('endDate', '2024-01-01')}",
-        "metrics": {
-            "totalReturn": 0.156,
-            "sharpeRatio": 1.87,
-            "maxDrawdown": -0.032,
-            "winRate": 0.68,
-            "profitFactor": 2.34
-        },
-        "equityCurve": {
-            "x": ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"],
-            "y": [100, 105, 112, 108, 115, 122, 118, 125, 132, 128, 135, 142]
-        },
-        "trades": [
-            {"date": "2023-01-15", "symbol": "AAPL", "side": "BUY", "quantity": 100, "price": 150.25, "pnl": 1250},
-            {"date": "2023-02-20", "symbol": "GOOGL", "side": "SELL", "quantity": 50, "price": 2800.50, "pnl": -500},
-            {"date": "2023-03-10", "symbol": "MSFT", "side": "BUY", "quantity": 75, "price": 320.75, "pnl": 1875}
-        ]
+        "id": meta["id"],
+        "name": meta.get("name", meta["id"]),
+        "type": "ML" if meta["kind"] == "gbm" else "RL",
+        "status": "trained",
+        "version": meta["version"],
+        "accuracy": meta.get("performance", {}).get("testAccuracy"),
+        "lastUpdated": datetime.strptime(meta["created"], "%Y%m%dT%H%M%S%f").strftime("%Y-%m-%d %H:%M:%S"),
+        "features": meta.get("features", []),
+        "performance": meta.get("performance", {}),
+        "sizeBytes": meta["bytes"],
     }
 
-# Models endpoints
+def _model_meta(model_id: str, version: Optional[str] = None) -> dict:
+    # 400 for an id or version that cannot name a model, 404 for an unknown one
+    try:
+        return model_registry.meta(model_id, version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (KeyError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail=f"unknown model {model_id}")
+
 @app.get("/api/models")
 def get_models():
-    return [
-        {
-            "id": "gbm_momentum",
-            "name": "Gradient Boosted Momentum",
-            "type": "ML",
-            "status": "trained",
-            "accuracy": 0.78,
-            "lastUpdated": "2024-01-15",
-            "features": ["price_momentum", "volume_ratio", "volatility", "sentiment"],
-            "performance": {
-                "trainAccuracy": 0.82,
-                "testAccuracy": 0.78,
-                "precision": 0.75,
-                "recall": 0.73,
-                "f1Score": 0.74
-            },
-            "trainingHistory": {
-                "x": ["Epoch 1", "Epoch 2", "Epoch 3", "Epoch 4", "Epoch 5"],
-                "y": [0.65, 0.72, 0.76, 0.78, 0.78]
-            }
-        },
-        {
-            "id": "ppo_allocator",
-            "name": "PPO Portfolio Allocator",
-            "type": "RL",
-            "status": "training",
-            "accuracy": 0.71,
-            "lastUpdated": "2024-01-14",
-            "features": ["portfolio_weights", "market_conditions", "risk_metrics"],
-            "performance": {
-                "trainAccuracy": 0.74,
-                "testAccuracy": 0.71,
-                "precision": 0.68,
-                "recall": 0.72,
-                "f1Score": 0.70
-            },
-            "trainingHistory": {
-                "x": ["Epoch 1", "Epoch 2", "Epoch 3", "Epoch 4", "Epoch 5"],
-                "y": [0.58, 0.64, 0.68, 0.70, 0.71]
-            }
-        }
-    ]
+    return [_model_summary(meta) for meta in model_registry.list()]
+
+@app.get("/api/models/cache")
+def get_model_cache():
+    return model_cache.stats()
+
+@app.get("/api/models/jobs/{job_id}")
+def get_training_job(job_id: str):
+    # The job record, with the training result once it is done
+    try:
+        job = model_jobs.status(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"unknown job {job_id}")
+    if job["status"] == "done":
+        try:
+            job["result"] = model_jobs.result(job_id)
+        except KeyError:
+            pass
+    return job
 
-@app.post("/api/models/{model_id}/train")
-def train_model(model_id: str):
-    # Mock training process
-    return {"status": "training_started", "model_id": model_id}
+@app.get("/api/models/{model_id}")
+def get_model(model_id: str):
+    return _model_summary(_model_meta(model_id))
+
+@app.post("/api/models/{model_id}/train", status_code=202)
+def train_model(model_id: str, response: Response, request: Dict[str, Any] = Body(default={})):
+    # Queues a GBM fit on the training job queue and returns its job at once;
+    # poll /api/models/jobs/{jobId}. Only GBM models train here.
+    try:
+        check_name(model_id)
+        if model_registry.latest(model_id) and model_registry.meta(model_id)["kind"] != "gbm":
+            raise ValueError(f"model {model_id} is not a GBM model and cannot be trained here")
+        job = model_jobs.submit(normalize_train_request(model_id, request, model_registry.root))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    if job["status"] == "done":
+        response.status_code = 200
+    return {"jobId": job["id"], **job}
+
+@app.post("/api/models/{model_id}/predict")
+def predict_model(model_id: str, request: Dict[str, Any] = Body(...)):
+    # {"rows": [{feature: value, ...}, ...]} or {"symbols": [...]} to score the
+    # latest bar of each symbol, {"observation": [...]} for an RL model; the
+    # model comes from the warm in-process cache
+    meta = _model_meta(model_id, request.get("version"))
+    model = model_cache.get(model_id, meta["version"])
+    if meta["kind"] != "gbm":
+        if "observation" not in request:
+            raise HTTPException(status_code=400, detail="body needs an observation")
+        try:
+            action, _ = model.predict(np.asarray(request["observation"], dtype=float), deterministic=True)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"invalid observation: {e}")
+        return {"model_id": model_id, "version": meta["version"], "action": np.asarray(action).tolist()}
+    if "rows" in request:
+        try:
+            X = pd.DataFrame(request["rows"])[meta["features"]]
+        except (KeyError, TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"rows need the features {meta['features']}: {e}")
+        index = list(range(len(X)))
+    elif "symbols" in request:
+        symbols = request["symbols"]
+        if not isinstance(symbols, list) or not symbols or not all(isinstance(sym, str) for sym in symbols):
+            raise HTTPException(status_code=400, detail="symbols must be a non-empty list of tickers")
+        panel = get_provider().history(symbols, period=request.get("period", "1y"))
+        if panel.empty:
+            raise HTTPException(status_code=404, detail=f"no price data for {', '.join(symbols)}")
+        X = compute_panel(panel, GBM_FEATURES).stack(level=1, future_stack=True)[meta["features"]]
+        X = X.dropna().groupby(level=1).tail(1)
+        index = [f"{sym} {date.date()}" for date, sym in X.index]
+    else:
+        raise HTTPException(status_code=400, detail="body needs rows or symbols")
+    proba = model.predict_proba(X)[:, 1] if len(X) else []
+    return {"model_id": model_id, "version": meta["version"],
+            "predictions": [{"key": k, "probability": float(p)} for k, p in zip(index, proba)]}
 
 # Data endpoints
 @app.get("/api/data/sources")
@@ -175,20 +418,31 @@ def get_data_sources():
         }
     ]
 
+def _fmt_bytes(n: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if n < 1024 or unit == "GB":
+            return f"{n:.1f}{unit}" if unit != "B" else f"{int(n)}B"
+        n /= 1024
+
 @app.get("/api/data/feature-store")
 def get_feature_store():
+    stats = feature_store.stats()
+    technical = {cls.name for cls in (RollReturn, ZScore, ATR, RSI, SMA)}
+    tech_count = sum(any(f == n or f.startswith(n + "_") for n in technical) for f in stats["features"])
     return {
-        "status": "healthy",
-        "totalFeatures": 45,
-        "activeFeatures": 42,
-        "lastComputed": "2024-01-15 10:00:00",
-        "storageUsed": "2.3GB",
-        "storageTotal": "10GB",
+        "status": "healthy" if stats["files"] else "empty",
+        "totalFeatures": len(stats["features"]),
+        "activeFeatures": len(stats["features"]),
+        "lastComputed": stats["last_modified"].strftime("%Y-%m-%d %H:%M:%S") if stats["last_modified"] else None,
+        "latestDate": str(stats["last_date"].date()) if stats["last_date"] is not None else None,
+        "symbols": stats["symbols"],
+        "rows": stats["rows"],
+        "partitions": stats["partitions"],
+        "storageUsed": _fmt_bytes(stats["bytes"]),
+        "storageTotal": _fmt_bytes(shutil.disk_usage(os.path.abspath(".")).total),
         "featureGroups": [
-            {"name": "Technical Indicators", "count": 15, "status": "active"},
-            {"name": "Sentiment Features", "count": 8, "status": "active"},
-            {"name": "Market Microstructure", "count": 12, "status": "active"},
-            {"name": "Alternative Data", "count": 10, "status": "processing"}
+            {"name": "Technical Indicators", "count": tech_count, "status": "active"},
+            {"name": "Other Features", "count": len(stats["features"]) - tech_count, "status": "active"},
         ]
     }
 
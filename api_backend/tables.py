@@ -0,0 +1,51 @@
+import io
+import json
+from typing import Iterator, Optional
+
+import pyarrow as pa
+from fastapi.responses import StreamingResponse
+
+# Large row sets (trade logs, equity curves) as an Arrow table, served three
+# ways from the same slice: a JSON page, NDJSON streamed in record batches, or
+# an Arrow IPC stream that notebooks and the frontend read without any JSON.
+# Only one batch of encoded output is held at a time.
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+NDJSON = "application/x-ndjson"
+FORMATS = ("json", "ndjson", "arrow")
+PAGE_SIZE = 1000
+BATCH_SIZE = 10000
+
+_encode = json.JSONEncoder(default=str).encode  # json.dumps(default=...) builds an encoder per call
+
+def _ndjson(table: pa.Table, batch_size: int) -> Iterator[bytes]:
+    for batch in table.to_batches(max_chunksize=batch_size):
+        yield ("\n".join(map(_encode, batch.to_pylist())) + "\n").encode()
+
+def _arrow(table: pa.Table, batch_size: int) -> Iterator[bytes]:
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=batch_size):
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()  # end-of-stream marker
+
+def table_response(table: pa.Table, format: str = "json", offset: int = 0, limit: Optional[int] = None,
+                   batch_size: Optional[int] = None):
+    # json pages default to PAGE_SIZE rows; the streaming formats send
+    # everything from offset unless limited. X-Total-Count is the full size.
+    if format == "json":
+        page = table.slice(offset, limit or PAGE_SIZE)
+        end = offset + page.num_rows
+        return {"total": table.num_rows, "offset": offset, "limit": limit or PAGE_SIZE,
+                "next": end if end < table.num_rows else None, "items": page.to_pylist()}
+    page = table.slice(offset, limit)
+    batch_size = batch_size or BATCH_SIZE
+    headers = {"X-Total-Count": str(table.num_rows)}
+    if format == "ndjson":
+        return StreamingResponse(_ndjson(page, batch_size), media_type=NDJSON, headers=headers)
+    if format == "arrow":
+        return StreamingResponse(_arrow(page, batch_size), media_type=ARROW_STREAM, headers=headers)
+    raise ValueError(f"unknown format {format!r}; expected one of {', '.join(FORMATS)}")
@@ -0,0 +1,54 @@
+"""Bars/sec of the backtrader and vectorized engines on MomentumStrategy.
+
+    python -m benchmarks.backtest_engines --symbols 200 --bars 2520
+"""
+import argparse
+import time
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from packages.strategies import MomentumStrategy, momentum_positions, run_vectorized
+
+def synthetic_panel(n_symbols: int, n_bars: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range('2000-01-03', periods=n_bars)
+    symbols = [f'S{i:04d}' for i in range(n_symbols)]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_bars, n_symbols)), axis=0))
+    fields = {
+        'Open': close * (1 + rng.normal(0, 0.002, close.shape)),
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': np.full(close.shape, 1e6),
+    }
+    return pd.concat({k: pd.DataFrame(v, index=idx, columns=symbols) for k, v in fields.items()}, axis=1)
+
+def bench_backtrader(panel: pd.DataFrame, symbols: list[str]) -> float:
+    start = time.perf_counter()
+    for sym in symbols:
+        cerebro = bt.Cerebro(stdstats=False)
+        cerebro.adddata(bt.feeds.PandasData(dataname=panel.xs(sym, axis=1, level=1).rename(columns=str.lower)))
+        cerebro.addstrategy(MomentumStrategy)
+        cerebro.broker.setcommission(commission=0.001)
+        cerebro.run()
+    return len(symbols) * len(panel) / (time.perf_counter() - start)
+
+def bench_vectorized(panel: pd.DataFrame) -> float:
+    start = time.perf_counter()
+    target = momentum_positions(panel['Close'])
+    run_vectorized(panel, target, commission=0.001)
+    return target.size / (time.perf_counter() - start)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--bars', type=int, default=2520)
+    parser.add_argument('--bt-symbols', type=int, default=5, help='symbols to run through backtrader')
+    args = parser.parse_args()
+    panel = synthetic_panel(args.symbols, args.bars)
+    bt_rate = bench_backtrader(panel, list(panel['Close'].columns[:args.bt_symbols]))
+    vec_rate = bench_vectorized(panel)
+    print(f'backtrader: {bt_rate:>14,.0f} bars/sec')
+    print(f'vectorized: {vec_rate:>14,.0f} bars/sec  ({vec_rate / bt_rate:,.0f}x)')
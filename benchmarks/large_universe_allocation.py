@@ -0,0 +1,42 @@
+"""Seconds and peak traced memory for allocate() over a large universe with
+each covariance estimator.
+
+    python -m benchmarks.large_universe_allocation --assets 3000 --bars 500
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from packages.portfolio import allocate
+
+def synthetic_returns(n_assets: int, n_bars: int, n_factors: int = 5, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (n_bars, n_factors))
+    loadings = rng.normal(0, 0.3, (n_assets, n_factors))
+    values = factors @ loadings.T + rng.normal(0.0003, 0.01, (n_bars, n_assets))
+    return pd.DataFrame(values, columns=[f'S{i:04d}' for i in range(n_assets)])
+
+def bench(returns: pd.DataFrame, method: str, cov: str) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    allocate(returns, method, cov=cov)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--assets', type=int, default=3000)
+    parser.add_argument('--bars', type=int, default=500)
+    parser.add_argument('--methods', nargs='+', default=['mv', 'hrp'])
+    parser.add_argument('--covs', nargs='+', default=['factor', 'ledoit_wolf'])
+    args = parser.parse_args()
+    returns = synthetic_returns(args.assets, args.bars)
+    for method in args.methods:
+        for cov in args.covs:
+            elapsed, peak = bench(returns, method, cov)
+            print(f'{method:>4} / {cov:<12}: {elapsed:8.2f}s  peak {peak:8.1f} MB')
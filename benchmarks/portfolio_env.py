@@ -0,0 +1,77 @@
+"""Env steps/sec for PPOAllocator rollouts: a pandas-per-step env against
+PortfolioEnv and its vectorized variants.
+
+    python -m benchmarks.portfolio_env --assets 50 --envs 16 --steps 20000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from packages.models.portfolio_env import PortfolioEnv, make_portfolio_vec_env
+
+class PandasPortfolioEnv(PortfolioEnv):
+    # The same MDP written the usual way: DataFrame slicing on every step
+    def __init__(self, returns: pd.DataFrame, **kwargs):
+        super().__init__(returns, **kwargs)
+        self.frame = returns
+
+    def _obs(self):
+        block = self.frame.iloc[self._t - self.window:self._t].T.to_numpy(dtype=np.float32).ravel()
+        return np.concatenate([block, self._weights])
+
+    def step(self, action):
+        target = pd.Series(np.exp(action) / np.exp(action).sum(), index=list(self.frame.columns) + ['cash'])
+        rets = self.frame.iloc[self._t].reindex(target.index).fillna(0.0)
+        cost = self.commission * (target - self._weights).abs().sum()
+        gross = (target * rets).sum()
+        self._weights = (target * (1 + rets) / (1 + gross)).to_numpy(dtype=np.float32)
+        self._t += 1
+        return self._obs(), float(np.log1p(gross - cost)), False, self._t >= self._end, {}
+
+def bench_env(env, steps: int) -> float:
+    env.reset(seed=0)
+    actions = np.random.default_rng(0).uniform(-1, 1, (steps, env.action_space.shape[0]))
+    start = time.perf_counter()
+    for a in actions:
+        _, _, _, truncated, _ = env.step(a)
+        if truncated:
+            env.reset()
+    return steps / (time.perf_counter() - start)
+
+def bench_vec(env, steps: int) -> float:
+    env.reset()
+    n = env.num_envs
+    actions = np.random.default_rng(0).uniform(-1, 1, (steps // n, n, env.action_space.shape[0]))
+    start = time.perf_counter()
+    for a in actions:
+        env.step(a)
+    rate = len(actions) * n / (time.perf_counter() - start)
+    env.close()
+    return rate
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--assets', type=int, default=50)
+    parser.add_argument('--bars', type=int, default=2520)
+    parser.add_argument('--envs', type=int, default=16)
+    parser.add_argument('--steps', type=int, default=20000)
+    args = parser.parse_args()
+    # More worker processes than cores only adds contention
+    subproc_envs = min(args.envs, os.cpu_count() or 1)
+    rng = np.random.default_rng(0)
+    returns = pd.DataFrame(rng.normal(0, 0.01, (args.bars, args.assets)),
+                           columns=[f'S{i:03d}' for i in range(args.assets)])
+    rates = {
+        'pandas env': bench_env(PandasPortfolioEnv(returns), args.steps // 10),
+        'PortfolioEnv': bench_env(PortfolioEnv(returns), args.steps),
+        f'DummyVecEnv x{args.envs}': bench_vec(make_portfolio_vec_env(returns, args.envs, 'dummy', seed=0), args.steps),
+        f'SubprocVecEnv x{subproc_envs}': bench_vec(make_portfolio_vec_env(returns, subproc_envs, 'subproc', seed=0),
+                                                    args.steps),
+        f'PortfolioVecEnv x{args.envs}': bench_vec(make_portfolio_vec_env(returns, args.envs, 'batched', seed=0), args.steps),
+    }
+    base = rates['pandas env']
+    for name, rate in rates.items():
+        print(f'{name:>24}: {rate:>12,.0f} steps/sec  ({rate / base:,.1f}x)')
@@ -0,0 +1,39 @@
+"""Rolling metrics over a strategy-returns matrix: rolling(window).apply with
+empyrical against the vectorized implementations.
+
+    python -m benchmarks.rolling_metrics --strategies 500 --bars 2520 --window 63
+"""
+import argparse
+import time
+
+import empyrical as emp
+import numpy as np
+import pandas as pd
+
+from packages.analytics import ROLLING_METRICS
+
+REFERENCE = {
+    'sharpe': emp.sharpe_ratio,
+    'sortino': emp.sortino_ratio,
+    'volatility': emp.annual_volatility,
+    'max_drawdown': emp.max_drawdown,
+    'cvar': emp.conditional_value_at_risk,
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--strategies', type=int, default=500)
+    parser.add_argument('--bars', type=int, default=2520)
+    parser.add_argument('--window', type=int, default=63)
+    parser.add_argument('--apply-strategies', type=int, default=5, help='columns to time rolling.apply on')
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    returns = pd.DataFrame(rng.normal(0.0003, 0.01, (args.bars, args.strategies)))
+    for name, fn in ROLLING_METRICS.items():
+        start = time.perf_counter()
+        fn(returns, args.window)
+        fast = time.perf_counter() - start
+        start = time.perf_counter()
+        returns.iloc[:, :args.apply_strategies].rolling(args.window).apply(REFERENCE[name], raw=True)
+        slow = (time.perf_counter() - start) * args.strategies / args.apply_strategies
+        print(f'{name:>12}: {fast:7.3f}s vectorized, ~{slow:7.1f}s rolling.apply  ({slow / fast:,.0f}x)')
@@ -0,0 +1,28 @@
+"""Wall time of a MomentumStrategy parameter sweep at increasing process counts.
+
+    python -m benchmarks.sweep_scaling --symbols 4 --bars 2520 --max-processes 8
+"""
+import argparse
+import time
+
+from benchmarks.backtest_engines import synthetic_panel
+from packages.strategies import sweep
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=4)
+    parser.add_argument('--bars', type=int, default=2520)
+    parser.add_argument('--max-processes', type=int, default=8)
+    parser.add_argument('--engine', default='backtrader')
+    args = parser.parse_args()
+    panel = synthetic_panel(args.symbols, args.bars)
+    grid = {'fast': [5, 8, 12, 16], 'slow': [26, 40, 60, 100]}
+    base = None
+    processes = 1
+    while processes <= args.max_processes:
+        start = time.perf_counter()
+        n = sum(1 for _ in sweep(panel, grid, processes=processes, engine=args.engine))
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        print(f'{processes:>3} processes: {n} runs in {elapsed:6.2f}s  (speedup {base / elapsed:4.1f}x)')
+        processes *= 2
@@ -1,18 +1,22 @@
 import streamlit as st
 from datetime import date, datetime
 import time
-import numpy as np
 import matplotlib.pyplot as plt
 import uuid
 import pandas as pd
-import yfinance as yf
 import plotly.graph_objs as go
-from pypfopt import EfficientFrontier, risk_models, expected_returns
+from pypfopt import EfficientFrontier, expected_returns
 from sklearn.ensemble import RandomForestClassifier
 import shap
 import streamlit.components.v1 as components
 from streamlit import session_state as ss
 
+from packages.analytics.downsample import downsample
+from packages.analytics.metrics import period_drawdowns
+from packages.data.cache import get_bar_cache, get_history_cache
+from packages.features.technical import ATR, RSI, SMA, RollReturn, compute_panel
+from packages.portfolio import covariance, dense_covariance
+
 # Set Streamlit dark theme
 st.set_page_config(page_title="Quant Dashboard", layout="wide")
 st.markdown("""
@@ -231,16 +235,17 @@ else:
     st.markdown("<style>.stSidebar { width: 320px !important; min-width: 320px !important; transition: width 0.5s; }</style>", unsafe_allow_html=True)
 
 # --- Live market ticker ---
-import yfinance as yf
 import time
 from datetime import datetime
 assets_ticker = ["AAPL", "SPY", "BTC-USD"]
-ticker_data = {}
-for t in assets_ticker:
-    try:
-        ticker_data[t] = yf.Ticker(t).history(period="1d", interval="1m").tail(1)["Close"].values[0]
-    except Exception:
-        ticker_data[t] = "-"
+ticker_data = {t: "-" for t in assets_ticker}
+try:
+    # Served from the process-wide bar cache: reruns within the TTL (or while a
+    # background refresh runs) make no network call
+    last_close = get_bar_cache().quotes(assets_ticker, period="1d", interval="1m")
+    ticker_data.update({t: v for t, v in last_close.items() if pd.notna(v)})
+except Exception:
+    pass
 now = datetime.now().strftime("%H:%M:%S")
 st.sidebar.markdown(f"""
 <div style='background:rgba(31,34,42,0.7); border-radius:12px; padding:0.7rem 1rem; margin-bottom:1rem; font-size:1.1rem;'>
@@ -249,15 +254,25 @@ st.sidebar.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
+# Charts get at most ~2 points per pixel column (extrema kept), however long the history
+CHART_WIDTH = 1200
+
+def chart_series(series, width=CHART_WIDTH, method="lttb"):
+    return downsample(series.dropna(), width, method)
+
+# Heatmap periods sized so the range gives a readable number of columns
+def heatmap_freq(index):
+    years = (index[-1] - index[0]).days / 365.25 if len(index) else 0
+    return "M" if years <= 2 else "Q" if years <= 6 else "Y"
+
 # --- Mini sparklines for each asset (no Plotly modebar) ---
 spark_assets = ["AAPL", "SPY", "TSLA", "NVDA"]
-sparkline_data = {}
-for t in spark_assets:
-    try:
-        hist = yf.Ticker(t).history(period="5d", interval="1h")
-        sparkline_data[t] = hist["Close"].values[-24:]
-    except Exception:
-        sparkline_data[t] = [None]*24
+sparkline_data = {t: [None]*24 for t in spark_assets}
+try:
+    hist = get_bar_cache().bars(spark_assets, period="5d", interval="1h")["Close"]
+    sparkline_data.update({t: hist[t].dropna().iloc[-24:].values for t in spark_assets if t in hist})
+except Exception:
+    pass
 spark_cols = st.sidebar.columns(len(spark_assets))
 for i, t in enumerate(spark_assets):
     with spark_cols[i]:
@@ -312,6 +327,8 @@ start_date, end_date = st.sidebar.date_input(
     max_value=date.today()
 )
 method = st.sidebar.selectbox("Allocation Method", ["MV", "HRP", "Black-Litterman"])
+cov_models = {"Sample": "sample", "Ledoit-Wolf": "ledoit_wolf", "Factor (PCA)": "factor"}
+cov_model = st.sidebar.selectbox("Covariance Model", list(cov_models))
 
 run = st.sidebar.button("Run Backtest")
 
@@ -340,14 +357,16 @@ if run:
     st.success(
         f"Backtest running with: Strategies={strategies}, Asset={asset}, Date Range={start_date} to {end_date}, Method={method} (Run at {run_time}, ID: {run_id})"
     )
-    with st.spinner("Fetching real price data from yfinance..."):
+    with st.spinner("Fetching real price data..."):
         try:
-            # Only fetch all assets for allocations and SHAP
-            df_all = yf.download(real_assets, start=str(start_date), end=str(end_date))
-            # For equity curve, use selected asset and SPY
+            # One load of every symbol any view needs, memoized across runs by
+            # (symbols, start, end); the views below are slices of it
             tickers = [asset, "SPY"] if asset != "SPY" else [asset]
-            ticker_arg = tickers if len(tickers) > 1 else tickers[0]
-            df = yf.download(ticker_arg, start=str(start_date), end=str(end_date))
+            panel = get_history_cache().load(real_assets + tickers, start=str(start_date), end=str(end_date))
+            symbols = panel.columns.get_level_values(1)
+            # Allocations and SHAP use all assets, the equity curve the asset and SPY
+            df_all = panel.loc[:, symbols.isin(real_assets)]
+            df = panel.loc[:, symbols.isin(tickers)]
             st.write(f"Fetched data for: {', '.join(tickers)}")
         except Exception as e:
             st.error(f"Error fetching data: {e}")
@@ -361,12 +380,8 @@ if run:
         if df is not None:
             try:
                 # Get prices for selected asset and SPY
-                if asset == "SPY":
-                    prices = df['Close']
-                    prices_bench = df['Close']
-                else:
-                    prices = df['Close'][asset]
-                    prices_bench = df['Close']['SPY']
+                prices = df['Close'][asset]
+                prices_bench = df['Close']['SPY']
                 returns = prices.pct_change().fillna(0)
                 returns_bench = prices_bench.pct_change().fillna(0)
                 equity_curve = (1 + returns).cumprod()
@@ -378,9 +393,12 @@ if run:
                 total_return_bench = equity_bench.iloc[-1] / equity_bench.iloc[0] - 1
                 # Static Plotly figure
                 fig = go.Figure()
-                fig.add_trace(go.Scatter(x=equity_curve.index, y=equity_curve, mode='lines', name=f"{asset} Strategy", line=dict(color='#00FFCC', width=2)))
-                fig.add_trace(go.Scatter(x=equity_bench.index, y=equity_bench, mode='lines', name="SPY Benchmark", line=dict(color='#4B8CFF', width=2, dash='dot')))
-                fig.add_trace(go.Scatter(x=drawdown.index, y=drawdown, fill='tozeroy', name='Drawdown', line=dict(color='purple', width=0), opacity=0.3, yaxis='y2'))
+                # Downsampled for display only; metrics above use the full series
+                equity_plot, bench_plot = chart_series(equity_curve), chart_series(equity_bench)
+                drawdown_plot = chart_series(drawdown, method="minmax")
+                fig.add_trace(go.Scatter(x=equity_plot.index, y=equity_plot, mode='lines', name=f"{asset} Strategy", line=dict(color='#00FFCC', width=2)))
+                fig.add_trace(go.Scatter(x=bench_plot.index, y=bench_plot, mode='lines', name="SPY Benchmark", line=dict(color='#4B8CFF', width=2, dash='dot')))
+                fig.add_trace(go.Scatter(x=drawdown_plot.index, y=drawdown_plot, fill='tozeroy', name='Drawdown', line=dict(color='purple', width=0), opacity=0.3, yaxis='y2'))
                 fig.update_layout(
                     template='plotly_dark',
                     plot_bgcolor='#18191A',
@@ -406,22 +424,27 @@ if run:
     with tabs[1]:
         st.markdown("<div class='stCard'>", unsafe_allow_html=True)
         st.markdown("### 🔥 Drawdown Heatmap")
-        # Example: simulated heatmap (replace with real data as needed)
-        data = np.random.rand(8, 10)
-        fig = go.Figure(data=go.Heatmap(z=data, x=[f"T{i+1}" for i in range(10)], y=real_assets, colorscale='RdBu', colorbar=dict(title='Drawdown')))
-        fig.update_layout(
-            template='plotly_dark',
-            plot_bgcolor='#23262F',
-            paper_bgcolor='#23262F',
-            font=dict(color='#F5F6FA'),
-            margin=dict(l=20, r=20, t=40, b=20)
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        if df_all is not None:
+            prices = df_all['Close'].dropna(axis=1, how='all')
+            dd = period_drawdowns(prices, heatmap_freq(prices.index))
+            fig = go.Figure(data=go.Heatmap(z=dd.values, x=list(dd.columns), y=list(dd.index), zmax=0,
+                                            colorscale='Reds_r', colorbar=dict(title='Max drawdown', tickformat='.0%'),
+                                            hovertemplate='%{y} %{x}: %{z:.1%}<extra></extra>'))
+            fig.update_layout(
+                template='plotly_dark',
+                plot_bgcolor='#23262F',
+                paper_bgcolor='#23262F',
+                font=dict(color='#F5F6FA'),
+                margin=dict(l=20, r=20, t=40, b=20)
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No asset data available for the drawdown heatmap.")
         st.markdown("</div>", unsafe_allow_html=True)
     # Allocations tab: real portfolio weights (Plotly)
     with tabs[2]:
         st.markdown("<div class='stCard'>", unsafe_allow_html=True)
-        st.markdown("### 📊 Portfolio Allocations (PyPortfolioOpt, Min Volatility)")
+        st.markdown(f"### 📊 Portfolio Allocations (PyPortfolioOpt, Min Volatility, {cov_model} covariance)")
         if df_all is not None:
             try:
                 prices = df_all['Close']
@@ -432,7 +455,8 @@ if run:
                 else:
                     returns = prices.pct_change().dropna()
                     mu = expected_returns.mean_historical_return(prices)
-                    S = risk_models.sample_cov(prices)
+                    # Annualized like risk_models.sample_cov; few factors for a handful of assets
+                    S = dense_covariance(covariance(returns, cov_models[cov_model], n_factors=3)) * 252
                     ef = EfficientFrontier(mu, S)
                     ef.min_volatility()
                     weights = ef.clean_weights()
@@ -469,33 +493,19 @@ if run:
         st.caption(f"Feature importances for <b>{asset}</b> using RandomForestClassifier and SHAP.", unsafe_allow_html=True)
         if df_all is not None:
             try:
-                # Feature engineering for selected asset
-                close = df_all['Close'][asset]
-                high = df_all['High'][asset]
-                low = df_all['Low'][asset]
-                volume = df_all['Volume'][asset]
+                # Feature engineering for selected asset (shared intermediates via FeaturePlan)
+                frame = df_all.xs(asset, axis=1, level=1)
+                feats = compute_panel(frame, [RSI(), RollReturn(), ATR(), SMA()])
                 df_feat = pd.DataFrame({
-                    'close': close,
-                    'high': high,
-                    'low': low,
-                    'volume': volume
+                    'close': frame['Close'],
+                    'high': frame['High'],
+                    'low': frame['Low'],
+                    'volume': frame['Volume'],
+                    'RSI': feats['rsi'],
+                    'Momentum': feats['roll_return'],
+                    'ATR': feats['atr'],
+                    'SMA': feats['sma'],
                 })
-                # RSI
-                delta = df_feat['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-                rs = gain / loss
-                df_feat['RSI'] = 100 - (100 / (1 + rs))
-                # Momentum (21-day return)
-                df_feat['Momentum'] = df_feat['close'].pct_change(21)
-                # ATR
-                high_low = df_feat['high'] - df_feat['low']
-                high_close = np.abs(df_feat['high'] - df_feat['close'].shift())
-                low_close = np.abs(df_feat['low'] - df_feat['close'].shift())
-                ranges = pd.concat([high_low, high_close, low_close], axis=1)
-                df_feat['ATR'] = ranges.max(axis=1).rolling(14).mean()
-                # SMA
-                df_feat['SMA'] = df_feat['close'].rolling(20).mean()
                 # Volume (normalized)
                 df_feat['Volume'] = (df_feat['volume'] - df_feat['volume'].mean()) / df_feat['volume'].std()
                 # Drop NA
@@ -5,6 +5,8 @@ This package contains performance analytics and risk metrics.
 """
 
 from .metrics import *
+from .tearsheet import *
+from .downsample import *
 from .shap_utils import *
 
 __version__ = "0.1.0" 
\ No newline at end of file
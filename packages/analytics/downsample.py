@@ -0,0 +1,95 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Point reduction for line charts. A chart `width` pixels wide shows at most a
+# low and a high per pixel column, so both methods keep about 2 * width points
+# however long the series is:
+#   minmax - each of `width` buckets keeps its lowest and highest point, so
+#            every peak and trough survives exactly;
+#   lttb   - largest-triangle-three-buckets: per bucket the point spanning the
+#            largest triangle with the previous pick and the next bucket's
+#            mean, which follows the line's shape; the global minimum and
+#            maximum are always added so drawdown troughs are never lost.
+# Both return sorted positions (first and last included) so aligned series
+# can share one selection.
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+
+def _x_values(x, n: int) -> np.ndarray:
+    if x is None:
+        return np.arange(n, dtype=float)
+    if isinstance(x, pd.DatetimeIndex) or np.issubdtype(np.asarray(x).dtype, np.datetime64):
+        return pd.DatetimeIndex(x).asi8.astype(float)
+    return np.asarray(x, dtype=float)
+
+def _extrema(y: np.ndarray) -> list[int]:
+    finite = ~np.isnan(y)
+    if not finite.any():
+        return []
+    return [int(np.nanargmin(y)), int(np.nanargmax(y))]
+
+def _check_width(width: int):
+    # a chart needs at least its two end points
+    if width < 2:
+        raise ValueError(f'width must be at least 2, got {width}')
+
+def minmax_indices(y, width: int) -> np.ndarray:
+    _check_width(width)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 2 * width:
+        return np.arange(n)
+    size = -(-n // width)
+    # edge padding repeats the last point, so padded picks map back onto it
+    padded = np.pad(y, (0, size * width - n), mode='edge').reshape(width, size)
+    missing = np.isnan(padded)
+    starts = np.arange(width) * size
+    lows = starts + np.argmin(np.where(missing, np.inf, padded), axis=1)
+    highs = starts + np.argmax(np.where(missing, -np.inf, padded), axis=1)
+    return np.unique(np.concatenate([[0, n - 1], np.minimum(lows, n - 1), np.minimum(highs, n - 1)]))
+
+def lttb_indices(y, width: int, x=None) -> np.ndarray:
+    _check_width(width)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_out = 2 * width
+    if n <= n_out:
+        return np.arange(n)
+    xs = _x_values(x, n)
+    filled = np.where(np.isnan(y), np.nanmean(y) if (~np.isnan(y)).any() else 0.0, y)
+    # n_out - 2 buckets over the interior points; bucket means from cumsums
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    cx = np.concatenate([[0.0], np.cumsum(xs)])
+    cy = np.concatenate([[0.0], np.cumsum(filled)])
+    out = [0]
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        mx = (cx[nhi] - cx[nlo]) / (nhi - nlo)
+        my = (cy[nhi] - cy[nlo]) / (nhi - nlo)
+        area = np.abs((xs[a] - mx) * (filled[lo:hi] - filled[a]) - (xs[a] - xs[lo:hi]) * (my - filled[a]))
+        a = lo + int(np.argmax(area))
+        out.append(a)
+    out.append(n - 1)
+    return np.unique(np.concatenate([out, _extrema(y)])).astype(int)
+
+def downsample_indices(y, width: int, method: str = 'lttb', x=None) -> np.ndarray:
+    if method == 'lttb':
+        return lttb_indices(y, width, x)
+    if method == 'minmax':
+        return minmax_indices(y, width)
+    raise ValueError(f"unknown downsampling method {method!r}; expected one of {', '.join(DOWNSAMPLE_METHODS)}")
+
+def downsample(series: pd.Series, width: Optional[int], method: str = 'lttb') -> pd.Series:
+    # At most ~2 * width points of series for a chart `width` pixels wide;
+    # width=None returns it unchanged; ValueError when width < 2
+    if width is None:
+        return series
+    _check_width(width)
+    if len(series) <= 2 * width:
+        return series
+    index = series.index if isinstance(series.index, pd.DatetimeIndex) else None
+    return series.iloc[downsample_indices(series.to_numpy(dtype=float), width, method, index)]
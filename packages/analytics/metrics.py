@@ -1,6 +1,9 @@
+import numbers
+
 import empyrical as emp
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
 def sharpe(returns):
     return emp.sharpe_ratio(returns)
@@ -18,5 +21,153 @@ def alpha_beta(returns, factor_returns):
 def cvar(returns, alpha=0.05):
     return returns[returns <= returns.quantile(alpha)].mean()
 
-def rolling_sharpe(returns, window=63):
-    return returns.rolling(window).apply(emp.sharpe_ratio) 
\ No newline at end of file
+# Rolling metrics over a whole returns matrix (T x N, one column per strategy
+# or asset) at once, matching empyrical applied to each trailing window:
+# moments come from cumulative sums, path-dependent metrics from strided
+# window views processed in bounded chunks. Like rolling(window).apply, a
+# window with fewer than min_periods (default: window) non-NaN returns is NaN;
+# within a window NaNs are skipped, or count as 0 in max drawdown, as in
+# empyrical.
+
+_CHUNK = 2 ** 22  # elements per strided block
+
+def _frame(returns):
+    if isinstance(returns, pd.Series):
+        return returns.to_frame(), True
+    return returns, False
+
+def _wrap(values: np.ndarray, returns, window: int, squeeze: bool, min_periods=None):
+    valid = _window_sums(returns.notna().to_numpy(dtype=float), window)
+    out = np.full((len(returns), values.shape[1]), np.nan)
+    out[window - 1:] = np.where(valid >= (min_periods or window), values, np.nan)
+    frame = pd.DataFrame(out, index=returns.index, columns=returns.columns)
+    return frame.iloc[:, 0] if squeeze else frame
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    # Sum over every trailing window: one cumsum and a shifted difference
+    c = np.cumsum(np.vstack([np.zeros((1, values.shape[1])), values]), axis=0)
+    return c[window:] - c[:-window]
+
+def _moments(values: np.ndarray, window: int):
+    # Count, mean and ddof=1 variance of the non-NaN values in each window.
+    # Values are centred on their column mean first so the running sums of
+    # squares do not cancel catastrophically.
+    valid = ~np.isnan(values)
+    centred = np.where(valid, values - np.nanmean(values, axis=0), 0.0)
+    n = _window_sums(valid.astype(float), window)
+    s1 = _window_sums(centred, window)
+    s2 = _window_sums(centred * centred, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_c = s1 / n
+        var = np.maximum(s2 - n * mean_c ** 2, 0.0) / (n - 1)
+        mean = mean_c + np.nanmean(values, axis=0)
+    var[n < 2] = np.nan
+    return n, mean, var
+
+def _chunked(values: np.ndarray, window: int, fn) -> np.ndarray:
+    # fn(block of shape (windows, N, window)) -> (windows, N), over strided views
+    views = sliding_window_view(values, window, axis=0)
+    step = max(1, _CHUNK // (values.shape[1] * window))
+    return np.concatenate([fn(views[i:i + step]) for i in range(0, len(views), step)])
+
+def rolling_sharpe(returns, window=63, risk_free=0.0, annualization=252, min_periods=None):
+    returns, squeeze = _frame(returns)
+    _, mean, var = _moments(returns.to_numpy(dtype=float) - risk_free, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = mean / np.sqrt(var) * np.sqrt(annualization)
+    return _wrap(values, returns, window, squeeze, min_periods)
+
+def rolling_volatility(returns, window=63, annualization=252, min_periods=None):
+    returns, squeeze = _frame(returns)
+    _, _, var = _moments(returns.to_numpy(dtype=float), window)
+    return _wrap(np.sqrt(var) * np.sqrt(annualization), returns, window, squeeze, min_periods)
+
+def rolling_sortino(returns, window=63, required_return=0.0, annualization=252, min_periods=None):
+    returns, squeeze = _frame(returns)
+    adj = returns.to_numpy(dtype=float) - required_return
+    valid = ~np.isnan(adj)
+    n = _window_sums(valid.astype(float), window)
+    total = _window_sums(np.where(valid, adj, 0.0), window)
+    downside = _window_sums(np.where(valid, np.minimum(adj, 0.0), 0.0) ** 2, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = (total / n * annualization) / (np.sqrt(downside / n) * np.sqrt(annualization))
+    return _wrap(values, returns, window, squeeze, min_periods)
+
+def rolling_max_drawdown(returns, window=63, min_periods=None):
+    # Within each window wealth starts at 1; drawdown is measured against the
+    # running peak including that start, on log wealth for stability
+    returns, squeeze = _frame(returns)
+    log_wealth = np.vstack([np.zeros((1, returns.shape[1])),
+                            np.cumsum(np.log1p(np.nan_to_num(returns.to_numpy(dtype=float))), axis=0)])
+
+    def worst(block):
+        return (block - np.maximum.accumulate(block, axis=-1)).min(axis=-1)
+
+    values = np.expm1(_chunked(log_wealth, window + 1, worst))
+    return _wrap(values, returns, window, squeeze, min_periods)
+
+def rolling_cvar(returns, window=63, cutoff=0.05, min_periods=None):
+    # empyrical's definition: mean of the int((window - 1) * cutoff) + 1 lowest returns
+    returns, squeeze = _frame(returns)
+    k = int((window - 1) * cutoff)
+
+    def tail_mean(block):
+        return np.partition(block, k, axis=-1)[..., :k + 1].mean(axis=-1)
+
+    values = _chunked(returns.to_numpy(dtype=float), window, tail_mean)
+    return _wrap(values, returns, window, squeeze, min_periods)
+
+ROLLING_METRICS = {
+    'sharpe': rolling_sharpe,
+    'sortino': rolling_sortino,
+    'volatility': rolling_volatility,
+    'max_drawdown': rolling_max_drawdown,
+    'cvar': rolling_cvar,
+}
+
+def rolling_metrics(returns, window=63, metrics=tuple(ROLLING_METRICS)) -> pd.DataFrame:
+    # (metric, column) frame of every requested rolling metric
+    returns, _ = _frame(returns)
+    return pd.concat({name: ROLLING_METRICS[name](returns, window) for name in metrics}, axis=1)
+
+# Max drawdown of every asset in every calendar period ('W', 'M', 'Q', 'Y')
+# or every block of n bars, from a price matrix in one pass: on log prices a
+# per-period offset larger than their whole range makes a single running
+# maximum restart at each period boundary. Each period's peak includes the
+# previous period's close, so a gap down on its first bar counts. Prices are
+# forward-filled; periods before an asset's first price are NaN.
+
+def _period_starts(index: pd.DatetimeIndex, freq) -> tuple[np.ndarray, list[str]]:
+    if isinstance(freq, numbers.Integral):
+        freq = int(freq)
+        if freq < 1:
+            raise ValueError(f'bucket size must be at least 1, got {freq}')
+        starts = np.arange(0, len(index), freq)
+        return starts, [str(index[i].date()) for i in starts]
+    periods = pd.DatetimeIndex(index).to_period(freq)
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    return starts, [str(periods[i]) for i in starts]
+
+def period_drawdowns(prices: pd.DataFrame, freq='Y') -> pd.DataFrame:
+    # assets x periods frame of (negative) max drawdowns
+    prices = prices.sort_index()
+    if prices.empty:
+        return pd.DataFrame(index=prices.columns, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logp = np.log(prices.ffill().to_numpy(dtype=float))
+    valid = np.isfinite(logp)
+    starts, labels = _period_starts(prices.index, freq)
+    lengths = np.diff(np.r_[starts, len(logp)])
+    group = np.repeat(np.arange(len(starts)), lengths)[:, None]
+    # previous period's close as every period's starting peak
+    base = np.full((len(starts), logp.shape[1]), -np.inf)
+    base[1:] = np.where(valid[starts[1:] - 1], logp[starts[1:] - 1], -np.inf)
+    values = np.where(valid, logp, -np.inf)
+    finite = values[valid]
+    span = (finite.max() - finite.min() + 1.0) if finite.size else 1.0
+    peak = np.maximum.accumulate(values + group * span, axis=0) - group * span
+    peak = np.maximum(peak, np.repeat(base, lengths, axis=0))
+    with np.errstate(invalid='ignore'):
+        drawdown = np.where(valid, np.expm1(logp - peak), np.nan)
+    worst = np.fmin.reduceat(drawdown, starts, axis=0)
+    return pd.DataFrame(worst.T, index=prices.columns, columns=labels)
@@ -1,8 +1,23 @@
-import shap
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import shap
 
 def plot_shap_summary(explainer, X):
     shap_values = explainer(X)
     shap.summary_plot(shap_values, X, show=False)
     plt.tight_layout()
-    plt.savefig('shap_summary.png') 
\ No newline at end of file
+    plt.savefig('shap_summary.png') 
+
+def feature_importance(shap_values, X) -> pd.DataFrame:
+    # Mean |SHAP| per feature, largest first; direction is the sign of the
+    # correlation between a feature's value and its contribution
+    names = list(X.columns) if isinstance(X, pd.DataFrame) else getattr(shap_values, 'feature_names', None)
+    values = np.asarray(getattr(shap_values, 'values', shap_values), dtype=float)
+    X = np.asarray(X, dtype=float)
+    centred_v, centred_x = values - values.mean(axis=0), X - X.mean(axis=0)
+    cov = (centred_v * centred_x).sum(axis=0)
+    return pd.DataFrame({
+        'importance': np.abs(values).mean(axis=0),
+        'direction': np.where(cov >= 0, 'positive', 'negative'),
+    }, index=names).sort_values('importance', ascending=False)
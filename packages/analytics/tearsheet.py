@@ -0,0 +1,131 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Summary metrics for every column of a T x N returns matrix (strategies,
+# sweep variants, assets) in one pass of array operations. Point estimates
+# follow empyrical's definitions; NaN returns are skipped in moments and count
+# as 0 in compounding, drawdowns and the bootstrap.
+
+_EULER_GAMMA = 0.5772156649015329
+
+def _drawdown(values: np.ndarray) -> np.ndarray:
+    wealth = np.cumprod(1 + values, axis=0)
+    peak = np.maximum(np.maximum.accumulate(wealth, axis=0), 1.0)
+    return (wealth / peak - 1).min(axis=0)
+
+def _cvar(values: np.ndarray, cutoff: float) -> np.ndarray:
+    k = int((len(values) - 1) * cutoff)
+    return np.partition(values, k, axis=0)[:k + 1].mean(axis=0)
+
+def bootstrap_sharpe(returns: np.ndarray, n_boot: int = 1000, seed: Optional[int] = 0,
+                     annualization: int = 252, chunk: int = 2048) -> np.ndarray:
+    # n_boot x N Sharpe ratios of i.i.d. resamples. Each resample is a row of
+    # multinomial counts (how often every bar is drawn), so the resampled
+    # first and second moments of all columns are two matrix products,
+    # counts @ r and counts @ r^2, instead of n_boot gathers per column.
+    values = np.nan_to_num(np.asarray(returns, dtype=float))
+    T = len(values)
+    counts = np.random.default_rng(seed).multinomial(T, np.full(T, 1.0 / T), size=n_boot).astype(float)
+    out = np.empty((n_boot, values.shape[1]))
+    for lo in range(0, values.shape[1], chunk):
+        block = values[:, lo:lo + chunk]
+        mean = counts @ block / T
+        var = (counts @ (block * block) / T - mean ** 2) * T / (T - 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, lo:lo + chunk] = mean / np.sqrt(var) * np.sqrt(annualization)
+    return out
+
+def deflated_sharpe(sharpe: np.ndarray, n_obs: int, skew: np.ndarray, kurtosis: np.ndarray,
+                    n_trials: Optional[int] = None, trials_sharpe_var: Optional[float] = None) -> np.ndarray:
+    # Bailey & Lopez de Prado: probability that the true (per-period) Sharpe
+    # beats the maximum expected from n_trials unskilled trials, given each
+    # estimate's skew and (non-excess) kurtosis. Defaults treat the columns as
+    # the trials.
+    n_trials = n_trials or len(sharpe)
+    if trials_sharpe_var is None:
+        trials_sharpe_var = float(np.nanvar(sharpe, ddof=1)) if len(sharpe) > 1 else 0.0
+    if n_trials > 1:
+        sr0 = np.sqrt(trials_sharpe_var) * ((1 - _EULER_GAMMA) * stats.norm.ppf(1 - 1 / n_trials)
+                                            + _EULER_GAMMA * stats.norm.ppf(1 - 1 / (n_trials * np.e)))
+    else:
+        sr0 = 0.0
+    denom = np.sqrt(np.maximum(1 - skew * sharpe + (kurtosis - 1) / 4 * sharpe ** 2, 1e-12))
+    return stats.norm.cdf((sharpe - sr0) * np.sqrt(n_obs - 1) / denom)
+
+def tear_sheet(returns: pd.DataFrame, benchmark: Optional[pd.Series] = None, annualization: int = 252,
+               risk_free: float = 0.0, cutoff: float = 0.05, n_boot: int = 1000, ci: float = 0.95,
+               n_trials: Optional[int] = None, seed: Optional[int] = 0) -> pd.DataFrame:
+    # One row per column of `returns`. sharpe_lo/hi are bootstrap percentile
+    # intervals; psr is the probabilistic Sharpe ratio against 0 and dsr the
+    # deflated Sharpe ratio treating all columns (or n_trials) as trials.
+    if isinstance(returns, pd.Series):
+        returns = returns.to_frame()
+    values = returns.to_numpy(dtype=float)
+    filled = np.nan_to_num(values)
+    T = len(values)
+    missing = np.isnan(values)
+    # NaN-aware reductions cost several times the plain ones; only pay when needed
+    nanmean, nanstd = (np.nanmean, np.nanstd) if missing.any() else (np.mean, np.std)
+    adj = values - risk_free
+    n = T - missing.sum(axis=0)
+    mean = nanmean(adj, axis=0)
+    std = nanstd(adj, axis=0, ddof=1)
+    downside = np.sqrt(nanmean(np.square(np.minimum(adj, 0.0)), axis=0)) * np.sqrt(annualization)
+    centred = adj - mean
+    sq = centred * centred
+    m2 = nanmean(sq, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        skew = nanmean(sq * centred, axis=0) / m2 ** 1.5
+        kurtosis = nanmean(sq * sq, axis=0) / m2 ** 2
+        sharpe = mean / std * np.sqrt(annualization)
+        sortino = mean * annualization / downside
+        total = np.prod(1 + filled, axis=0) - 1
+        annual = (1 + total) ** (annualization / T) - 1
+        max_dd = _drawdown(filled)
+        calmar = np.where(max_dd < 0, annual / np.abs(max_dd), np.nan)
+    table = {
+        'total_return': total,
+        'annual_return': annual,
+        'annual_volatility': nanstd(values, axis=0, ddof=1) * np.sqrt(annualization),
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'max_drawdown': max_dd,
+        'calmar': calmar,
+        'cvar': _cvar(filled, cutoff),
+        'skew': skew,
+        'kurtosis': kurtosis,
+    }
+    if benchmark is not None:
+        b = benchmark.reindex(returns.index).to_numpy(dtype=float) - risk_free
+        partial = missing.any() or np.isnan(b).any()
+        if partial:
+            # empyrical drops a bar from a column's regression if either side is missing
+            ind = np.where(np.isnan(adj), np.nan, b[:, None])
+            ind_res = ind - np.nanmean(ind, axis=0)
+            var = np.nanmean(ind_res * ind_res, axis=0)
+            cov = np.nanmean(ind_res * adj, axis=0)
+        else:
+            b_res = b - b.mean()
+            var = np.full(adj.shape[1], np.mean(b_res * b_res))
+            cov = b_res @ adj / T
+        var[var < 1e-30] = np.nan
+        beta = cov / var
+        if partial:
+            excess = np.nanmean(adj - beta * b[:, None], axis=0)
+        else:
+            excess = mean - beta * b.mean()
+        table['alpha'] = (excess + 1) ** annualization - 1
+        table['beta'] = beta
+    if n_boot:
+        boot = bootstrap_sharpe(values - risk_free, n_boot, seed, annualization)
+        tail = (1 - ci) / 2 * 100
+        table['sharpe_lo'], table['sharpe_hi'] = np.percentile(boot, [tail, 100 - tail], axis=0)
+    per_period = sharpe / np.sqrt(annualization)
+    table['psr'] = deflated_sharpe(per_period, T, skew, kurtosis, n_trials=1)
+    table['dsr'] = deflated_sharpe(per_period, T, skew, kurtosis, n_trials=n_trials)
+    frame = pd.DataFrame(table, index=returns.columns)
+    frame['observations'] = n
+    return frame
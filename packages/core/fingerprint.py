@@ -0,0 +1,30 @@
+import hashlib
+import pickle
+
+import numpy as np
+import pandas as pd
+
+def frame_fingerprint(frame) -> str:
+    # Content hash of values, index and column labels; equal data -> equal key
+    if isinstance(frame, pd.Series):
+        frame = frame.to_frame()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    h.update(repr(list(frame.columns)).encode())
+    return h.hexdigest()
+
+def array_fingerprint(values) -> str:
+    values = np.ascontiguousarray(values)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f'{values.dtype}{values.shape}'.encode())
+    h.update(values.tobytes())
+    return h.hexdigest()
+
+def model_fingerprint(model) -> str:
+    # Fitted weights, not object identity: a refit model gets a new key
+    model = getattr(model, 'model', model)
+    if hasattr(model, 'get_booster'):
+        payload = bytes(model.get_booster().save_raw('ubj'))
+    else:
+        payload = pickle.dumps(model)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
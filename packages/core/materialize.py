@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+class MaterializedResults:
+    # Computed results stored as serialized JSON, keyed by (name, source key)
+    # where the source key identifies the inputs and their versions (a
+    # finished backtest job, a model version, a price data version). A result is computed once per source key and then served as
+    # stored bytes with its content-hash ETag, so a repeated request costs a
+    # dict lookup. Entries live in an LRU and, with root set, on disk across
+    # restarts, where files past max_disk_bytes are evicted least recently
+    # used first (superseded versions are never read again, so they go).
+    # Concurrent requests for a missing entry compute it once.
+    def __init__(self, root: Optional[str] = None, max_entries: int = 256, max_disk_bytes: int = 256 * 2 ** 20):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: 'OrderedDict[tuple, tuple[bytes, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._computing: dict[tuple, threading.Lock] = {}
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def etag(body: bytes) -> str:
+        return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    def _path(self, name: str, key: str) -> Optional[str]:
+        if not self.root:
+            return None
+        return os.path.join(self.root, name, f'{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}.json')
+
+    @staticmethod
+    def _touch(path: Optional[str]):
+        # Access time orders _evict_disk, so entries served from memory stay
+        if path:
+            try:
+                os.utime(path, (time.time(), os.path.getmtime(path)))
+            except FileNotFoundError:
+                pass
+
+    def _evict_disk(self, keep: str):
+        files = [e for d in os.scandir(self.root) if d.is_dir() for e in os.scandir(d.path) if e.name.endswith('.json')]
+        total = sum(e.stat().st_size for e in files)
+        for entry in sorted(files, key=lambda e: e.stat().st_atime):
+            if total <= self.max_disk_bytes:
+                break
+            if entry.path != keep:
+                total -= entry.stat().st_size
+                os.remove(entry.path)
+
+    def _remember(self, entry_key: tuple, entry: tuple[bytes, str]):
+        with self._lock:
+            self._entries[entry_key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, name: str, key: str, compute: Callable[[], Any]) -> tuple[bytes, str]:
+        # (body, etag) of name's result for source key, calling compute() only on a miss
+        entry_key = (name, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None:
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+            else:
+                load_lock = self._computing.setdefault(entry_key, threading.Lock())
+        if entry is not None:
+            self._touch(self._path(name, key))
+            return entry
+        try:
+            with load_lock:
+                with self._lock:
+                    if entry_key in self._entries:
+                        self.hits += 1
+                        return self._entries[entry_key]
+                    self.misses += 1
+                path = self._path(name, key)
+                if path and os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        body = f.read()
+                    self._touch(path)
+                else:
+                    body = json.dumps(compute(), separators=(',', ':'), allow_nan=False).encode()
+                    if path:
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        tmp = f'{path}.{os.getpid()}.tmp'
+                        with open(tmp, 'wb') as f:
+                            f.write(body)
+                        os.replace(tmp, path)
+                        self._evict_disk(keep=path)
+                entry = (body, self.etag(body))
+                self._remember(entry_key, entry)
+            return entry
+        finally:
+            # also when compute() raises, so a failed key does not keep its lock
+            with self._lock:
+                self._computing.pop(entry_key, None)
+
+    def invalidate(self, name: Optional[str] = None):
+        # Drops stored results (all, or one name's) from memory and disk
+        with self._lock:
+            for entry_key in [k for k in self._entries if name is None or k[0] == name]:
+                del self._entries[entry_key]
+        if self.root:
+            for entry in os.listdir(self.root) if os.path.isdir(self.root) else []:
+                if name is None or entry == name:
+                    for f in os.listdir(os.path.join(self.root, entry)):
+                        os.remove(os.path.join(self.root, entry, f))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
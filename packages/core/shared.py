@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+class FrameSpec(NamedTuple):
+    # Small picklable handle: workers receive this instead of the data
+    values_path: str
+    index_path: str
+    columns: pd.Index
+    index_name: Optional[str]
+
+class SharedFrame:
+    # A float DataFrame written once to .npy files and opened by other
+    # processes as read-only memory maps, so every worker shares the same
+    # page-cache copy and nothing is pickled per task
+
+    def __init__(self, spec: FrameSpec, owner: bool = False):
+        self.spec = spec
+        self._owner = owner
+
+    @classmethod
+    def create(cls, frame: pd.DataFrame, directory: Optional[str] = None) -> 'SharedFrame':
+        # /dev/shm keeps the files in RAM where available
+        base = directory or ('/dev/shm' if os.path.isdir('/dev/shm') else None)
+        root = tempfile.mkdtemp(prefix='julian-shared-', dir=base)
+        values_path = os.path.join(root, 'values.npy')
+        index_path = os.path.join(root, 'index.npy')
+        np.save(values_path, np.ascontiguousarray(frame.to_numpy(dtype=float)))
+        np.save(index_path, frame.index.to_numpy())
+        return cls(FrameSpec(values_path, index_path, frame.columns, frame.index.name), owner=True)
+
+    def frame(self) -> pd.DataFrame:
+        values = np.load(self.spec.values_path, mmap_mode='r')
+        index = pd.Index(np.load(self.spec.index_path, mmap_mode='r'), name=self.spec.index_name)
+        return pd.DataFrame(values, index=index, columns=self.spec.columns, copy=False)
+
+    def close(self):
+        if self._owner:
+            shutil.rmtree(os.path.dirname(self.spec.values_path), ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,284 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+
+from .providers import MarketDataProvider, get_provider
+
+# Process-wide cache of recent bars for quote displays (the dashboard's
+# ticker and sparklines), which ask for the same few symbols on every rerun.
+# Entries are per (symbol, period, interval) and expire after a per-interval
+# TTL. A request fetches all of its missing symbols in one provider call, and
+# concurrent requests for a symbol that is already being fetched wait for
+# that fetch instead of starting another (single flight). Expired entries are
+# served at once while one background fetch refreshes them, so after the
+# first load a rerun never waits on the network.
+
+DEFAULT_TTLS = {'1m': 30.0, '2m': 60.0, '5m': 60.0, '15m': 120.0, '30m': 120.0,
+                '60m': 300.0, '1h': 300.0, '90m': 300.0, '1d': 3600.0}
+
+class BarCache:
+    def __init__(self, provider: Optional[MarketDataProvider] = None, ttls: Optional[dict] = None,
+                 default_ttl: float = 300.0, stale_while_revalidate: bool = True,
+                 clock: Callable[[], float] = time.monotonic):
+        # provider=None uses get_provider() at fetch time
+        self.provider = provider
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.clock = clock
+        self._entries: dict[tuple, tuple[pd.DataFrame, float]] = {}
+        self._inflight: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.fetches = 0
+
+    def ttl(self, interval: str) -> float:
+        return self.ttls.get(interval, self.default_ttl)
+
+    def _fetch(self, symbols: list[str], period: str, interval: str, future: Future):
+        # One provider call for every symbol of the batch; each symbol's slice
+        # (empty when the provider returned nothing for it) becomes an entry
+        try:
+            provider = self.provider or get_provider()
+            panel = provider.history(symbols, period=period, interval=interval)
+            frames = {}
+            for sym in symbols:
+                if not panel.empty and sym in panel.columns.get_level_values(1):
+                    frames[sym] = panel.xs(sym, axis=1, level=1).dropna(how='all')
+                else:
+                    frames[sym] = pd.DataFrame()
+        except BaseException as e:
+            with self._lock:
+                for sym in symbols:
+                    self._inflight.pop((sym, period, interval), None)
+            future.set_exception(e)
+            return
+        stamp = self.clock()
+        with self._lock:
+            self.fetches += 1
+            for sym, frame in frames.items():
+                self._entries[(sym, period, interval)] = (frame, stamp)
+                self._inflight.pop((sym, period, interval), None)
+        future.set_result(frames)
+
+    def bars(self, symbols: Iterable[str], period: str = '5d', interval: str = '1h') -> pd.DataFrame:
+        # (field, symbol) panel like provider.history(symbols, period=..., interval=...)
+        symbols = list(dict.fromkeys(symbols))
+        now, ttl = self.clock(), self.ttl(interval)
+        frames, waits, missing, stale = {}, {}, [], []
+        with self._lock:
+            for sym in symbols:
+                key = (sym, period, interval)
+                entry = self._entries.get(key)
+                fresh = entry is not None and now - entry[1] < ttl
+                if entry is not None and (fresh or self.stale_while_revalidate):
+                    frames[sym] = entry[0]
+                    self.hits += 1
+                    if not fresh and key not in self._inflight:
+                        stale.append(sym)
+                elif key in self._inflight:
+                    waits[sym] = self._inflight[key]
+                    self.misses += 1
+                else:
+                    missing.append(sym)
+                    self.misses += 1
+            batches = [(batch, Future(), background) for batch, background in ((missing, False), (stale, True)) if batch]
+            for batch, future, _ in batches:
+                for sym in batch:
+                    self._inflight[(sym, period, interval)] = future
+        for batch, future, background in batches:
+            if background:
+                threading.Thread(target=self._fetch, args=(batch, period, interval, future), daemon=True).start()
+            else:
+                self._fetch(batch, period, interval, future)
+                frames.update(future.result())
+        for sym, future in waits.items():
+            frames[sym] = future.result()[sym]
+        frames = {sym: frames[sym] for sym in symbols if not frames[sym].empty}
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+
+    def quotes(self, symbols: Iterable[str], period: str = '1d', interval: str = '1m') -> pd.Series:
+        # Last close of each symbol (NaN when there is none)
+        symbols = list(symbols)
+        panel = self.bars(symbols, period, interval)
+        if panel.empty:
+            return pd.Series(float('nan'), index=symbols, name='Close')
+        return panel['Close'].ffill().iloc[-1].reindex(symbols)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'inflight': len(self._inflight),
+                    'hits': self.hits, 'misses': self.misses, 'fetches': self.fetches}
+
+class HistoryCache:
+    # Memoized provider.history(symbols, start=..., end=...) for repeated
+    # research runs over the same range. Panels are keyed by (sorted symbols,
+    # start, end, interval, provider data version) and kept in a byte-bounded
+    # in-memory LRU backed by Parquet files under root, evicted least recently
+    # used first once they exceed max_disk_bytes. A request whose symbols are
+    # a subset of a panel already in memory for the same range is a slice of
+    # it. Ranges that reach today (or are open-ended) are refetched after
+    # recent_ttl seconds, since new bars may have arrived; a provider that
+    # reports a new data_version() (e.g. a price store that was appended to)
+    # gets new keys, so nothing from before the change is served.
+    def __init__(self, root: str = 'data/cache/history', max_disk_bytes: int = 512 * 2 ** 20,
+                 max_memory_bytes: int = 256 * 2 ** 20, recent_ttl: float = 3600.0,
+                 provider: Optional[MarketDataProvider] = None):
+        self.root = root
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.recent_ttl = recent_ttl
+        self.provider = provider
+        self._panels: 'OrderedDict[str, tuple]' = OrderedDict()  # key -> (symbols, span, panel, bytes, fetched)
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def _span(start, end, interval: str, source: Optional[str]) -> tuple:
+        def day(d):
+            return None if d is None else str(pd.Timestamp(d).date())
+        return day(start), day(end), interval, source
+
+    def _key(self, symbols: list[str], span: tuple) -> str:
+        text = json.dumps([symbols, *span])
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f'{key}.parquet')
+
+    def _expired(self, span: tuple, fetched: float) -> bool:
+        end = span[1]
+        recent = end is None or pd.Timestamp(end) >= pd.Timestamp.today().normalize()
+        return recent and time.time() - fetched > self.recent_ttl
+
+    def _remember(self, key: str, symbols: list[str], span: tuple, panel: pd.DataFrame, fetched: float):
+        with self._lock:
+            self._panels[key] = (frozenset(symbols), span, panel, int(panel.memory_usage(deep=False).sum()), fetched)
+            self._panels.move_to_end(key)
+            while len(self._panels) > 1 and sum(e[3] for e in self._panels.values()) > self.max_memory_bytes:
+                self._panels.popitem(last=False)
+
+    def _from_memory(self, key: str, symbols: list[str], span: tuple) -> Optional[tuple]:
+        with self._lock:
+            entry = self._panels.get(key)
+            if entry is None:
+                # the smallest cached superset of the symbols over the same range
+                wanted = set(symbols)
+                supersets = [(k, e) for k, e in self._panels.items() if e[1] == span and wanted <= e[0]]
+                if not supersets:
+                    return None
+                key, entry = min(supersets, key=lambda ke: len(ke[1][0]))
+            if self._expired(span, entry[4]):
+                return None
+            self._panels.move_to_end(key)
+            self.hits += 1
+            panel = entry[2]
+        self._touch(key)
+        version = f'{key}@{entry[4]}'
+        held = panel.columns.get_level_values(1)
+        if set(held) <= set(symbols):
+            return panel, version
+        return panel.loc[:, held.isin(symbols)], version
+
+    def _touch(self, key: str):
+        # Marks the Parquet copy as used (access time), which _evict_disk
+        # orders by, so panels served from memory are not evicted first
+        path = self._path(key)
+        try:
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+        except FileNotFoundError:
+            pass
+
+    def _evict_disk(self, keep: str):
+        # Least recently used first (access time is set on every hit)
+        files = [e for e in os.scandir(self.root) if e.name.endswith('.parquet')]
+        total = sum(e.stat().st_size for e in files)
+        for entry in sorted(files, key=lambda e: e.stat().st_atime):
+            if total <= self.max_disk_bytes:
+                break
+            if entry.path != keep:
+                total -= entry.stat().st_size
+                os.remove(entry.path)
+
+    def data_version(self) -> Optional[str]:
+        # The provider's, which every key includes; cheap, nothing is loaded
+        return (self.provider or get_provider()).data_version()
+
+    def load(self, symbols: Iterable[str], start=None, end=None, interval: str = '1d') -> pd.DataFrame:
+        return self.load_with_version(symbols, start, end, interval)[0]
+
+    def load_with_version(self, symbols: Iterable[str], start=None, end=None,
+                          interval: str = '1d') -> tuple[pd.DataFrame, Optional[str]]:
+        # (panel, version): the version names the cache entry and when it was
+        # fetched, so results derived from the panel can be keyed on it
+        # without hashing it. None when the provider returned nothing.
+        symbols = sorted(set(symbols))
+        provider = self.provider or get_provider()
+        span = self._span(start, end, interval, provider.data_version())
+        key = self._key(symbols, span)
+        cached = self._from_memory(key, symbols, span)
+        if cached is not None:
+            return cached
+        path = self._path(key)
+        if os.path.exists(path) and not self._expired(span, os.path.getmtime(path)):
+            panel = pd.read_parquet(path)
+            fetched = os.path.getmtime(path)
+            self._touch(key)
+            self._remember(key, symbols, span, panel, fetched)
+            with self._lock:
+                self.hits += 1
+            return panel, f'{key}@{fetched}'
+        with self._lock:
+            self.misses += 1
+        panel = provider.history(symbols, start=start, end=end, interval=interval)
+        if panel.empty:
+            return panel, None  # failures are not cached
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        panel.to_parquet(tmp)
+        os.replace(tmp, path)
+        self._evict_disk(keep=path)
+        fetched = os.path.getmtime(path)
+        self._remember(key, symbols, span, panel, fetched)
+        return panel, f'{key}@{fetched}'
+
+    def stats(self) -> dict:
+        files = [e for e in os.scandir(self.root) if e.name.endswith('.parquet')] if os.path.isdir(self.root) else []
+        with self._lock:
+            return {'memory_panels': len(self._panels), 'memory_bytes': sum(e[3] for e in self._panels.values()),
+                    'disk_panels': len(files), 'disk_bytes': sum(e.stat().st_size for e in files),
+                    'hits': self.hits, 'misses': self.misses}
+
+_cache: Optional[BarCache] = None
+_history: Optional[HistoryCache] = None
+_cache_lock = threading.Lock()
+
+def get_bar_cache() -> BarCache:
+    # The process-wide instance; Streamlit reruns share it because the module
+    # is imported once per server process
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = BarCache()
+        return _cache
+
+def get_history_cache() -> HistoryCache:
+    # JULIAN_HISTORY_CACHE sets the directory, JULIAN_HISTORY_CACHE_MB its size
+    global _history
+    with _cache_lock:
+        if _history is None:
+            _history = HistoryCache(os.environ.get('JULIAN_HISTORY_CACHE', 'data/cache/history'),
+                                    max_disk_bytes=int(os.environ.get('JULIAN_HISTORY_CACHE_MB', '512')) * 2 ** 20)
+        return _history
@@ -0,0 +1,152 @@
+import glob
+import os
+import uuid
+from datetime import datetime
+from typing import Iterable, Optional
+
+import duckdb
+import pandas as pd
+
+KEYS = ['date', 'symbol']
+
+def month_of(date) -> str:
+    return pd.Timestamp(date).strftime('%Y-%m')
+
+class ParquetLake:
+    # Long (date, symbol, ...) table stored as Hive partitions, one directory
+    # per calendar month (month=YYYY-MM) with rows sorted by (symbol, date).
+    # Month directories keep file counts bounded for thousands of symbols;
+    # sorting lets Parquet row-group stats skip symbols inside a partition.
+
+    def __init__(self, root: str, name: str = 'lake', max_files: int = 16):
+        self.root = root
+        self.name = name
+        # append() compacts a month once it holds more files than this
+        self.max_files = max_files
+
+    @property
+    def files(self) -> list[str]:
+        return sorted(glob.glob(os.path.join(self.root, 'month=*', '*.parquet')))
+
+    def _partition(self, month: str) -> str:
+        return os.path.join(self.root, f'month={month}')
+
+    def _partition_files(self, month: str) -> list[str]:
+        return sorted(glob.glob(os.path.join(self._partition(month), '*.parquet')))
+
+    def _read_partition(self, month: str, columns: str = '*') -> pd.DataFrame:
+        pattern = os.path.join(self._partition(month), '*.parquet')
+        with duckdb.connect() as con:
+            return con.execute(f"SELECT {columns} FROM read_parquet('{pattern}', union_by_name=true)").df()
+
+    def _replace_partition(self, month: str, df: pd.DataFrame):
+        stale = self._partition_files(month)
+        path = os.path.join(self._partition(month), 'data.parquet')
+        self._write(df, path)
+        for f in stale:
+            if f != path:
+                os.remove(f)
+
+    def _source(self) -> str:
+        pattern = os.path.join(self.root, 'month=*', '*.parquet')
+        return (f"read_parquet('{pattern}', hive_partitioning=true, union_by_name=true, "
+                "hive_types={'month': 'VARCHAR'})")
+
+    def _write(self, df: pd.DataFrame, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with duckdb.connect() as con:
+            con.register('part', df.sort_values(['symbol', 'date']))
+            con.execute(f"COPY part TO '{tmp}' (FORMAT PARQUET)")
+        os.replace(tmp, path)
+
+    def upsert(self, df: pd.DataFrame):
+        # Rewrites only the months present in df; rows keyed by (date, symbol)
+        # take df's values for df's columns and keep any other stored columns
+        df = df.assign(date=pd.to_datetime(df['date']))
+        for month, new in df.groupby(df['date'].dt.strftime('%Y-%m')):
+            if self._partition_files(month):
+                merged = self._read_partition(month).set_index(KEYS)
+                new = new.set_index(KEYS)
+                merged = merged.reindex(merged.index.union(new.index))
+                for col in new.columns:
+                    if col not in merged:
+                        merged[col] = float('nan')
+                merged.loc[new.index, new.columns] = new
+                new = merged.reset_index()
+            self._replace_partition(month, new)
+
+    def append(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Append-only write with primary-key semantics on (date, symbol): rows
+        # already stored are dropped, the rest land in a new file per month.
+        # Only the key columns of the touched months are read.
+        df = df.assign(date=pd.to_datetime(df['date'])).drop_duplicates(KEYS, keep='last')
+        written = []
+        for month, new in df.groupby(df['date'].dt.strftime('%Y-%m')):
+            files = self._partition_files(month)
+            if files:
+                stored = pd.MultiIndex.from_frame(self._read_partition(month, 'date, symbol')[KEYS])
+                new = new[~pd.MultiIndex.from_frame(new[KEYS]).isin(stored)]
+            if new.empty:
+                continue
+            self._write(new, os.path.join(self._partition(month), f'part-{uuid.uuid4().hex}.parquet'))
+            written.append(new)
+            if len(files) + 1 > self.max_files:
+                self.compact(month)
+        return pd.concat(written, ignore_index=True) if written else df.iloc[:0]
+
+    def compact(self, month: str):
+        self._replace_partition(month, self._read_partition(month))
+
+    def scan(self, columns: Optional[Iterable[str]] = None, symbols: Optional[Iterable[str]] = None,
+             start=None, end=None) -> pd.DataFrame:
+        if not self.files:
+            return pd.DataFrame(columns=KEYS + list(columns or []))
+        where, params = [], []
+        if start is not None:
+            # month filters prune whole partitions before any file is opened
+            where += ['month >= ?', 'date >= ?::TIMESTAMP']
+            params += [month_of(start), str(pd.Timestamp(start))]
+        if end is not None:
+            where += ['month <= ?', 'date <= ?::TIMESTAMP']
+            params += [month_of(end), str(pd.Timestamp(end))]
+        if symbols is not None:
+            symbols = list(symbols)
+            where.append(f"symbol IN ({', '.join('?' * len(symbols))})")
+            params += symbols
+        cols = '*' if columns is None else ', '.join(KEYS + [f'"{c}"' for c in columns])
+        sql = f"SELECT {cols} FROM {self._source()}"
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        with duckdb.connect() as con:
+            out = con.execute(sql + ' ORDER BY date, symbol', params).df()
+        return out.drop(columns='month', errors='ignore')
+
+    def query(self, sql: str, params: Optional[list] = None) -> pd.DataFrame:
+        # sql refers to the dataset by self.name, e.g. "SELECT max(date) FROM lake"
+        with duckdb.connect() as con:
+            con.execute(f"CREATE VIEW {self.name} AS SELECT * FROM {self._source()}")
+            return con.execute(sql, params or []).df()
+
+    def columns(self) -> list[str]:
+        if not self.files:
+            return []
+        return [c for c in self.query(f"DESCRIBE SELECT * FROM {self.name}")['column_name'] if c not in KEYS + ['month']]
+
+    def stats(self) -> dict:
+        files = self.files
+        out = {
+            'files': len(files),
+            'partitions': len({os.path.dirname(f) for f in files}),
+            'bytes': sum(os.path.getsize(f) for f in files),
+            'rows': 0,
+            'symbols': 0,
+            'first_date': None,
+            'last_date': None,
+            'last_modified': None,
+        }
+        if files:
+            row = self.query(f"SELECT count(*), count(DISTINCT symbol), min(date), max(date) FROM {self.name}").iloc[0]
+            out.update(rows=int(row.iloc[0]), symbols=int(row.iloc[1]), first_date=row.iloc[2], last_date=row.iloc[3])
+            out['last_modified'] = datetime.fromtimestamp(max(os.path.getmtime(f) for f in files))
+        return out
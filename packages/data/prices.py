@@ -0,0 +1,106 @@
+import os
+from typing import Iterable, Optional
+
+import duckdb
+import pandas as pd
+
+from .lake import KEYS, ParquetLake
+
+def to_long(panel: pd.DataFrame) -> pd.DataFrame:
+    # (field, symbol) wide panel -> tidy (date, symbol, Open, High, ...) rows
+    long = panel.stack(level=1, future_stack=True).dropna(how='all')
+    long.index.names = KEYS
+    long.columns.name = None
+    return long.reset_index()
+
+def to_panel(long: pd.DataFrame) -> pd.DataFrame:
+    fields = [c for c in long.columns if c not in KEYS]
+    panel = long.pivot(index='date', columns='symbol', values=fields)
+    panel.index.name = None
+    return panel
+
+class PriceStore:
+    # Daily OHLCV in an append-only ParquetLake exposed to SQL as `prices`.
+    # The first/last stored date per symbol lives in a small sidecar file so an
+    # incremental run never has to scan history to find what is missing.
+
+    def __init__(self, root: str = 'data/prices'):
+        self.lake = ParquetLake(root, name='prices')
+        self._marks_path = os.path.join(root, '_watermarks.parquet')
+
+    def watermarks(self) -> pd.DataFrame:
+        if os.path.exists(self._marks_path):
+            with duckdb.connect() as con:
+                marks = con.execute(f"SELECT * FROM read_parquet('{self._marks_path}')").df()
+        elif self.lake.files:
+            marks = self.lake.query("SELECT symbol, min(date) AS first, max(date) AS last FROM prices GROUP BY symbol")
+        else:
+            marks = pd.DataFrame({'symbol': pd.Series(dtype=str), 'first': pd.Series(dtype='datetime64[ns]'),
+                                  'last': pd.Series(dtype='datetime64[ns]')})
+        return marks.set_index('symbol')
+
+    def version(self) -> Optional[str]:
+        # Moves with the watermarks, i.e. on every write that stored new bars
+        return str(os.stat(self._marks_path).st_mtime_ns) if os.path.exists(self._marks_path) else None
+
+    def _update_marks(self, written: pd.DataFrame, covered=None, returned=()):
+        span = written.groupby('symbol')['date'].agg(['min', 'max']).set_axis(['first', 'last'], axis=1)
+        if covered is not None:
+            # The whole requested range counts as stored, so holidays and
+            # weekends at its edges are not requested again on the next run.
+            # Only for symbols the provider returned rows for (a failed
+            # download stays missing), and never the current session, whose
+            # bar may still change.
+            symbols, lo, hi = covered
+            symbols = [s for s in symbols if s in set(returned)]
+            hi = min(pd.Timestamp(hi), pd.Timestamp.today().normalize())
+            if symbols and pd.Timestamp(lo) < hi:
+                fetched = pd.DataFrame({'first': pd.Timestamp(lo), 'last': hi - pd.Timedelta(days=1)},
+                                       index=pd.Index(symbols, name='symbol'))
+                span = pd.concat([span, fetched])
+        if span.empty:
+            return
+        marks = pd.concat([self.watermarks(), span])
+        marks = marks.groupby(level=0).agg({'first': 'min', 'last': 'max'}).rename_axis('symbol').reset_index()
+        os.makedirs(os.path.dirname(self._marks_path) or '.', exist_ok=True)
+        tmp = self._marks_path + '.tmp'
+        with duckdb.connect() as con:
+            con.register('marks', marks)
+            con.execute(f"COPY marks TO '{tmp}' (FORMAT PARQUET)")
+        os.replace(tmp, self._marks_path)
+
+    def missing(self, symbols: Iterable[str], start, end) -> dict[tuple, list[str]]:
+        # Ranges still to fetch for [start, end) (end exclusive, like yfinance),
+        # grouped by range so symbols with the same gap download in one batch
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        marks = self.watermarks()
+        day = pd.Timedelta(days=1)
+        out = {}
+        for sym in symbols:
+            if sym not in marks.index:
+                ranges = [(start, end)]
+            else:
+                first, last = marks.loc[sym, 'first'], marks.loc[sym, 'last']
+                ranges = [(start, min(first, end)), (max(last + day, start), end)]
+            for lo, hi in ranges:
+                if lo < hi:
+                    out.setdefault((lo, hi), []).append(sym)
+        return out
+
+    def append(self, long: pd.DataFrame, covered=None) -> pd.DataFrame:
+        # covered: optional (symbols, start, end) that was fully fetched
+        written = self.lake.append(long) if not long.empty else long
+        self._update_marks(written, covered, returned=long['symbol'].unique() if not long.empty else ())
+        return written
+
+    def refresh(self, long: pd.DataFrame, covered=None):
+        # Overwrite stored rows for these keys (e.g. after a vendor restatement)
+        if not long.empty:
+            self.lake.upsert(long)
+        self._update_marks(long, covered, returned=long['symbol'].unique() if not long.empty else ())
+
+    def load(self, symbols: Iterable[str], start=None, end=None) -> pd.DataFrame:
+        # end is exclusive, as in yfinance
+        if end is not None:
+            end = pd.Timestamp(end) - pd.Timedelta(microseconds=1)
+        return to_panel(self.lake.scan(symbols=symbols, start=start, end=end))
@@ -0,0 +1,150 @@
+import abc
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+import duckdb
+import pandas as pd
+import yfinance as yf
+
+from .lake import KEYS
+from .prices import PriceStore, to_panel
+
+class MarketDataProvider(abc.ABC):
+    # All market data goes through history(), which returns a (field, symbol)
+    # OHLCV panel like yf.download(..., group_by='column') for any number of symbols
+
+    @abc.abstractmethod
+    def history(self, symbols: Iterable[str], start=None, end=None, interval: str = '1d',
+                period: Optional[str] = None) -> pd.DataFrame:
+        pass
+
+    def data_version(self) -> Optional[str]:
+        # Changes whenever the data history() serves may have changed; None
+        # when the source cannot tell (a live vendor), so caches use TTLs
+        return None
+
+class _RateLimiter:
+    # Spaces request starts at least min_interval seconds apart across threads
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._next - now)
+            self._next = max(now, self._next) + self.min_interval
+        if delay:
+            time.sleep(delay)
+
+class YFinanceProvider(MarketDataProvider):
+    def __init__(self, batch_size: int = 100, max_workers: int = 4, retries: int = 3,
+                 backoff: float = 1.0, min_interval: float = 0.2):
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self._limiter = _RateLimiter(min_interval)
+
+    def _fetch(self, batch: list[str], **kwargs) -> pd.DataFrame:
+        # yfinance reports most failures as an empty frame, so retry on those too
+        for attempt in range(self.retries):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            self._limiter.wait()
+            try:
+                raw = yf.download(batch, progress=False, threads=False, **kwargs)
+            except Exception:
+                if attempt == self.retries - 1:
+                    raise
+                continue
+            if raw is not None and not raw.empty:
+                if not isinstance(raw.columns, pd.MultiIndex):
+                    raw.columns = pd.MultiIndex.from_product([raw.columns, batch])
+                return raw
+        return pd.DataFrame()
+
+    def history(self, symbols, start=None, end=None, interval='1d', period=None):
+        symbols = list(dict.fromkeys(symbols))
+        kwargs = {'interval': interval}
+        if period is not None:
+            kwargs['period'] = period
+        else:
+            kwargs.update(start=start, end=end)
+        batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches) or 1)) as pool:
+            parts = [p for p in pool.map(lambda b: self._fetch(b, **kwargs), batches) if not p.empty]
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+
+class ParquetReplayProvider(MarketDataProvider):
+    # Offline provider over stored bars: a PriceStore directory, or a single
+    # long-format (date, symbol, Open, ...) .parquet/.csv file. Serves the one
+    # interval it was recorded at.
+
+    def __init__(self, path: str = 'data/prices', interval: str = '1d'):
+        self.path = path
+        self.interval = interval
+
+    def _long(self, symbols, start, end) -> pd.DataFrame:
+        if os.path.isdir(self.path):
+            if end is not None:
+                end = pd.Timestamp(end) - pd.Timedelta(microseconds=1)
+            return PriceStore(self.path).lake.scan(symbols=symbols, start=start, end=end)
+        reader = 'read_csv_auto' if self.path.endswith('.csv') else 'read_parquet'
+        with duckdb.connect() as con:
+            long = con.execute(f"SELECT * FROM {reader}('{self.path}')").df()
+        long = long[long['symbol'].isin(symbols)].assign(date=lambda d: pd.to_datetime(d['date']))
+        if start is not None:
+            long = long[long['date'] >= pd.Timestamp(start)]
+        if end is not None:
+            long = long[long['date'] < pd.Timestamp(end)]
+        return long.sort_values(KEYS)
+
+    def data_version(self) -> Optional[str]:
+        if os.path.isdir(self.path):
+            return PriceStore(self.path).version()
+        return str(os.stat(self.path).st_mtime_ns) if os.path.exists(self.path) else None
+
+    def history(self, symbols, start=None, end=None, interval='1d', period=None):
+        if interval != self.interval:
+            raise ValueError(f"replay data at {self.path} is {self.interval}, not {interval}")
+        symbols = list(dict.fromkeys(symbols))
+        long = self._long(symbols, None if period else start, None if period else end)
+        if long.empty:
+            return pd.DataFrame()
+        if period is not None:
+            long = long[long['date'] >= _period_start(period, long['date'].max())]
+        return to_panel(long)
+
+def _period_start(period: str, last: pd.Timestamp) -> pd.Timestamp:
+    # yfinance-style periods ('5d', '3mo', '1y', 'ytd', 'max'), counted back from the last bar
+    if period == 'max':
+        return pd.Timestamp.min
+    if period == 'ytd':
+        return pd.Timestamp(year=last.year, month=1, day=1)
+    m = re.fullmatch(r'(\d+)(d|mo|y)', period)
+    if m is None:
+        raise ValueError(f"unsupported period {period!r}")
+    n, unit = int(m.group(1)), {'d': 'days', 'mo': 'months', 'y': 'years'}[m.group(2)]
+    return last.normalize() - pd.DateOffset(**{unit: n}) + pd.Timedelta(days=1)
+
+_provider: Optional[MarketDataProvider] = None
+
+def get_provider() -> MarketDataProvider:
+    # JULIAN_DATA_PROVIDER=replay:<path> switches every call site to offline data
+    global _provider
+    if _provider is None:
+        spec = os.environ.get('JULIAN_DATA_PROVIDER', 'yfinance')
+        _provider = ParquetReplayProvider(spec.split(':', 1)[1]) if spec.startswith('replay:') else YFinanceProvider()
+    return _provider
+
+def set_provider(provider: MarketDataProvider):
+    global _provider
+    _provider = provider
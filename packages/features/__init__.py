@@ -1,6 +1,7 @@
 from .technical import *
 from .alt_sentiment import *
+from .store import FeatureStore
 
-def build_feature_table(universe, as_of):
-    # Stub for feature table builder
-    pass 
\ No newline at end of file
+def build_feature_table(universe, as_of, store=None, labels=None):
+    # Point-in-time feature snapshot: latest materialized row per symbol on or before as_of
+    return (store or FeatureStore()).as_of(universe, as_of, labels=labels)
@@ -0,0 +1,60 @@
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from packages.data.lake import ParquetLake
+from .technical import Feature, compute_panel
+
+class FeatureStore:
+    # Materialized features in a month-partitioned Parquet lake, one row per
+    # (date, symbol) and one column per feature label
+
+    def __init__(self, root: str = 'data/features'):
+        self.lake = ParquetLake(root)
+
+    def materialize(self, panel: pd.DataFrame, features: Iterable[Feature]) -> pd.DataFrame:
+        wide = compute_panel(panel, features)
+        long = wide.stack(level=1, future_stack=True).rename_axis(['date', 'symbol']).reset_index()
+        self.lake.upsert(long)
+        return wide
+
+    def load(self, symbols: Iterable[str], start, end, labels: Iterable[str]) -> pd.DataFrame:
+        labels = list(labels)
+        long = self.lake.scan(labels, symbols=symbols, start=start, end=end)
+        return long.pivot(index='date', columns='symbol', values=labels)
+
+    def features_for(self, panel: pd.DataFrame, features: Iterable[Feature]) -> pd.DataFrame:
+        # Read precomputed features when the store covers every (date, symbol)
+        # of the panel, otherwise compute them and write them back
+        features = list(features)
+        labels = [f.label for f in features]
+        symbols = panel.columns.get_level_values(1).unique()
+        if set(labels) <= set(self.lake.columns()):
+            stored = self.load(symbols, panel.index[0], panel.index[-1], labels)
+            stored = stored.reindex(index=panel.index, columns=pd.MultiIndex.from_product([labels, symbols]))
+            if self._covers(stored, panel, features):
+                return stored
+        return self.materialize(panel, features)
+
+    @staticmethod
+    def _covers(stored: pd.DataFrame, panel: pd.DataFrame, features: list[Feature]) -> bool:
+        # Rows written for other features hold NaN in this one's column, so a
+        # label counts as stored only where it has a value at every (date,
+        # symbol) whose lookback window has complete input
+        complete = panel.notna().T.groupby(level=1).all().T.reindex(columns=stored[features[0].label].columns)
+        for f in features:
+            needed = complete.astype(float).rolling(f.lookback + 1).min().eq(1).to_numpy()
+            if (needed & stored[f.label].isna().to_numpy()).any():
+                return False
+        return True
+
+    def as_of(self, universe: Iterable[str], as_of, labels: Optional[Iterable[str]] = None,
+              max_staleness: str = '10D') -> pd.DataFrame:
+        # Point-in-time snapshot: latest row per symbol on or before as_of. Only
+        # partitions inside the staleness window are scanned.
+        as_of = pd.Timestamp(as_of)
+        long = self.lake.scan(labels, symbols=universe, start=as_of - pd.Timedelta(max_staleness), end=as_of)
+        return long.drop_duplicates('symbol', keep='last').set_index('symbol')
+
+    def stats(self) -> dict:
+        return {**self.lake.stats(), 'features': self.lake.columns()}
@@ -1,37 +1,300 @@
 import pandas as pd
 import numpy as np
 from pydantic import BaseModel
+from collections import Counter
+from typing import Any, ClassVar, Iterable
 import abc
+import warnings
+
+# Intermediates are keyed by expression tuples (op, *args). A str arg is an
+# input column ('Close'), a tuple arg is another intermediate, anything else
+# is a parameter. Equal keys are computed once per FeaturePlan.
+
+def diff(src, n: int = 1) -> tuple:
+    return ('diff', src, n)
+
+def shift(src, n: int = 1) -> tuple:
+    return ('shift', src, n)
+
+def pct_change(src, n: int) -> tuple:
+    return ('pct_change', src, n)
+
+def rolling_mean(src, window: int) -> tuple:
+    return ('rolling_mean', src, window)
+
+def rolling_std(src, window: int) -> tuple:
+    return ('rolling_std', src, window)
+
+def gain(src) -> tuple:
+    return ('gain', src)
+
+def loss(src) -> tuple:
+    return ('loss', src)
+
+def true_range(high='High', low='Low', close='Close') -> tuple:
+    return ('true_range', high, low, shift(close))
+
+_OPS = {
+    'diff': lambda x, n: x.diff(n),
+    'shift': lambda x, n: x.shift(n),
+    'pct_change': lambda x, n: x.pct_change(n),
+    'rolling_mean': lambda x, n: x.rolling(n).mean(),
+    'rolling_std': lambda x, n: x.rolling(n).std(),
+    # NaN deltas count as 0, matching delta.where(delta > 0, 0)
+    'gain': lambda x: x.where(x > 0, 0),
+    'loss': lambda x: -x.where(x < 0, 0),
+    # fmax skips NaN like a row-wise max over the three ranges
+    'true_range': lambda high, low, prev_close: np.fmax(
+        np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close)),
+}
+
+class _Lag:
+    # Ring buffer returning the value pushed n bars ago (NaN until filled)
+    def __init__(self, n: int):
+        self.n = n
+        self.buf = None
+        self.pos = 0
+
+    def __call__(self, x):
+        if self.buf is None:
+            self.buf = np.full((self.n,) + x.shape, np.nan)
+        old = self.buf[self.pos].copy()
+        self.buf[self.pos] = x
+        self.pos = (self.pos + 1) % self.n
+        return old
+
+class _Rolling(_Lag):
+    # Running sums over the last n bars; any NaN in the window gives NaN,
+    # like pandas rolling(n) with the default min_periods
+    def __call__(self, x):
+        if self.buf is None:
+            self.ref = np.nan_to_num(x)
+            self.sum = np.zeros(x.shape)
+            self.sumsq = np.zeros(x.shape)
+            self.nobs = np.zeros(x.shape, dtype=int)
+        old = super().__call__(x)
+        new_ok, old_ok = ~np.isnan(x), ~np.isnan(old)
+        dx = np.where(new_ok, x - self.ref, 0)
+        dold = np.where(old_ok, old - self.ref, 0)
+        self.sum += dx - dold
+        self.sumsq += dx * dx - dold * dold
+        self.nobs += new_ok.astype(int) - old_ok
+        if self.pos == 0:
+            # Re-sum from the buffer once per lap so rounding error cannot drift
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                self.ref = np.nan_to_num(np.nanmean(self.buf, axis=0))
+            dev = self.buf - self.ref
+            self.sum = np.nansum(dev, axis=0)
+            self.sumsq = np.nansum(dev * dev, axis=0)
+        return self
+
+    def mean(self):
+        return np.where(self.nobs == self.n, self.ref + self.sum / self.n, np.nan)
+
+    def std(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (self.sumsq - self.sum * self.sum / self.n) / (self.n - 1)
+        return np.where(self.nobs == self.n, np.sqrt(np.maximum(var, 0)), np.nan)
+
+def _lagged(fn):
+    def make(n):
+        lag = _Lag(n)
+        return lambda x: fn(x, lag(x))
+    return make
+
+def _rolling(stat):
+    def make(n):
+        window = _Rolling(n)
+        return lambda x: getattr(window(x), stat)()
+    return make
+
+# Streaming counterparts of _OPS: each factory takes the key's parameters and
+# returns a per-bar update function over the key's resolved inputs
+_STREAM_OPS = {
+    'diff': _lagged(lambda x, prev: x - prev),
+    'shift': _lagged(lambda x, prev: prev),
+    'pct_change': _lagged(lambda x, prev: x / prev - 1),
+    'rolling_mean': _rolling('mean'),
+    'rolling_std': _rolling('std'),
+    'gain': lambda: lambda x: np.where(x > 0, x, 0.0),
+    'loss': lambda: lambda x: -np.where(x < 0, x, 0.0),
+    'true_range': lambda: _OPS['true_range'],
+}
+
+def _is_key(arg) -> bool:
+    return isinstance(arg, (str, tuple))
+
+def _depth(key) -> int:
+    if not isinstance(key, tuple):
+        return 0
+    return 1 + max(_depth(a) for a in key[1:])
+
+# Bars before t each op reads; rolling(n) reads the n - 1 before t
+_LOOKBACK = {'diff': lambda n: n, 'shift': lambda n: n, 'pct_change': lambda n: n,
+             'rolling_mean': lambda n: n - 1, 'rolling_std': lambda n: n - 1}
+
+def _lookback(key) -> int:
+    if not isinstance(key, tuple):
+        return 0
+    op, *args = key
+    own = _LOOKBACK[op](*(a for a in args if not _is_key(a))) if op in _LOOKBACK else 0
+    return own + max((_lookback(a) for a in args), default=0)
+
+def _closure(keys: Iterable) -> set:
+    out = set()
+    stack = [k for k in keys if isinstance(k, tuple)]
+    while stack:
+        key = stack.pop()
+        if key not in out:
+            out.add(key)
+            stack.extend(a for a in key[1:] if isinstance(a, tuple))
+    return out
 
 class Feature(BaseModel, abc.ABC):
+    name: ClassVar[str]
+
+    @property
+    def label(self) -> str:
+        # Default parameters keep the historical column name, e.g. 'zscore' vs 'zscore_50'
+        fields = type(self).model_fields
+        params = [str(v) for k, v in self.model_dump().items() if v != fields[k].default]
+        return '_'.join([self.name, *params])
+
+    @property
+    def lookback(self) -> int:
+        # Bars of history each value needs, i.e. the leading NaN rows on gap-free input
+        return max((_lookback(k) for k in self.intermediates().values()), default=0)
+
     @abc.abstractmethod
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+    def intermediates(self) -> dict[str, Any]:
+        pass
+
+    @abc.abstractmethod
+    def combine(self, x: dict[str, Any]):
         pass
 
-class RollReturn(Feature):
     def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        df['roll_return'] = df['Close'].pct_change(21)
+        df[self.label] = self.compute_panel(df)
         return df
 
+    def compute_panel(self, panel: pd.DataFrame) -> pd.DataFrame:
+        # panel: OHLCV with (field, symbol) columns, as returned by yf.download
+        return FeaturePlan(panel, [self]).run()[self.label]
+
+    def stream(self) -> 'FeatureStream':
+        return FeatureStream([self])
+
+class FeaturePlan:
+    def __init__(self, data: pd.DataFrame, features: Iterable[Feature]):
+        self.data = data
+        self.features = list(features)
+        self._cache = {}
+        self._deps = [_closure(f.intermediates().values()) for f in self.features]
+        self._refs = Counter(k for deps in self._deps for k in deps)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.data[key]
+        if key not in self._cache:
+            op, *args = key
+            self._cache[key] = _OPS[op](*(self[a] if _is_key(a) else a for a in args))
+        return self._cache[key]
+
+    def run(self) -> dict[str, Any]:
+        out = {}
+        for feature, deps in zip(self.features, self._deps):
+            out[feature.label] = feature.combine({k: self[v] for k, v in feature.intermediates().items()})
+            # Drop intermediates once their last consumer has run to bound peak memory
+            for key in deps:
+                self._refs[key] -= 1
+                if not self._refs[key]:
+                    self._cache.pop(key, None)
+        return out
+
+class FeatureStream:
+    # Incremental form of FeaturePlan: O(1) state per intermediate per symbol,
+    # updated bar by bar with the same numbers as the batch computation
+    def __init__(self, features: Iterable[Feature]):
+        self.features = list(features)
+        keys = _closure(k for f in self.features for k in f.intermediates().values())
+        self._order = sorted(keys, key=_depth)
+        self._updates = {k: _STREAM_OPS[k[0]](*(a for a in k[1:] if not _is_key(a))) for k in self._order}
+
+    def update(self, bar) -> dict[str, Any]:
+        # bar maps fields to a scalar (one symbol) or an array/Series over symbols
+        values = {}
+        def get(key):
+            return values[key] if isinstance(key, tuple) else np.asarray(bar[key], dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for key in self._order:
+                values[key] = self._updates[key](*(get(a) for a in key[1:] if _is_key(a)))
+            return {f.label: f.combine({k: get(v) for k, v in f.intermediates().items()}) for f in self.features}
+
+    def update_many(self, bars: pd.DataFrame) -> pd.DataFrame:
+        # bars: single-symbol OHLCV rows or a (field, symbol) panel block
+        rows = [self.update(bar) for _, bar in bars.iterrows()]
+        labels = [f.label for f in self.features]
+        if isinstance(bars.columns, pd.MultiIndex):
+            symbols = bars[bars.columns[0][0]].columns
+            return pd.concat({l: pd.DataFrame(np.stack([r[l] for r in rows]), index=bars.index, columns=symbols)
+                              for l in labels}, axis=1)
+        return pd.DataFrame({l: [float(r[l]) for r in rows] for l in labels}, index=bars.index)
+
+def stream(features: Iterable[Feature]) -> FeatureStream:
+    return FeatureStream(features)
+
+class RollReturn(Feature):
+    name: ClassVar[str] = 'roll_return'
+    window: int = 21
+
+    def intermediates(self):
+        return {'ret': pct_change('Close', self.window)}
+
+    def combine(self, x):
+        return x['ret']
+
+class SMA(Feature):
+    name: ClassVar[str] = 'sma'
+    window: int = 20
+
+    def intermediates(self):
+        return {'mean': rolling_mean('Close', self.window)}
+
+    def combine(self, x):
+        return x['mean']
+
 class ZScore(Feature):
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        df['zscore'] = (df['Close'] - df['Close'].rolling(20).mean()) / df['Close'].rolling(20).std()
-        return df
+    name: ClassVar[str] = 'zscore'
+    window: int = 20
+
+    def intermediates(self):
+        return {'close': 'Close', 'mean': rolling_mean('Close', self.window), 'std': rolling_std('Close', self.window)}
+
+    def combine(self, x):
+        return (x['close'] - x['mean']) / x['std']
 
 class ATR(Feature):
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        high_low = df['High'] - df['Low']
-        high_close = np.abs(df['High'] - df['Close'].shift())
-        low_close = np.abs(df['Low'] - df['Close'].shift())
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        df['atr'] = ranges.max(axis=1).rolling(14).mean()
-        return df
+    name: ClassVar[str] = 'atr'
+    window: int = 14
+
+    def intermediates(self):
+        return {'atr': rolling_mean(true_range(), self.window)}
+
+    def combine(self, x):
+        return x['atr']
 
 class RSI(Feature):
-    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
-        return df 
\ No newline at end of file
+    name: ClassVar[str] = 'rsi'
+    window: int = 14
+
+    def intermediates(self):
+        delta = diff('Close')
+        return {'gain': rolling_mean(gain(delta), self.window), 'loss': rolling_mean(loss(delta), self.window)}
+
+    def combine(self, x):
+        return 100 - (100 / (1 + x['gain'] / x['loss']))
+
+def compute_panel(panel: pd.DataFrame, features: Iterable[Feature]) -> pd.DataFrame:
+    # Every feature for every symbol in one pass; result columns are (feature, symbol)
+    return pd.concat(FeaturePlan(panel, features).run(), axis=1)
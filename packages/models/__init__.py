@@ -5,6 +5,8 @@ This package contains machine learning and reinforcement learning models.
 """
 
 from .gbm import *
+from .portfolio_env import *
 from .ppo_allocator import *
+from .registry import ModelCache, ModelRegistry
 
 __version__ = "0.1.0" 
\ No newline at end of file
@@ -1,19 +1,95 @@
+import json
+import os
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
 import xgboost as xgb
 import shap
 
+from packages.core.fingerprint import array_fingerprint, frame_fingerprint, model_fingerprint
+
 class GBMModel:
-    def __init__(self):
-        self.model = xgb.XGBClassifier()
-        self.explainer = None
+    # Explanations are lazy: fit() only keeps a bounded random sample of X as
+    # the SHAP background, the TreeExplainer is built on first use, and computed
+    # values are cached per (model version, input fingerprint, mode)
+    def __init__(self, background_size: int = 100, cache_size: int = 16, random_state: int = 0, **params):
+        self.model = xgb.XGBClassifier(**params)
+        self.background_size = background_size
+        self.cache_size = cache_size
+        self.random_state = random_state
+        self.version: Optional[str] = None
+        self._background = None
+        self._explainer = None
+        self._cache: OrderedDict = OrderedDict()
 
     def fit(self, X, y):
         self.model.fit(X, y)
-        self.explainer = shap.Explainer(self.model, X)
+        n = min(self.background_size, len(X))
+        self._background = shap.sample(X, n, random_state=self.random_state) if n < len(X) else X
+        self._explainer = None
+        self._cache.clear()
+        self.version = model_fingerprint(self.model)
+        return self
+
+    def save(self, directory: str):
+        # Native UBJSON booster plus the background sample as .npy, which load()
+        # memory-maps instead of reading into the heap
+        os.makedirs(directory, exist_ok=True)
+        self.model.save_model(os.path.join(directory, 'model.ubj'))
+        if self._background is not None:
+            background = self._background
+            np.save(os.path.join(directory, 'background.npy'), np.asarray(background, dtype=float))
+            if isinstance(background, pd.DataFrame):
+                with open(os.path.join(directory, 'columns.json'), 'w') as f:
+                    json.dump(list(background.columns), f)
+
+    @classmethod
+    def load(cls, directory: str, **kwargs) -> 'GBMModel':
+        gbm = cls(**kwargs)
+        gbm.model.load_model(os.path.join(directory, 'model.ubj'))
+        path = os.path.join(directory, 'background.npy')
+        if os.path.exists(path):
+            background = np.load(path, mmap_mode='r')
+            columns = os.path.join(directory, 'columns.json')
+            if os.path.exists(columns):
+                with open(columns) as f:
+                    background = pd.DataFrame(background, columns=json.load(f), copy=False)
+            gbm._background = background
+        gbm.version = model_fingerprint(gbm.model)
+        return gbm
 
     def predict(self, X):
         return self.model.predict(X)
 
-    def shap_values(self, X):
-        if self.explainer is None:
-            self.explainer = shap.Explainer(self.model, X)
-        return self.explainer(X) 
\ No newline at end of file
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)
+
+    @property
+    def background(self):
+        return self._background
+
+    @property
+    def explainer(self) -> shap.TreeExplainer:
+        if self._explainer is None:
+            self._explainer = shap.TreeExplainer(self.model, data=self._background)
+        return self._explainer
+
+    def _approximate(self, X) -> shap.Explanation:
+        # Saabas attributions from xgboost itself: one pass per tree, no background
+        contribs = self.model.get_booster().predict(xgb.DMatrix(X), pred_contribs=True, approx_contribs=True)
+        return shap.Explanation(contribs[:, :-1], base_values=contribs[:, -1], data=np.asarray(X),
+                                feature_names=list(X.columns) if isinstance(X, pd.DataFrame) else None)
+
+    def shap_values(self, X, approximate: bool = False) -> shap.Explanation:
+        fingerprint = frame_fingerprint(X) if isinstance(X, pd.DataFrame) else array_fingerprint(X)
+        key = (self.version, fingerprint, approximate)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        values = self._approximate(X) if approximate else self.explainer(X)
+        self._cache[key] = values
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return values
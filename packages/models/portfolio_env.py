@@ -0,0 +1,157 @@
+from typing import Optional
+
+import gymnasium as gym
+import numpy as np
+import pandas as pd
+from gymnasium import spaces
+from numpy.lib.stride_tricks import sliding_window_view
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecEnv
+
+# Portfolio allocation over N assets plus cash. Observation: the last `window`
+# returns of every asset and the current weights; action: N + 1 logits,
+# softmaxed into target weights; reward: log net portfolio return after
+# proportional costs on turnover. Every step is NumPy indexing into returns
+# precomputed once, with no pandas in the loop.
+
+def _returns_array(returns) -> np.ndarray:
+    if isinstance(returns, pd.DataFrame):
+        returns = returns.to_numpy()
+    return np.ascontiguousarray(np.nan_to_num(np.asarray(returns, dtype=np.float32)))
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+def _spaces(n_assets: int, window: int) -> tuple[spaces.Box, spaces.Box]:
+    obs = spaces.Box(-np.inf, np.inf, shape=(n_assets * window + n_assets + 1,), dtype=np.float32)
+    act = spaces.Box(-1.0, 1.0, shape=(n_assets + 1,), dtype=np.float32)
+    return obs, act
+
+def _rebalance(returns, weights, action, commission):
+    # One step for a batch of portfolios: (rewards, net returns, drifted weights)
+    target = _softmax(action)
+    cost = commission * np.abs(target - weights).sum(axis=-1)
+    gross = (target[..., :-1] * returns).sum(axis=-1)
+    net = gross - cost
+    growth = np.concatenate([1 + returns, np.ones_like(returns[..., :1])], axis=-1)
+    drifted = target * growth / (1 + gross)[..., None]
+    return np.log1p(net), net, drifted.astype(np.float32)
+
+class PortfolioEnv(gym.Env):
+    metadata = {'render_modes': []}
+
+    def __init__(self, returns, window: int = 20, episode_length: int = 252, commission: float = 0.001):
+        self.returns = _returns_array(returns)
+        n_bars, n_assets = self.returns.shape
+        self.window = window
+        self.episode_length = min(episode_length, n_bars - window)
+        self.commission = commission
+        # windows[t - window] is the (N, window) block of returns before bar t (a view)
+        self._windows = sliding_window_view(self.returns, window, axis=0)
+        self.observation_space, self.action_space = _spaces(n_assets, window)
+        self._cash = np.eye(n_assets + 1, dtype=np.float32)[-1]
+
+    def _obs(self) -> np.ndarray:
+        return np.concatenate([self._windows[self._t - self.window].ravel(), self._weights])
+
+    def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
+        super().reset(seed=seed)
+        self._t = int(self.np_random.integers(self.window, len(self.returns) - self.episode_length + 1))
+        self._end = self._t + self.episode_length
+        self._weights = self._cash.copy()
+        return self._obs(), {}
+
+    def step(self, action):
+        reward, net, self._weights = _rebalance(self.returns[self._t], self._weights,
+                                                np.asarray(action, dtype=np.float64), self.commission)
+        self._t += 1
+        # the end of the episode window is a time limit, not a terminal state
+        return self._obs(), float(reward), False, self._t >= self._end, {'portfolio_return': float(net)}
+
+class PortfolioVecEnv(VecEnv):
+    # n_envs PortfolioEnv episodes stepped together: one batched _rebalance
+    # call per step instead of n_envs Python env.step calls
+    def __init__(self, returns, n_envs: int = 8, window: int = 20, episode_length: int = 252,
+                 commission: float = 0.001, seed: Optional[int] = None):
+        self.returns = _returns_array(returns)
+        n_bars, n_assets = self.returns.shape
+        self.window = window
+        self.episode_length = min(episode_length, n_bars - window)
+        self.commission = commission
+        self.render_mode = None
+        self._windows = sliding_window_view(self.returns, window, axis=0)
+        self._rng = np.random.default_rng(seed)
+        self._t = np.zeros(n_envs, dtype=np.int64)
+        self._end = np.zeros(n_envs, dtype=np.int64)
+        self._weights = np.zeros((n_envs, n_assets + 1), dtype=np.float32)
+        super().__init__(n_envs, *_spaces(n_assets, window))
+
+    def _obs(self) -> np.ndarray:
+        block = self._windows[self._t - self.window].reshape(self.num_envs, -1)
+        return np.concatenate([block, self._weights], axis=1)
+
+    def _reset_envs(self, mask: np.ndarray):
+        n = int(mask.sum())
+        self._t[mask] = self._rng.integers(self.window, len(self.returns) - self.episode_length + 1, n)
+        self._end[mask] = self._t[mask] + self.episode_length
+        self._weights[mask] = 0.0
+        self._weights[mask, -1] = 1.0
+
+    def reset(self) -> np.ndarray:
+        if self._seeds[0] is not None:
+            self._rng = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._obs()
+
+    def step_async(self, actions: np.ndarray):
+        self._actions = np.asarray(actions, dtype=np.float64)
+
+    def step_wait(self):
+        rewards, net, self._weights = _rebalance(self.returns[self._t], self._weights, self._actions, self.commission)
+        self._t += 1
+        dones = self._t >= self._end
+        obs = self._obs()
+        infos = [{'portfolio_return': float(r)} for r in net]
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i].update(terminal_observation=obs[i].copy(), **{'TimeLimit.truncated': True})
+            self._reset_envs(dones)
+            obs = self._obs()
+        return obs, rewards.astype(np.float32), dones, infos
+
+    def close(self):
+        pass
+
+    # The envs share this object, so attribute and method access for any
+    # indices goes to it, with one entry per selected index
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        # called once: a per-index call would repeat its effect on every env
+        return [getattr(self, method_name)(*method_args, **method_kwargs)] * len(self._get_indices(indices))
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False] * len(self._get_indices(indices))
+
+def make_portfolio_vec_env(returns, n_envs: int = 8, vec_env: str = 'batched', seed: Optional[int] = None,
+                           start_method: Optional[str] = None, **env_kwargs) -> VecEnv:
+    # 'batched': PortfolioVecEnv in this process; 'dummy'/'subproc': SB3's
+    # wrappers around PortfolioEnv, the latter with one process per env (only
+    # worth it with a core per env)
+    if vec_env == 'batched':
+        return PortfolioVecEnv(returns, n_envs=n_envs, seed=seed, **env_kwargs)
+    returns = _returns_array(returns)
+    factories = [lambda: PortfolioEnv(returns, **env_kwargs) for _ in range(n_envs)]
+    if vec_env == 'dummy':
+        env = DummyVecEnv(factories)
+    elif vec_env == 'subproc':
+        env = SubprocVecEnv(factories, start_method=start_method)
+    else:
+        raise ValueError(f"unknown vec_env {vec_env!r}")
+    env.seed(seed)
+    return env
@@ -1,11 +1,31 @@
 from stable_baselines3 import PPO
 
+from .portfolio_env import make_portfolio_vec_env
+
 class PPOAllocator:
-    def __init__(self, env):
-        self.model = PPO('MlpPolicy', env, verbose=1)
+    # Either a ready env, or a (T, N) returns matrix to train on n_envs
+    # parallel PortfolioEnv episodes (see make_portfolio_vec_env)
+    def __init__(self, env=None, returns=None, n_envs: int = 8, vec_env: str = 'batched', verbose: int = 1,
+                 **ppo_kwargs):
+        if env is None:
+            if returns is None:
+                raise ValueError("PPOAllocator needs an env or a returns matrix")
+            env = make_portfolio_vec_env(returns, n_envs=n_envs, vec_env=vec_env, seed=ppo_kwargs.get('seed'))
+        self.env = env
+        self.model = PPO('MlpPolicy', env, verbose=verbose, **ppo_kwargs)
 
     def train(self, timesteps=10000):
         self.model.learn(total_timesteps=timesteps)
 
-    def predict(self, obs):
-        return self.model.predict(obs) 
\ No newline at end of file
+    def predict(self, obs, deterministic: bool = False):
+        return self.model.predict(obs, deterministic=deterministic)
+
+    def save(self, path: str):
+        self.model.save(path)
+
+    @classmethod
+    def load(cls, path: str, env=None, device: str = 'cpu') -> 'PPOAllocator':
+        allocator = cls.__new__(cls)
+        allocator.env = env
+        allocator.model = PPO.load(path, env=env, device=device)
+        return allocator
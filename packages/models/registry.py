@@ -0,0 +1,134 @@
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from .gbm import GBMModel
+from .ppo_allocator import PPOAllocator
+
+# Model ids and versions name directories, so only these characters
+NAME = re.compile(r'[A-Za-z0-9_-]+')
+
+def check_name(name: str, what: str = 'model id') -> str:
+    if not isinstance(name, str) or not NAME.fullmatch(name):
+        raise ValueError(f'invalid {what} {name!r}; use letters, digits, _ and -')
+    return name
+
+def _dir_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+class ModelRegistry:
+    # root/<model_id>/<version>/ holds the model in its native format
+    # (xgboost UBJSON for GBMModel, SB3 zip for PPOAllocator) and meta.json.
+    # Versions are UTC timestamps, so the latest is the largest name.
+    KINDS = {GBMModel: 'gbm', PPOAllocator: 'ppo'}
+
+    def __init__(self, root: str = 'data/models'):
+        self.root = root
+
+    def _path(self, model_id: str, version: str) -> str:
+        return os.path.join(self.root, check_name(model_id), check_name(version, 'version'))
+
+    def versions(self, model_id: str) -> list[str]:
+        path = os.path.join(self.root, check_name(model_id))
+        if not os.path.isdir(path):
+            return []
+        return sorted(v for v in os.listdir(path) if os.path.exists(os.path.join(path, v, 'meta.json')))
+
+    def latest(self, model_id: str) -> Optional[str]:
+        versions = self.versions(model_id)
+        return versions[-1] if versions else None
+
+    def save(self, model_id: str, model, **metadata) -> dict:
+        kind = self.KINDS[type(model)]
+        version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        final = self._path(model_id, version)
+        tmp = os.path.join(self.root, model_id, f'.tmp-{uuid.uuid4().hex}')
+        os.makedirs(tmp)
+        if kind == 'gbm':
+            model.save(tmp)
+        else:
+            model.save(os.path.join(tmp, 'model.zip'))
+        meta = {'id': model_id, 'version': version, 'kind': kind, 'created': version,
+                'bytes': _dir_bytes(tmp), **metadata}
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f, default=str)
+        os.replace(tmp, final)
+        return meta
+
+    def meta(self, model_id: str, version: Optional[str] = None) -> dict:
+        version = version or self.latest(model_id)
+        if version is None:
+            raise KeyError(model_id)
+        with open(os.path.join(self._path(model_id, version), 'meta.json')) as f:
+            return json.load(f)
+
+    def list(self) -> list[dict]:
+        if not os.path.isdir(self.root):
+            return []
+        return [self.meta(m) for m in sorted(os.listdir(self.root)) if NAME.fullmatch(m) and self.latest(m)]
+
+    def load(self, model_id: str, version: Optional[str] = None, env=None):
+        meta = self.meta(model_id, version)
+        path = self._path(model_id, meta['version'])
+        if meta['kind'] == 'gbm':
+            return GBMModel.load(path)
+        return PPOAllocator.load(os.path.join(path, 'model.zip'), env=env)
+
+    def delete(self, model_id: str, version: Optional[str] = None):
+        path = self._path(model_id, version) if version else os.path.join(self.root, check_name(model_id))
+        shutil.rmtree(path, ignore_errors=True)
+
+class ModelCache:
+    # Keeps recently used models resident, evicting least recently used ones
+    # once their on-disk size exceeds max_bytes. Loads happen on first use,
+    # one per (id, version) even with concurrent requests.
+    def __init__(self, registry: ModelRegistry, max_bytes: int = 512 * 2 ** 20):
+        self.registry = registry
+        self.max_bytes = max_bytes
+        self._models: 'OrderedDict[tuple, tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: dict[tuple, threading.Lock] = {}
+        self.hits = self.misses = 0
+
+    @property
+    def bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def get(self, model_id: str, version: Optional[str] = None):
+        meta = self.registry.meta(model_id, version)
+        key = (model_id, meta['version'])
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            with self._lock:
+                if key in self._models:
+                    self.hits += 1
+                    return self._models[key][0]
+            model = self.registry.load(model_id, meta['version'])
+            with self._lock:
+                self.misses += 1
+                self._models[key] = (model, meta['bytes'])
+                self._loading.pop(key, None)
+                while len(self._models) > 1 and self.bytes > self.max_bytes:
+                    self._models.popitem(last=False)
+        return model
+
+    def invalidate(self, model_id: Optional[str] = None):
+        with self._lock:
+            for key in [k for k in self._models if model_id is None or k[0] == model_id]:
+                del self._models[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'models': [f'{i}@{v}' for i, v in self._models], 'bytes': self.bytes,
+                    'max_bytes': self.max_bytes, 'hits': self.hits, 'misses': self.misses}
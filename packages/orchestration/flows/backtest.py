@@ -0,0 +1,139 @@
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from packages.analytics.metrics import max_drawdown, sharpe
+from packages.data.providers import get_provider
+from packages.strategies.momentum import momentum_positions
+from packages.strategies.vectorized import run_vectorized
+
+# One backtest request as a job for packages.orchestration.jobs: normalize the
+# API payload (so equivalent requests hash alike), then load prices and run
+# the strategy on the vectorized engine, reporting progress as it goes.
+
+DEFAULTS = {
+    'strategy': 'momentum',
+    'symbols': ['SPY'],
+    'startDate': '2023-01-01',
+    'endDate': '2024-01-01',
+    'cash': 10000.0,
+    'commission': 0.001,
+    'stake': 1.0,
+}
+
+# Strategies that can run as jobs, with their parameter defaults
+STRATEGY_PARAMS = {
+    'momentum': {'fast': 12, 'slow': 26},
+}
+
+def normalize_request(request: dict) -> dict:
+    # Fills defaults, upper-cases and sorts symbols and casts numbers, so
+    # requests that would run the same backtest are equal; ValueError when the
+    # strategy or a parameter is unknown or a value is malformed
+    req = {**DEFAULTS, **{k: v for k, v in request.items() if k in DEFAULTS}}
+    strategy = req['strategy']
+    if not isinstance(strategy, str) or strategy not in STRATEGY_PARAMS:
+        raise ValueError(f"strategy {strategy!r} cannot run as a backtest job; "
+                         f"available: {', '.join(STRATEGY_PARAMS)}")
+    params = request.get('params') or {}
+    if not isinstance(params, dict):
+        raise ValueError('params must be an object')
+    unknown = set(params) - set(STRATEGY_PARAMS[strategy])
+    if unknown:
+        raise ValueError(f"unknown parameters for {strategy}: {', '.join(sorted(unknown))}")
+    symbols = [req['symbols']] if isinstance(req['symbols'], str) else req['symbols']
+    if not isinstance(symbols, list) or not symbols or not all(isinstance(s, str) and s.strip() for s in symbols):
+        raise ValueError('symbols must be a non-empty list of tickers')
+    req['symbols'] = sorted({s.strip().upper() for s in symbols})
+    try:
+        req['params'] = {k: int(v) for k, v in {**STRATEGY_PARAMS[strategy], **params}.items()}
+        for key in ('cash', 'commission', 'stake'):
+            req[key] = float(req[key])
+    except TypeError as e:
+        raise ValueError(str(e)) from e
+    req['startDate'] = str(pd.Timestamp(req['startDate']).date())
+    req['endDate'] = str(pd.Timestamp(req['endDate']).date())
+    return req
+
+def _realized_pnl(trades: pd.DataFrame) -> np.ndarray:
+    # Average-cost P&L booked by each trade that reduces a position, net of its
+    # fee; opening trades book nothing
+    pnl = np.zeros(len(trades))
+    held, basis = {}, {}
+    for i, (sym, size, price, fee) in enumerate(trades[['symbol', 'size', 'price', 'fee']].itertuples(index=False)):
+        pos, cost = held.get(sym, 0.0), basis.get(sym, 0.0)
+        if pos and np.sign(size) != np.sign(pos):
+            closed = min(abs(size), abs(pos)) * np.sign(pos)
+            pnl[i] = closed * (price - cost) - fee
+        new = pos + size
+        if new and np.sign(new) != np.sign(pos):
+            basis[sym] = price
+        elif abs(new) > abs(pos):
+            basis[sym] = (pos * cost + size * price) / new
+        held[sym] = new
+    return pnl
+
+def _float(x) -> Optional[float]:
+    return float(x) if np.isfinite(x) else None
+
+def _stamps(index: pd.DatetimeIndex) -> list[str]:
+    # Dates for daily bars, full timestamps for intraday ones
+    index = pd.DatetimeIndex(index)
+    daily = (index == index.normalize()).all()
+    return list(index.strftime('%Y-%m-%d' if daily else '%Y-%m-%dT%H:%M:%S'))
+
+def summarize(req: dict, equity: pd.Series, trades: pd.DataFrame) -> dict:
+    # Same shape as the mock result this job replaced
+    pnl = _realized_pnl(trades)
+    closed = pnl[pnl != 0]
+    gains, losses = closed[closed > 0].sum(), -closed[closed < 0].sum()
+    returns = equity.pct_change().dropna()
+    return {
+        'strategy': req['strategy'],
+        'period': f"{req['startDate']} to {req['endDate']}",
+        'metrics': {
+            'totalReturn': _float(equity.iloc[-1] / req['cash'] - 1),
+            'sharpeRatio': _float(sharpe(returns)) if len(returns) > 1 else None,
+            'maxDrawdown': _float(max_drawdown(returns)) if len(returns) else 0.0,
+            'winRate': _float(len(closed[closed > 0]) / len(closed)) if len(closed) else None,
+            'profitFactor': _float(gains / losses) if losses else None,
+        },
+        'equityCurve': {
+            'x': _stamps(equity.index),
+            'y': equity.astype(float).tolist(),
+        },
+        'trades': [
+            {'date': d, 'symbol': t.symbol, 'side': 'BUY' if t.size > 0 else 'SELL',
+             'quantity': float(abs(t.size)), 'price': float(t.price), 'fee': float(t.fee), 'pnl': float(p)}
+            for d, t, p in zip(_stamps(trades['date']), trades.itertuples(index=False), pnl)
+        ],
+    }
+
+TRADE_SCHEMA = pa.schema([('date', pa.string()), ('symbol', pa.string()), ('side', pa.string()),
+                          ('quantity', pa.float64()), ('price', pa.float64()), ('fee', pa.float64()),
+                          ('pnl', pa.float64())])
+
+def result_tables(result: dict) -> dict[str, pa.Table]:
+    # Columnar 'equity' and 'trades' tables of a summarize() result
+    return {
+        'equity': pa.table({'date': pa.array(result['equityCurve']['x'], pa.string()),
+                            'equity': pa.array(result['equityCurve']['y'], pa.float64())}),
+        'trades': pa.Table.from_pylist(result['trades'], schema=TRADE_SCHEMA),
+    }
+
+def backtest(request: dict, progress: Optional[Callable] = None) -> dict:
+    progress = progress or (lambda fraction, message=None: None)
+    req = normalize_request(request)
+    progress(0.05, 'loading prices')
+    panel = get_provider().history(req['symbols'], start=req['startDate'], end=req['endDate'])
+    if panel.empty:
+        raise ValueError(f"no price data for {', '.join(req['symbols'])}")
+    progress(0.5, 'computing signals')
+    close = panel['Close'].dropna(axis=1, how='all')
+    target = momentum_positions(close, stake=req['stake'], **req['params'])
+    progress(0.7, 'simulating')
+    result = run_vectorized(panel, target, cash=req['cash'], commission=req['commission'])
+    progress(0.9, 'summarizing')
+    return summarize(req, result.equity, result.trades)
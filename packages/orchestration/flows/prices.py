@@ -1,9 +1,25 @@
 from prefect import flow
-import yfinance as yf
-import duckdb
+import pandas as pd
+
+from packages.data.prices import KEYS, PriceStore, to_long
+from packages.data.providers import get_provider
+
+def _download(symbols, start, end) -> pd.DataFrame:
+    raw = get_provider().history(symbols, start=start, end=end)
+    return to_long(raw) if not raw.empty else pd.DataFrame(columns=KEYS)
 
 @flow(name="daily_prices")
-def daily_prices(symbols: list[str], start: str, end: str):
-    raw = yf.download(symbols, start=start, end=end, progress=False)
-    tbl = duckdb.execute("CREATE OR REPLACE TABLE prices AS SELECT * FROM raw").fetchdf()
-    return tbl 
\ No newline at end of file
+def daily_prices(symbols: list[str], start: str, end: str, incremental: bool = True, root: str = "data/prices"):
+    store = PriceStore(root)
+    # end is exclusive: today's bar is unfinished, so the range stops before it
+    end = min(pd.Timestamp(end), pd.Timestamp.today().normalize()).strftime("%Y-%m-%d")
+    if not incremental:
+        # Full refresh of the range; rewrites only the months it covers
+        rows = _download(symbols, start, end)
+        store.refresh(rows, covered=(symbols, start, end))
+        return rows
+    written = []
+    for (lo, hi), batch in store.missing(symbols, start, end).items():
+        lo, hi = lo.strftime("%Y-%m-%d"), hi.strftime("%Y-%m-%d")
+        written.append(store.append(_download(batch, lo, hi), covered=(batch, lo, hi)))
+    return pd.concat(written, ignore_index=True) if written else pd.DataFrame(columns=KEYS)
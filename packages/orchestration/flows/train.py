@@ -0,0 +1,81 @@
+from typing import Callable, Optional
+
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
+from packages.data.providers import get_provider
+from packages.features import ATR, RSI, SMA, RollReturn, ZScore, compute_panel
+from packages.models import GBMModel, ModelRegistry
+
+# Training a GBM direction model as a job for packages.orchestration.jobs,
+# like backtests: the API validates and queues the request, a worker fits the
+# model and saves it as a new version in the registry.
+
+GBM_FEATURES = [RSI(), RollReturn(), ATR(), SMA(), ZScore()]
+
+DEFAULTS = {
+    'symbols': ['SPY'],
+    'startDate': '2015-01-01',
+    'endDate': None,
+    'nEstimators': 200,
+    'maxDepth': 3,
+}
+
+def normalize_train_request(model_id: str, request: dict, registry: str) -> dict:
+    # ValueError for a malformed body; registry is the ModelRegistry root the
+    # worker saves into
+    req = {**DEFAULTS, **{k: v for k, v in request.items() if k in DEFAULTS}}
+    symbols = [req['symbols']] if isinstance(req['symbols'], str) else req['symbols']
+    if not isinstance(symbols, list) or not symbols or not all(isinstance(s, str) and s.strip() for s in symbols):
+        raise ValueError('symbols must be a non-empty list of tickers')
+    req['symbols'] = sorted({s.strip().upper() for s in symbols})
+    for key in ('nEstimators', 'maxDepth'):
+        if isinstance(req[key], bool) or not isinstance(req[key], int) or req[key] < 1:
+            raise ValueError(f'{key} must be a positive integer')
+    req['startDate'] = str(pd.Timestamp(req['startDate']).date())
+    req['endDate'] = str(pd.Timestamp(req['endDate']).date()) if req['endDate'] else None
+    name = request.get('name', model_id)
+    if not isinstance(name, str):
+        raise ValueError('name must be a string')
+    return {**req, 'modelId': model_id, 'name': name, 'registry': registry}
+
+def gbm_training_set(panel: pd.DataFrame):
+    # One row per (date, symbol); target is whether the next close is higher
+    feats = compute_panel(panel, GBM_FEATURES)
+    rows = feats.stack(level=1, future_stack=True)
+    up = (panel['Close'].shift(-1) > panel['Close']).where(panel['Close'].shift(-1).notna())
+    rows['target'] = up.stack(future_stack=True).reindex(rows.index)
+    rows = rows.dropna()
+    return rows.drop(columns='target'), rows['target'].astype(int)
+
+def train_gbm(request: dict, progress: Optional[Callable] = None) -> dict:
+    progress = progress or (lambda fraction, message=None: None)
+    progress(0.05, 'loading prices')
+    panel = get_provider().history(request['symbols'], start=request['startDate'], end=request['endDate'])
+    if panel.empty:
+        raise ValueError(f"no price data for {', '.join(request['symbols'])}")
+    progress(0.3, 'computing features')
+    X, y = gbm_training_set(panel)
+    if len(X) < 50 or y.nunique() < 2:
+        raise ValueError('not enough data to train')
+    # Chronological split: the last 20% of dates is the test set
+    cutoff = X.index.get_level_values(0).unique()
+    cutoff = cutoff[int(len(cutoff) * 0.8)]
+    train = X.index.get_level_values(0) < cutoff
+    progress(0.5, 'fitting')
+    model = GBMModel(n_estimators=request['nEstimators'], max_depth=request['maxDepth'])
+    model.fit(X[train], y[train])
+    predicted = model.predict(X[~train])
+    performance = {
+        'trainAccuracy': float(accuracy_score(y[train], model.predict(X[train]))),
+        'testAccuracy': float(accuracy_score(y[~train], predicted)),
+        'precision': float(precision_score(y[~train], predicted, zero_division=0)),
+        'recall': float(recall_score(y[~train], predicted, zero_division=0)),
+        'f1Score': float(f1_score(y[~train], predicted, zero_division=0)),
+    }
+    progress(0.9, 'saving')
+    meta = ModelRegistry(request['registry']).save(request['modelId'], model, name=request['name'],
+                                                   symbols=request['symbols'], features=list(X.columns),
+                                                   performance=performance)
+    return {'status': 'trained', 'model_id': request['modelId'], 'version': meta['version'],
+            'performance': performance}
@@ -1,8 +1,148 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+import duckdb
+import numpy as np
+import optuna
+import pandas as pd
 from prefect import flow
 
+from packages.core.shared import SharedFrame
+from packages.data.providers import get_provider
+from packages.strategies.vectorized import ema
+
+_returns: Optional[pd.DataFrame] = None
+_close: Optional[pd.DataFrame] = None
+
+def rolling_windows(index: pd.DatetimeIndex, in_sample_years: int = 3, out_sample_years: int = 1) -> list[tuple]:
+    # (is_start, os_start, os_end) bar positions; windows step by the OS length
+    windows = []
+    start = index[0]
+    while True:
+        os_start = start + pd.DateOffset(years=in_sample_years)
+        os_end = os_start + pd.DateOffset(years=out_sample_years)
+        if os_end > index[-1] + pd.Timedelta(days=1):
+            break
+        windows.append(tuple(int(i) for i in index.searchsorted([start, os_start, os_end])))
+        start += pd.DateOffset(years=out_sample_years)
+    return windows
+
+def _init_worker(returns_spec, close_spec):
+    global _returns, _close
+    _returns = SharedFrame(returns_spec).frame()
+    _close = SharedFrame(close_spec).frame()
+    _ema.cache_clear()
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+@lru_cache(maxsize=16)
+def _ema(period: int) -> np.ndarray:
+    # EMA over the full history, only for the periods trials actually suggest;
+    # EMAs are causal, so a window slice equals what the window would compute
+    # with longer warm-up
+    return ema(_close, period).to_numpy()
+
+def _strategy_returns(fast: int, slow: int, lo: int, hi: int, commission: float) -> pd.Series:
+    # Equal-weight MomentumStrategy returns over bars [lo, hi): long the next
+    # bar while EMA(fast) > EMA(slow), costs charged on position changes.
+    # Slices read the memoized EMAs; nothing is recomputed per window.
+    start = max(lo - 2, 0)
+    signal = (_ema(fast)[start:hi] > _ema(slow)[start:hi]).astype(float)
+    # padded[t - start + 2] is the signal of bar t; bars before the data are flat
+    padded = np.vstack([np.zeros((2, signal.shape[1])), signal])
+    pos = padded[lo - start + 1:hi - start + 1]
+    prev = padded[lo - start:hi - start]
+    rets = np.nan_to_num(_returns.iloc[lo:hi].to_numpy())
+    strat = pos * rets - commission * np.abs(pos - prev)
+    return pd.Series(strat.mean(axis=1), index=_returns.index[lo:hi])
+
+def _sharpe(returns: pd.Series) -> float:
+    std = returns.std()
+    return float(returns.mean() / std * np.sqrt(252)) if std > 0 else 0.0
+
+def _optimise_window(i: int, window: tuple, fast_range: tuple, slow_range: tuple, n_trials: int,
+                     commission: float) -> dict:
+    is_start, os_start, os_end = window
+    index = _returns.index
+    # Pruning checkpoints: one per in-sample year
+    years = index[is_start:os_start].year
+    steps = [is_start + int(j) for j in np.flatnonzero(np.diff(years))] + [os_start]
+    steps = [s for s in steps if s > is_start]
+
+    def objective(trial: optuna.Trial) -> float:
+        fast = trial.suggest_int('fast', *fast_range)
+        slow = trial.suggest_int('slow', *slow_range)
+        if fast >= slow:
+            raise optuna.TrialPruned()
+        parts, lo = [], is_start
+        for step, hi in enumerate(steps):
+            parts.append(_strategy_returns(fast, slow, lo, hi, commission))
+            lo = hi
+            trial.report(_sharpe(pd.concat(parts)), step)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+        return _sharpe(pd.concat(parts))
+
+    study = optuna.create_study(direction='maximize', sampler=optuna.samplers.TPESampler(seed=i),
+                                pruner=optuna.pruners.MedianPruner(n_startup_trials=5))
+    study.optimize(objective, n_trials=n_trials)
+    complete = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+    if not complete:
+        return {'window': i, 'returns': pd.Series(dtype=float)}
+    best = study.best_params
+    return {
+        'window': i,
+        'params': best,
+        'is_sharpe': study.best_value,
+        'pruned': sum(t.state == optuna.trial.TrialState.PRUNED for t in study.trials),
+        'returns': _strategy_returns(best['fast'], best['slow'], os_start, os_end, commission),
+    }
+
+def _append_parquet(df: pd.DataFrame, path: str):
+    # Keep earlier runs; rows for dates already present are replaced
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with duckdb.connect() as con:
+        con.register('new', df)
+        source = 'new'
+        if os.path.exists(path):
+            source = f"(SELECT * FROM read_parquet('{path}') ANTI JOIN new USING (date) UNION ALL BY NAME SELECT * FROM new)"
+        con.execute(f"COPY (SELECT * FROM {source} ORDER BY date) TO '{path}.tmp' (FORMAT PARQUET)")
+    os.replace(path + '.tmp', path)
+
 @flow(name="walk_forward_optimisation")
-def walk_forward_optimisation():
+def walk_forward_optimisation(symbols: Optional[list[str]] = None, start: str = "2004-01-01", end: Optional[str] = None,
+                              in_sample_years: int = 3, out_sample_years: int = 1, n_trials: int = 100,
+                              fast_range: tuple[int, int] = (5, 50), slow_range: tuple[int, int] = (20, 200),
+                              commission: float = 0.001, processes: Optional[int] = None,
+                              output: str = "analytics/equity_os.parquet", prices: Optional[pd.DataFrame] = None):
     # 1. Split data into rolling windows (3y IS / 1y OS)
-    # 2. Hyper-opt strategy params with Optuna
+    # 2. Hyper-opt strategy params with Optuna, windows in parallel, pruning
+    #    trials on a per-year in-sample Sharpe
     # 3. Append OS equity curve to analytics/equity_os.parquet
-    pass 
\ No newline at end of file
+    if prices is None:
+        prices = get_provider().history(symbols or ["SPY"], start=start, end=end)
+    close = prices['Close'].ffill()
+    windows = rolling_windows(close.index, in_sample_years, out_sample_years)
+    if not windows:
+        raise ValueError("not enough history for a single walk-forward window")
+    returns = close.pct_change()
+
+    with SharedFrame.create(returns) as shared_returns, SharedFrame.create(close) as shared_close, \
+            ProcessPoolExecutor(max_workers=processes or os.cpu_count(), initializer=_init_worker,
+                                initargs=(shared_returns.spec, shared_close.spec)) as pool:
+        futures = [pool.submit(_optimise_window, i, w, fast_range, slow_range, n_trials, commission)
+                   for i, w in enumerate(windows)]
+        results = sorted((f.result() for f in futures), key=lambda r: r['window'])
+
+    parts = [r['returns'].to_frame('ret').assign(window=r['window'], fast=r['params']['fast'], slow=r['params']['slow'])
+             for r in results if 'params' in r]
+    if not parts:
+        raise ValueError("no window produced a completed trial")
+    equity = pd.concat(parts).rename_axis('date').reset_index()
+    equity['equity'] = (1 + equity['ret']).cumprod()
+    _append_parquet(equity, output)
+    return {
+        'windows': [{k: v for k, v in r.items() if k != 'returns'} for r in results],
+        'equity': equity,
+    }
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Optional
+
+# In-process job queue: fn(payload, progress) runs on a bounded process pool
+# and clients poll the job record. A job's id is the hash of its payload, so
+# resubmitting an identical request returns the queued, running or finished
+# job instead of running it again; finished results are also written to
+# result_dir and survive restarts. Workers report progress through one
+# multiprocessing queue drained by a listener thread, so nothing outside this
+# process (broker, database) is needed.
+
+_progress = None  # worker side of the progress queue
+
+def _init_worker(progress_queue):
+    global _progress
+    _progress = progress_queue
+
+def _execute(fn: Callable, job_id: str, payload: Any):
+    def report(fraction: float, message: Optional[str] = None):
+        _progress.put((job_id, float(fraction), message))
+
+    report(0.0, 'running')
+    return fn(payload, report)
+
+def request_key(payload: Any) -> str:
+    # Canonical JSON, so key order and int/float spelling of the same request agree
+    text = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+class QueueFull(RuntimeError):
+    pass
+
+class JobQueue:
+    FINAL = ('done', 'failed')
+
+    def __init__(self, fn: Callable, max_workers: Optional[int] = None, max_pending: int = 64,
+                 result_dir: Optional[str] = None, max_results: int = 64, processes: bool = True):
+        # fn must be a picklable top-level function when processes=True.
+        # At most max_workers jobs run and max_pending more wait; further
+        # submissions raise QueueFull. max_results finished results stay in
+        # memory, the rest are read back from result_dir.
+        self.fn = fn
+        self.max_workers = max_workers or os.cpu_count()
+        self.max_pending = max_pending
+        self.result_dir = result_dir
+        self.max_results = max_results
+        self.processes = processes
+        self._jobs: dict[str, dict] = {}
+        self._results: OrderedDict[str, Any] = OrderedDict()
+        self._views: dict[tuple, Any] = {}
+        self._lock = threading.RLock()
+        self._pool = None
+        self._progress = None
+        self._latest: Optional[str] = None
+
+    def _start(self):
+        # Pool and listener are created on first use, not at import
+        if self._pool is not None:
+            return
+        if self.processes:
+            self._progress = mp.get_context().Queue()
+            pool = ProcessPoolExecutor
+        else:
+            self._progress = queue.Queue()
+            pool = ThreadPoolExecutor
+        self._pool = pool(self.max_workers, initializer=_init_worker, initargs=(self._progress,))
+        threading.Thread(target=self._listen, args=(self._progress,), daemon=True).start()
+
+    def _discard(self, pool):
+        # A worker died and broke the pool (BrokenProcessPool): its jobs fail
+        # through their futures, and the next submit starts a fresh pool
+        if pool is not None and self._pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._progress.put(None)
+            self._pool = None
+
+    def _listen(self, progress):
+        while (msg := progress.get()) is not None:
+            job_id, fraction, message = msg
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job['status'] in self.FINAL:
+                    continue
+                if job['status'] == 'queued':
+                    job.update(status='running', started=_now())
+                job['progress'] = max(job['progress'], fraction)
+                if message:
+                    job['message'] = message
+
+    def _path(self, job_id: str) -> Optional[str]:
+        return os.path.join(self.result_dir, f'{job_id}.json') if self.result_dir else None
+
+    def _forget_views(self, job_id: str):
+        for key in [k for k in self._views if k[0] == job_id]:
+            del self._views[key]
+
+    def _remember(self, job_id: str, result: Any):
+        if self._results.get(job_id) is not result:
+            self._forget_views(job_id)
+        self._results[job_id] = result
+        self._results.move_to_end(job_id)
+        while len(self._results) > self.max_results:
+            self._forget_views(self._results.popitem(last=False)[0])
+
+    def _store(self, job_id: str, result: Any):
+        self._remember(job_id, result)
+        path = self._path(job_id)
+        if path:
+            os.makedirs(self.result_dir, exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(result, f)
+            os.replace(tmp, path)
+
+    def _finish(self, job_id: str, pool, future):
+        with self._lock:
+            job = self._jobs[job_id]
+            job['finished'] = _now()
+            if future.cancelled() or future.exception() is not None:
+                error = 'cancelled' if future.cancelled() else future.exception()
+                job.update(status='failed', error=str(error) or type(error).__name__)
+                if isinstance(error, BrokenExecutor):
+                    self._discard(pool)
+                return
+            job.update(status='done', progress=1.0, message=None)
+            self._store(job_id, future.result())
+            self._latest = job_id
+
+    def _lookup(self, job_id: str) -> Optional[dict]:
+        # Known job, or a result persisted by an earlier process
+        job = self._jobs.get(job_id)
+        if job is None and (path := self._path(job_id)) and os.path.exists(path):
+            stamp = datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d %H:%M:%S')
+            job = self._jobs[job_id] = {'id': job_id, 'status': 'done', 'progress': 1.0, 'message': None,
+                                        'submitted': stamp, 'started': stamp, 'finished': stamp,
+                                        'error': None, 'cached': True}
+        return job
+
+    def _has_result(self, job_id: str) -> bool:
+        path = self._path(job_id)
+        return job_id in self._results or bool(path and os.path.exists(path))
+
+    def submit(self, payload: Any, key: Optional[str] = None) -> dict:
+        # Returns a copy of the job record. Failed jobs, and finished ones whose
+        # result is gone (no result_dir, evicted from memory), run again.
+        job_id = key or request_key(payload)
+        with self._lock:
+            job = self._lookup(job_id)
+            if job is not None and job['status'] != 'failed' and (job['status'] != 'done' or self._has_result(job_id)):
+                return {**job, 'cached': job['status'] == 'done'}
+            active = sum(j['status'] not in self.FINAL for j in self._jobs.values())
+            if active >= self.max_workers + self.max_pending:
+                raise QueueFull(f'{active} jobs already queued or running')
+            self._start()
+            job = self._jobs[job_id] = {'id': job_id, 'status': 'queued', 'progress': 0.0, 'message': None,
+                                        'submitted': _now(), 'started': None, 'finished': None,
+                                        'error': None, 'cached': False}
+            try:
+                future = self._pool.submit(_execute, self.fn, job_id, payload)
+            except BrokenExecutor:
+                self._discard(self._pool)
+                self._start()
+                future = self._pool.submit(_execute, self.fn, job_id, payload)
+            future.add_done_callback(partial(self._finish, job_id, self._pool))
+            return dict(job)
+
+    def status(self, job_id: str) -> dict:
+        with self._lock:
+            job = self._lookup(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            return dict(job)
+
+    def result(self, job_id: str) -> Any:
+        # KeyError when the job has no result (unknown, unfinished or failed)
+        with self._lock:
+            if job_id in self._results:
+                self._results.move_to_end(job_id)
+                return self._results[job_id]
+            job = self._lookup(job_id)
+            if job is None or job['status'] != 'done' or not self._has_result(job_id):
+                raise KeyError(job_id)
+        with open(self._path(job_id)) as f:
+            result = json.load(f)
+        with self._lock:
+            self._remember(job_id, result)
+        return result
+
+    def view(self, job_id: str, fn: Callable) -> Any:
+        # fn(result) computed once per stored result (e.g. columnar tables
+        # served page by page) and dropped with it, so a rerun never serves
+        # a view of the previous result; KeyError like result()
+        key = (job_id, fn)
+        with self._lock:
+            if key in self._views:
+                return self._views[key]
+        result = self.result(job_id)
+        value = fn(result)
+        with self._lock:
+            if self._results.get(job_id) is result:
+                self._views[key] = value
+        return value
+
+    def latest(self) -> Optional[str]:
+        # Id of the most recently finished job, falling back to the newest
+        # result stored by an earlier process
+        if self._latest is not None or not self.result_dir or not os.path.isdir(self.result_dir):
+            return self._latest
+        stored = [e for e in os.scandir(self.result_dir) if e.name.endswith('.json')]
+        return max(stored, key=lambda e: e.stat().st_mtime).name[:-5] if stored else None
+
+    def jobs(self) -> list[dict]:
+        with self._lock:
+            return sorted((dict(j) for j in self._jobs.values()), key=lambda j: j['submitted'], reverse=True)
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=not wait)
+            self._progress.put(None)
+            self._pool = None
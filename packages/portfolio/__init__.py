@@ -5,5 +5,6 @@ This package contains portfolio optimization and management utilities.
 """
 
 from .optimizer import *
+from .risk import *
 
 __version__ = "0.1.0" 
\ No newline at end of file
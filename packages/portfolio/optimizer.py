@@ -1,13 +1,131 @@
+from typing import Optional, Union
+
+import numpy as np
 import pandas as pd
 from pypfopt import EfficientFrontier, HRPOpt
 
-def allocate(returns: pd.DataFrame, method: str = "hrp") -> pd.Series:
+from .risk import covariance, hrp_weights, max_sharpe
+
+def _clean(weights: pd.Series, cutoff: float = 1e-6) -> pd.Series:
+    # clean_weights without the 5-decimal rounding, which would zero most
+    # weights of a large universe: drop dust, then renormalize
+    weights = weights.where(weights.abs() >= cutoff, 0.0)
+    return weights / weights.sum()
+
+def allocate(returns: pd.DataFrame, method: str = "hrp", cov: str = "sample", n_factors: int = 10) -> pd.Series:
+    # cov picks the estimator (see risk.covariance). The sample path solves
+    # with pypfopt; shrunk and factor models use max_sharpe/hrp_weights, which
+    # need only Sigma @ w and scale to thousands of assets
     mu = returns.mean()
+    if cov != "sample":
+        S = covariance(returns, cov, n_factors)
+        if method == "mv":
+            return _clean(pd.Series(max_sharpe(mu.to_numpy(), S), index=returns.columns))
+        if method == "hrp":
+            return _clean(hrp_weights(S))
+        raise ValueError("Unknown method")
     S = returns.cov()
     if method == "mv":
         ef = EfficientFrontier(mu, S)
+        try:
+            ef.max_sharpe()
+        except ValueError:
+            # No asset beats the risk-free rate: max Sharpe is undefined
+            ef = EfficientFrontier(mu, S)
+            ef.min_volatility()
     elif method == "hrp":
         ef = HRPOpt(returns)
+        ef.optimize()
     else:
         raise ValueError("Unknown method")
-    return pd.Series(ef.clean_weights()) 
\ No newline at end of file
+    return pd.Series(ef.clean_weights())
+
+class RollingMoments:
+    # Mean and covariance of a sliding window of return rows from running sums:
+    # adding/removing k rows costs O(k N^2) instead of O(window N^2). The sums
+    # are rebuilt from the window every `resum` updates to stop float drift.
+    def __init__(self, n_assets: int, resum: int = 64):
+        self.resum = resum
+        self.n = 0
+        self._s1 = np.zeros(n_assets)
+        self._s2 = np.zeros((n_assets, n_assets))
+        self._updates = 0
+
+    def add(self, rows: np.ndarray):
+        self.n += len(rows)
+        self._s1 += rows.sum(axis=0)
+        self._s2 += rows.T @ rows
+        self._updates += 1
+
+    def remove(self, rows: np.ndarray):
+        self.n -= len(rows)
+        self._s1 -= rows.sum(axis=0)
+        self._s2 -= rows.T @ rows
+        self._updates += 1
+
+    def reset(self, window: np.ndarray):
+        self.n, self._updates = 0, 0
+        self._s1[:], self._s2[:] = 0.0, 0.0
+        self.add(window)
+
+    def update(self, window: np.ndarray, added: np.ndarray, removed: np.ndarray):
+        if self._updates >= self.resum:
+            self.reset(window)
+        else:
+            self.remove(removed)
+            self.add(added)
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._s1 / self.n
+
+    @property
+    def cov(self) -> np.ndarray:
+        mu = self.mean
+        return (self._s2 - self.n * np.outer(mu, mu)) / (self.n - 1)
+
+def rebalance_dates(index: pd.DatetimeIndex, schedule: Union[str, pd.DatetimeIndex, list] = 'ME') -> pd.DatetimeIndex:
+    # A pandas frequency ('ME', 'W-FRI', 'QE', ...) picks the last bar of each
+    # period; explicit dates are kept when they are in the index
+    if isinstance(schedule, str):
+        return pd.DatetimeIndex(index.to_series().resample(schedule).last().dropna())
+    return pd.DatetimeIndex(schedule).intersection(index)
+
+def rolling_allocate(returns: pd.DataFrame, schedule: Union[str, pd.DatetimeIndex, list] = 'ME',
+                     window: int = 252, method: str = 'mv', min_periods: Optional[int] = None,
+                     cov: str = 'sample', n_factors: int = 10) -> pd.DataFrame:
+    # Weights at every rebalance date from the trailing `window` rows up to and
+    # including that date (apply them from the next bar). Sample moments slide
+    # incrementally between dates (other estimators are refit on the window)
+    # and each mv solve starts from the previous weights. Missing returns
+    # count as 0.
+    method = method.lower()
+    if method not in ('mv', 'hrp'):
+        raise ValueError("Unknown method")
+    values = returns.fillna(0.0).to_numpy(dtype=float)
+    n_assets = values.shape[1]
+    min_periods = min_periods or window
+    moments = RollingMoments(n_assets)
+    weights = np.full(n_assets, 1.0 / n_assets)
+    lo = hi = 0
+    history = {}
+    for date in rebalance_dates(returns.index, schedule):
+        end = returns.index.get_loc(date) + 1
+        start = max(0, end - window)
+        if end - start < min_periods:
+            continue
+        if hi == 0 or start >= hi:
+            moments.reset(values[start:end])
+        else:
+            moments.update(values[start:end], added=values[hi:end], removed=values[lo:start])
+        lo, hi = start, end
+        if cov == 'sample':
+            S = pd.DataFrame(moments.cov, index=returns.columns, columns=returns.columns)
+        else:
+            S = covariance(pd.DataFrame(values[start:end], columns=returns.columns), cov, n_factors)
+        if method == 'mv':
+            weights = max_sharpe(moments.mean, S, weights)
+        else:
+            weights = hrp_weights(S).to_numpy()
+        history[date] = weights
+    return pd.DataFrame.from_dict(history, orient='index', columns=returns.columns).rename_axis('date')
@@ -0,0 +1,157 @@
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+import scipy.cluster.hierarchy as sch
+import scipy.spatial.distance as ssd
+from scipy.optimize import minimize
+from sklearn.covariance import ledoit_wolf
+
+class FactorCovariance:
+    # Sigma = B diag(f) B' + diag(d) from k statistical factors: N x k
+    # loadings, k factor variances and N specific variances. Never forms the
+    # N x N matrix unless asked: products cost O(Nk), solves O(Nk^2).
+    def __init__(self, loadings: np.ndarray, factor_var: np.ndarray, specific_var: np.ndarray,
+                 index: Optional[pd.Index] = None):
+        self.loadings = loadings
+        self.factor_var = factor_var
+        self.specific_var = specific_var
+        self.index = index if index is not None else pd.RangeIndex(len(specific_var))
+
+    @classmethod
+    def from_returns(cls, returns: pd.DataFrame, n_factors: int = 10, min_specific: float = 1e-10) -> 'FactorCovariance':
+        # PCA by thin SVD of the demeaned T x N returns, O(min(T, N)^2 max(T, N));
+        # specific variance is whatever the factors leave of each asset's variance
+        X = returns.fillna(0.0).to_numpy(dtype=float)
+        X = X - X.mean(axis=0)
+        k = min(n_factors, min(X.shape) - 1)
+        _, s, vt = np.linalg.svd(X, full_matrices=False)
+        loadings = vt[:k].T
+        factor_var = s[:k] ** 2 / (len(X) - 1)
+        total = (X * X).sum(axis=0) / (len(X) - 1)
+        specific = np.maximum(total - (loadings ** 2 * factor_var).sum(axis=1), min_specific)
+        return cls(loadings, factor_var, specific, returns.columns)
+
+    def __len__(self) -> int:
+        return len(self.specific_var)
+
+    def diag(self) -> np.ndarray:
+        return (self.loadings ** 2 * self.factor_var).sum(axis=1) + self.specific_var
+
+    def matvec(self, w: np.ndarray) -> np.ndarray:
+        return self.loadings @ (self.factor_var * (self.loadings.T @ w)) + self.specific_var * w
+
+    def variance(self, w: np.ndarray, items: Optional[np.ndarray] = None) -> float:
+        # w' Sigma w, optionally for the sub-matrix of `items` (w has their length)
+        B, d = (self.loadings, self.specific_var) if items is None else (self.loadings[items], self.specific_var[items])
+        return float(((B.T @ w) ** 2 * self.factor_var).sum() + (d * w * w).sum())
+
+    def solve(self, b: np.ndarray) -> np.ndarray:
+        # Sigma^-1 b by Woodbury: only a k x k system is factorized
+        Dinv_b = b / self.specific_var
+        DinvB = self.loadings / self.specific_var[:, None]
+        inner = np.diag(1 / self.factor_var) + self.loadings.T @ DinvB
+        return Dinv_b - DinvB @ np.linalg.solve(inner, self.loadings.T @ Dinv_b)
+
+    def corr(self) -> np.ndarray:
+        sd = np.sqrt(self.diag())
+        scaled = self.loadings * np.sqrt(self.factor_var) / sd[:, None]
+        corr = scaled @ scaled.T
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+    def dense(self) -> pd.DataFrame:
+        values = (self.loadings * self.factor_var) @ self.loadings.T + np.diag(self.specific_var)
+        return pd.DataFrame(values, index=self.index, columns=self.index)
+
+Covariance = Union[pd.DataFrame, FactorCovariance]
+
+def covariance(returns: pd.DataFrame, method: str = 'sample', n_factors: int = 10) -> Covariance:
+    # 'sample' | 'ledoit_wolf' (shrunk towards a scaled identity, well
+    # conditioned when T < N) | 'factor' (FactorCovariance, PCA + diagonal)
+    method = method.lower().replace('-', '_')
+    if method == 'sample':
+        return returns.cov()
+    if method == 'ledoit_wolf':
+        shrunk, _ = ledoit_wolf(returns.fillna(0.0).to_numpy(dtype=float))
+        return pd.DataFrame(shrunk, index=returns.columns, columns=returns.columns)
+    if method == 'factor':
+        return FactorCovariance.from_returns(returns, n_factors)
+    raise ValueError(f"unknown covariance method {method!r}")
+
+def dense_covariance(cov: Covariance) -> pd.DataFrame:
+    return cov.dense() if isinstance(cov, FactorCovariance) else cov
+
+def portfolio_variance(cov: Covariance, w) -> float:
+    w = np.asarray(w, dtype=float)
+    return cov.variance(w) if isinstance(cov, FactorCovariance) else float(w @ cov.to_numpy() @ w)
+
+def risk_contributions(cov: Covariance, w) -> np.ndarray:
+    # Each asset's share of portfolio volatility; sums to the volatility
+    w = np.asarray(w, dtype=float)
+    sigma_w = cov.matvec(w) if isinstance(cov, FactorCovariance) else cov.to_numpy() @ w
+    return w * sigma_w / np.sqrt(w @ sigma_w)
+
+def max_sharpe(mu: np.ndarray, cov: Covariance, x0: Optional[np.ndarray] = None) -> np.ndarray:
+    # Long-only max Sharpe (risk-free 0), or minimum variance when no mean is
+    # positive. Both maximize a'y / sqrt(y' Sigma y) over y >= 0, which is
+    # scale-invariant, so bounds alone suffice and w = y / sum(y). Only needs
+    # Sigma @ y, so a FactorCovariance keeps every iteration O(Nk).
+    matvec = cov.matvec if isinstance(cov, FactorCovariance) else cov.to_numpy().__matmul__
+    n = len(mu)
+    a = mu if (mu > 0).any() else np.ones(n)
+
+    def objective(y):
+        sy = matvec(y)
+        var = y @ sy
+        ret, sd = a @ y, np.sqrt(var)
+        return -ret / sd, -(a / sd - ret * sy / (sd * var))
+
+    x0 = np.full(n, 1.0 / n) if x0 is None else np.maximum(x0, 1e-6)
+    res = minimize(objective, x0, jac=True, method='L-BFGS-B', bounds=[(0.0, None)] * n,
+                   options={'ftol': 1e-15, 'gtol': 1e-10, 'maxiter': 1000})
+    w = np.maximum(res.x, 0.0)
+    return w / w.sum()
+
+def hrp_weights(cov: Covariance) -> pd.Series:
+    # Hierarchical risk parity as in pypfopt's HRPOpt (single-linkage on
+    # correlation distance, recursive bisection with inverse-variance cluster
+    # variances) on positions instead of labels; cluster variances come from
+    # the factor structure when cov is a FactorCovariance
+    if isinstance(cov, FactorCovariance):
+        index, corr, diag = cov.index, cov.corr(), cov.diag()
+
+        def cluster_var(items, w):
+            return cov.variance(w, items)
+    else:
+        index, values = cov.index, cov.to_numpy()
+        diag = np.diag(values)
+        sd = np.sqrt(diag)
+        corr = values / sd[:, None] / sd[None, :]
+
+        def cluster_var(items, w):
+            return w @ values[np.ix_(items, items)] @ w
+    # corr -> distance in place: one N x N buffer plus the condensed form
+    np.round(corr, 6, out=corr)
+    corr -= 1.0
+    corr /= -2.0
+    np.clip(corr, 0.0, 1.0, out=corr)
+    np.sqrt(corr, out=corr)
+    condensed = ssd.squareform(corr, checks=False)
+    del corr
+    order = np.array(sch.to_tree(sch.linkage(condensed, 'single'), rd=False).pre_order())
+
+    def variance(items):
+        ivp = 1 / diag[items]
+        return cluster_var(items, ivp / ivp.sum())
+
+    w = np.ones(len(index))
+    clusters = [order]
+    while clusters:
+        clusters = [c[j:k] for c in clusters for j, k in ((0, len(c) // 2), (len(c) // 2, len(c))) if len(c) > 1]
+        for first, second in zip(clusters[::2], clusters[1::2]):
+            v1, v2 = variance(first), variance(second)
+            alpha = 1 - v1 / (v1 + v2)
+            w[first] *= alpha
+            w[second] *= 1 - alpha
+    return pd.Series(w, index=index)
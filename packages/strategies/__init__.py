@@ -8,5 +8,7 @@ from .base import *
 from .momentum import *
 from .pairs import *
 from .ml_factor import *
+from .vectorized import *
+from .sweep import *
 
-__version__ = "0.1.0" 
\ No newline at end of file
+__version__ = "0.1.0"
@@ -1,10 +1,80 @@
+from collections import OrderedDict
+from typing import Optional
+
 import backtrader as bt
+import numpy as np
+import pandas as pd
 from sklearn.base import BaseEstimator
 
+from packages.core.fingerprint import frame_fingerprint, model_fingerprint
+
+_SIGNALS: 'OrderedDict[tuple, pd.DataFrame]' = OrderedDict()
+_MAX_CACHED = 32
+
+def _proba(model, X: np.ndarray) -> np.ndarray:
+    return model.predict_proba(X)[:, 1]
+
+def precompute_signals(model: BaseEstimator, features: pd.DataFrame, cache: bool = True) -> pd.DataFrame:
+    # One predict_proba over every (date, symbol) row of a (label, symbol)
+    # feature panel -> date x symbol P(up). Rows with missing features stay NaN.
+    # Results are cached on (model weights, feature data) fingerprints.
+    key = (model_fingerprint(model), frame_fingerprint(features))
+    if cache and key in _SIGNALS:
+        _SIGNALS.move_to_end(key)
+        return _SIGNALS[key]
+    rows = features.stack(level=1, future_stack=True)
+    valid = rows.notna().all(axis=1).to_numpy()
+    proba = np.full(len(rows), np.nan)
+    if valid.any():
+        proba[valid] = _proba(model, rows.to_numpy(dtype=float)[valid])
+    signals = pd.Series(proba, index=rows.index).unstack()
+    signals = signals.reindex(index=features.index, columns=features.columns.unique(level=1))
+    if cache:
+        _SIGNALS[key] = signals
+        while len(_SIGNALS) > _MAX_CACHED:
+            _SIGNALS.popitem(last=False)
+    return signals
+
 class MLFactorStrategy(bt.Strategy):
-    def __init__(self, model: BaseEstimator):
+    # Long each data feed while P(up) > threshold. With batch=True (default)
+    # predict_proba runs once over the feature panel before the first bar and
+    # next() only looks the signal up; batch=False predicts bar by bar.
+    # Data feeds are matched to panel symbols by their name.
+    params = (
+        ('features', None),
+        ('signals', None),
+        ('threshold', 0.5),
+        ('batch', True),
+    )
+
+    def __init__(self, model: Optional[BaseEstimator] = None):
         self.model = model
+        signals = self.p.signals
+        if signals is None and self.p.batch and model is not None and self.p.features is not None:
+            signals = precompute_signals(model, self.p.features)
+        self.signals: Optional[pd.DataFrame] = signals
+        if signals is not None:
+            self._values = signals.to_numpy()
+            self._rows = {ts: i for i, ts in enumerate(signals.index)}
+            self._cols = {sym: j for j, sym in enumerate(signals.columns)}
+
+    def _signal(self, data) -> float:
+        dt = pd.Timestamp(data.datetime.datetime(0))
+        if self.signals is not None:
+            i, j = self._rows.get(dt), self._cols.get(data._name)
+            return np.nan if i is None or j is None else self._values[i, j]
+        if self.model is None or self.p.features is None:
+            return np.nan
+        row = self.p.features.xs(data._name, axis=1, level=1).loc[[dt]].to_numpy(dtype=float)
+        return np.nan if np.isnan(row).any() else float(_proba(self.model, row)[0])
 
     def next(self):
-        # Placeholder: use model.predict_proba to generate signals
-        pass 
\ No newline at end of file
+        for data in self.datas:
+            p = self._signal(data)
+            if np.isnan(p):
+                continue
+            position = self.getposition(data).size
+            if not position and p > self.p.threshold:
+                self.buy(data=data)
+            elif position and p < self.p.threshold:
+                self.close(data=data)
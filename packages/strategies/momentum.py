@@ -1,6 +1,26 @@
 import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from .vectorized import ema
 
 class MomentumStrategy(bt.Strategy):
+    params = (('fast', 12), ('slow', 26))
+
     def __init__(self):
-        self.ema_fast = bt.ind.EMA(period=12)
-        self.ema_slow = bt.ind.EMA(period=26) 
\ No newline at end of file
+        self.ema_fast = bt.ind.EMA(period=self.p.fast)
+        self.ema_slow = bt.ind.EMA(period=self.p.slow)
+
+    def next(self):
+        if not self.position and self.ema_fast[0] > self.ema_slow[0]:
+            self.buy()
+        elif self.position and self.ema_fast[0] < self.ema_slow[0]:
+            self.close()
+
+def momentum_positions(close: pd.DataFrame, fast: int = 12, slow: int = 26, stake: float = 1.0) -> pd.DataFrame:
+    # Vectorized MomentumStrategy: long `stake` while EMA(fast) > EMA(slow),
+    # flat once it drops below, unchanged on ties or before both EMAs exist
+    ema_fast, ema_slow = ema(close, fast).to_numpy(), ema(close, slow).to_numpy()
+    signal = np.where(ema_fast > ema_slow, 1.0, np.where(ema_fast < ema_slow, 0.0, np.nan))
+    signal[:max(fast, slow) - 1] = 0.0
+    return pd.DataFrame(signal, index=close.index, columns=close.columns).ffill() * stake
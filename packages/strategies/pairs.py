@@ -1,6 +1,114 @@
 import backtrader as bt
+import numpy as np
+import pandas as pd
+from typing import NamedTuple, Optional
+
+# Engle-Granger (two variables, constant) ADF critical values
+EG_CRITICAL = {0.01: -3.90, 0.05: -3.34, 0.10: -3.04}
+
+def screen_pairs(prices: pd.DataFrame, min_corr: float = 0.7, significance: float = 0.05,
+                 chunk: int = 512) -> pd.DataFrame:
+    # Cheap correlation filter on log returns over the whole N x N matrix, then
+    # an Engle-Granger test (OLS hedge ratio + lag-0 ADF on the residual)
+    # batched over the surviving pairs, `chunk` pairs at a time
+    if significance not in EG_CRITICAL:
+        raise ValueError(f"significance must be one of {', '.join(map(str, EG_CRITICAL))}, got {significance}")
+    logp = np.log(prices.ffill().dropna(axis=1, how='any'))
+    symbols = logp.columns
+    L = logp.to_numpy()
+    corr = np.corrcoef(np.diff(L, axis=0), rowvar=False)
+    ii, jj = np.triu_indices(len(symbols), k=1)
+    keep = corr[ii, jj] >= min_corr
+    ii, jj = ii[keep], jj[keep]
+
+    out = []
+    for lo in range(0, len(ii), chunk):
+        i, j = ii[lo:lo + chunk], jj[lo:lo + chunk]
+        y, x = L[:, i], L[:, j]
+        xm, ym = x - x.mean(0), y - y.mean(0)
+        beta = (xm * ym).sum(0) / (xm * xm).sum(0)
+        alpha = y.mean(0) - beta * x.mean(0)
+        e = ym - beta * xm
+        lag, de = e[:-1], np.diff(e, axis=0)
+        sxx = (lag * lag).sum(0)
+        rho = (lag * de).sum(0) / sxx
+        sigma2 = ((de - rho * lag) ** 2).sum(0) / (len(de) - 1)
+        adf = rho / np.sqrt(sigma2 / sxx)
+        out.append(pd.DataFrame({
+            'y': symbols[i], 'x': symbols[j], 'corr': corr[i, j],
+            'beta': beta, 'alpha': alpha, 'adf_stat': adf,
+            'half_life': -np.log(2) / np.log1p(np.clip(rho, -1 + 1e-12, -1e-12)),
+        }))
+    if not out:
+        return pd.DataFrame(columns=['y', 'x', 'corr', 'beta', 'alpha', 'adf_stat', 'half_life'])
+    pairs = pd.concat(out, ignore_index=True)
+    return pairs[pairs['adf_stat'] < EG_CRITICAL[significance]].sort_values('adf_stat', ignore_index=True)
+
+class KalmanResult(NamedTuple):
+    beta: pd.DataFrame
+    alpha: pd.DataFrame
+    spread: pd.DataFrame
+    zscore: pd.DataFrame
+
+def kalman_hedge(prices: pd.DataFrame, pairs: pd.DataFrame, delta: float = 1e-4, obs_var: float = 1e-3) -> KalmanResult:
+    # Time-varying hedge ratio y_t = beta_t * x_t + alpha_t + e_t for every pair
+    # at once: one vectorized predict/update over all pairs per time step.
+    # spread is the one-step forecast error, zscore scales it by its variance.
+    Y = prices[pairs['y']].to_numpy(dtype=float)
+    X = prices[pairs['x']].to_numpy(dtype=float)
+    T, P = Y.shape
+    theta = np.zeros((P, 2))
+    cov = np.zeros((P, 2, 2))
+    Vw = delta / (1 - delta) * np.eye(2)
+    betas, alphas, spread, z = (np.full((T, P), np.nan) for _ in range(4))
+    for t in range(T):
+        F = np.stack([X[t], np.ones(P)], axis=1)
+        R = cov + Vw
+        e = Y[t] - (F * theta).sum(1)
+        RF = np.einsum('pij,pj->pi', R, F)
+        Q = (F * RF).sum(1) + obs_var
+        K = RF / Q[:, None]
+        ok = np.isfinite(e)
+        theta = np.where(ok[:, None], theta + K * np.nan_to_num(e)[:, None], theta)
+        cov = np.where(ok[:, None, None], R - K[:, :, None] * RF[:, None, :], cov)
+        betas[t], alphas[t] = theta[:, 0], theta[:, 1]
+        spread[t], z[t] = e, e / np.sqrt(Q)
+    names = pairs['y'] + '/' + pairs['x']
+
+    def frame(a):
+        return pd.DataFrame(a, index=prices.index, columns=names.to_list())
+    return KalmanResult(frame(betas), frame(alphas), frame(spread), frame(z))
 
 class PairsTradingStrategy(bt.Strategy):
+    # Kalman filter mean-reversion on datas[0] (y) vs datas[1] (x), driven by
+    # precomputed kalman_hedge() output for that pair instead of per-bar filtering
+    params = (
+        ('zscore', None),
+        ('hedge', None),
+        ('entry', 2.0),
+        ('exit', 0.5),
+        ('stake', 1),
+        ('warmup', 20),
+    )
+
     def __init__(self):
-        # Placeholder for Kalman filter mean-reversion logic
-        pass 
\ No newline at end of file
+        self.y, self.x = self.datas[0], self.datas[1]
+        self.zscore: Optional[pd.Series] = self.p.zscore
+        self.hedge: Optional[pd.Series] = self.p.hedge
+
+    def next(self):
+        if self.zscore is None or len(self) < self.p.warmup:
+            return
+        dt = pd.Timestamp(self.y.datetime.datetime(0))
+        z, beta = self.zscore.get(dt), self.hedge.get(dt)
+        if z is None or beta is None or not np.isfinite(z):
+            return
+        pos = self.getposition(self.y).size
+        if pos == 0 and abs(z) > self.p.entry:
+            # z > 0: y rich versus x -> short y, long beta * x; and vice versa
+            side = -1 if z > 0 else 1
+            self.order_target_size(self.y, side * self.p.stake)
+            self.order_target_size(self.x, -side * round(beta * self.p.stake))
+        elif pos != 0 and abs(z) < self.p.exit:
+            self.order_target_size(self.y, 0)
+            self.order_target_size(self.x, 0)
@@ -0,0 +1,75 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator, Optional, Union
+
+import backtrader as bt
+import pandas as pd
+
+from packages.core.shared import SharedFrame
+from .momentum import MomentumStrategy, momentum_positions
+from .vectorized import run_vectorized
+
+_panel: Optional[pd.DataFrame] = None
+
+def _init_worker(spec):
+    # Each worker maps the shared OHLCV once; tasks only carry params
+    global _panel
+    _panel = SharedFrame(spec).frame()
+
+def _run_backtrader(strategy, symbol, params, cash, commission, stake) -> dict:
+    frame = _panel.xs(symbol, axis=1, level=1).rename(columns=str.lower)
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(bt.feeds.PandasData(dataname=frame))
+    cerebro.addstrategy(strategy, **params)
+    cerebro.addsizer(bt.sizers.FixedSize, stake=stake)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission=commission)
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+    strat = cerebro.run()[0]
+    value = cerebro.broker.getvalue()
+    return {'final_value': value, 'return': value / cash - 1,
+            'max_drawdown': -strat.analyzers.drawdown.get_analysis().max.drawdown / 100}
+
+def _run_vectorized(symbol, params, cash, commission, stake) -> dict:
+    target = momentum_positions(_panel['Close'][[symbol]], stake=stake, **params)
+    equity = run_vectorized(_panel, target, cash=cash, commission=commission).equity
+    return {'final_value': equity.iloc[-1], 'return': equity.iloc[-1] / cash - 1,
+            'max_drawdown': (equity / equity.cummax() - 1).min()}
+
+def _run(engine, strategy, symbol, params, cash, commission, stake) -> dict:
+    if engine == 'vectorized':
+        stats = _run_vectorized(symbol, params, cash, commission, stake)
+    else:
+        stats = _run_backtrader(strategy, symbol, params, cash, commission, stake)
+    return {'symbol': symbol, **params, **stats}
+
+def param_grid(grid: Union[dict, Iterable[dict]]) -> list[dict]:
+    # {'fast': [5, 10], 'slow': [20, 50]} -> every combination; lists pass through
+    if isinstance(grid, dict):
+        keys = list(grid)
+        return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+    return list(grid)
+
+def sweep(panel: pd.DataFrame, grid: Union[dict, Iterable[dict]], strategy=MomentumStrategy,
+          symbols: Optional[Iterable[str]] = None, processes: Optional[int] = None, engine: str = 'backtrader',
+          cash: float = 10000.0, commission: float = 0.001, stake: float = 1) -> Iterator[dict]:
+    # Runs every (symbol, params) combination on a process pool and yields each
+    # result as soon as it finishes. The panel is shared through a memory map,
+    # so workers read it zero-copy instead of unpickling a DataFrame per run.
+    # engine='vectorized' uses momentum_positions/run_vectorized instead of
+    # backtrader and only applies to MomentumStrategy.
+    if engine == 'vectorized' and strategy is not MomentumStrategy:
+        raise ValueError("the vectorized engine only implements MomentumStrategy")
+    symbols = list(symbols if symbols is not None else panel['Close'].columns)
+    runs = [(sym, params) for params in param_grid(grid) for sym in symbols]
+    with SharedFrame.create(panel) as shared, ProcessPoolExecutor(
+            max_workers=processes or os.cpu_count(), initializer=_init_worker, initargs=(shared.spec,)) as pool:
+        futures = [pool.submit(_run, engine, strategy, sym, params, cash, commission, stake) for sym, params in runs]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # A consumer that stops early should not wait for the rest of the grid
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,65 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+class VectorizedResult(NamedTuple):
+    equity: pd.Series
+    positions: pd.DataFrame
+    trades: pd.DataFrame
+    fees: pd.Series
+
+def ema(close: pd.DataFrame, period: int) -> pd.DataFrame:
+    # backtrader's EMA: seeded with the SMA of the first `period` bars, then
+    # alpha = 2 / (period + 1). Each column seeds at its own first run of
+    # `period` valid bars (late listings); gaps after that hold the last close,
+    # so the state carries across them. One lfilter pass per seed bar.
+    values = np.asarray(close, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if len(values) < period:
+        return pd.DataFrame(out, index=close.index, columns=close.columns)
+    alpha = 2.0 / (period + 1)
+    filled = pd.DataFrame(values).ffill().to_numpy()
+    valid = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(~np.isnan(values), axis=0)])
+    full = (valid[period:] - valid[:-period]) == period
+    seeded = full.any(axis=0)
+    seeds = np.where(seeded, full.argmax(axis=0) + period - 1, -1)
+    for s in np.unique(seeds[seeded]):
+        cols = np.flatnonzero(seeds == s)
+        seed = values[s - period + 1:s + 1, cols].mean(axis=0)
+        out[s, cols] = seed
+        zi = ((1 - alpha) * seed)[None, ...]
+        out[s + 1:, cols], _ = lfilter([alpha], [1.0, alpha - 1], filled[s + 1:, cols], axis=0, zi=zi)
+    return pd.DataFrame(out, index=close.index, columns=close.columns)
+
+def run_vectorized(panel: pd.DataFrame, target: pd.DataFrame, cash: float = 10000.0,
+                   commission: float = 0.0) -> VectorizedResult:
+    # panel: (field, symbol) OHLC; target: shares to hold, decided on each bar's
+    # close. Like a backtrader market order, the change fills at the next open.
+    opens = panel['Open'][target.columns].to_numpy(dtype=float)
+    # Positions over a missing close are marked at the last one
+    closes = panel['Close'][target.columns].ffill().to_numpy(dtype=float)
+    pos = np.zeros(target.shape)
+    pos[1:] = np.nan_to_num(target.to_numpy(dtype=float)[:-1])
+    traded = np.diff(pos, axis=0, prepend=0.0)
+    notional = traded * opens
+    fees = np.abs(notional) * commission
+    cash_path = cash - np.cumsum(np.nansum(notional + fees, axis=1))
+    equity = cash_path + np.nansum(pos * closes, axis=1)
+
+    index, symbols = target.index, target.columns
+    rows, cols = np.nonzero(traded)
+    trades = pd.DataFrame({
+        'date': index[rows],
+        'symbol': symbols[cols],
+        'size': traded[rows, cols],
+        'price': opens[rows, cols],
+        'fee': fees[rows, cols],
+    })
+    return VectorizedResult(
+        equity=pd.Series(equity, index=index, name='equity'),
+        positions=pd.DataFrame(pos, index=index, columns=symbols),
+        trades=trades,
+        fees=pd.Series(fees.sum(axis=1), index=index, name='fees'),
+    )
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from packages.data import providers
+
+def _make_panel(n_dates=120, symbols=("AAA", "BBB", "CCC"), seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2022-01-03", periods=n_dates)
+    fields = {}
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_dates, len(symbols))), axis=0))
+    fields["Close"] = close
+    fields["High"] = close * (1 + rng.uniform(0, 0.02, close.shape))
+    fields["Low"] = close * (1 - rng.uniform(0, 0.02, close.shape))
+    fields["Open"] = (fields["High"] + fields["Low"]) / 2
+    fields["Volume"] = rng.integers(1_000, 10_000, close.shape).astype(float)
+    return pd.concat({k: pd.DataFrame(v, index=idx, columns=list(symbols)) for k, v in fields.items()}, axis=1)
+
+@pytest.fixture
+def make_panel():
+    # Synthetic (field, symbol) OHLCV panel, shaped like yf.download output
+    return _make_panel
+
+class FakeProvider(providers.MarketDataProvider):
+    # Serves a fixed panel like a vendor would: end is exclusive, unknown or
+    # `failing` symbols come back as nothing (an empty frame if none are
+    # left). Every call is recorded as (symbols, start, end).
+    def __init__(self, panel, failing=()):
+        self.panel = panel
+        self.failing = set(failing)
+        self.calls = []
+        self.version = None
+
+    def history(self, symbols, start=None, end=None, interval='1d', period=None):
+        symbols = list(symbols)
+        self.calls.append((tuple(symbols), start, end))
+        held = set(self.panel.columns.get_level_values(1))
+        served = [s for s in symbols if s in held and s not in self.failing]
+        last = None if end is None else pd.Timestamp(end) - pd.Timedelta(days=1)
+        frame = self.panel.loc[start:last, (slice(None), served)]
+        return frame if served and not frame.empty else pd.DataFrame()
+
+    def data_version(self):
+        return self.version
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    # fake_provider(panel, failing=()) installs a FakeProvider as the
+    # process-wide provider and returns it
+    def install(panel, failing=()):
+        provider = FakeProvider(panel, failing)
+        monkeypatch.setattr(providers, '_provider', provider)
+        return provider
+    return install
@@ -0,0 +1,134 @@
+import time
+
+import empyrical as emp
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api_backend import main
+from packages.core.materialize import MaterializedResults
+from packages.data import providers
+from packages.data.cache import HistoryCache
+from packages.models import GBMModel, ModelCache, ModelRegistry
+from packages.orchestration.flows.backtest import backtest
+from packages.orchestration.jobs import JobQueue
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, make_panel, fake_provider):
+    fake_provider(make_panel(n_dates=300, symbols=('AAA', 'BBB', 'SPY')))
+    monkeypatch.setattr(main, 'backtest_jobs', JobQueue(backtest, result_dir=str(tmp_path / 'jobs'), processes=False))
+    monkeypatch.setattr(main, 'analytics_results', MaterializedResults(str(tmp_path / 'analytics')))
+    history = HistoryCache(str(tmp_path / 'history'))
+    monkeypatch.setattr(main, 'get_history_cache', lambda: history)
+    registry = ModelRegistry(str(tmp_path / 'models'))
+    monkeypatch.setattr(main, 'model_registry', registry)
+    monkeypatch.setattr(main, 'model_cache', ModelCache(registry))
+    return TestClient(main.app)
+
+def _run(client, **params):
+    job_id = client.post('/api/backtesting/run', json={'symbols': ['AAA', 'BBB'], 'startDate': '2022-01-01',
+                                                       'endDate': '2023-06-01', 'params': params}).json()['jobId']
+    for _ in range(500):
+        if main.backtest_jobs.status(job_id)['status'] == 'done':
+            return job_id
+        time.sleep(0.01)
+    raise AssertionError('backtest did not finish')
+
+def test_conditional_get(client, monkeypatch):
+    assert client.get('/api/analytics/performance').status_code == 404
+    job_id = _run(client, fast=5, slow=20)
+    first = client.get('/api/analytics/performance')
+    etag = first.headers['etag']
+    equity = pd.Series(client.get('/api/analytics/equity-curve').json()['y'])
+    assert first.json()['sharpe'] == pytest.approx(emp.sharpe_ratio(equity.pct_change().dropna()), rel=1e-9)
+    assert first.json()['beta'] is not None
+    loads = main.get_history_cache().stats()
+    for _ in range(3):
+        polled = client.get('/api/analytics/performance', headers={'If-None-Match': etag})
+        assert polled.status_code == 304 and polled.content == b'' and polled.headers['etag'] == etag
+    assert client.get('/api/analytics/performance', headers={'If-None-Match': f'"x", W/{etag}'}).status_code == 304
+    assert main.analytics_results.stats()['misses'] == 2  # performance and equity-curve, once each
+    assert main.get_history_cache().stats() == loads  # polls load no benchmark prices
+
+    drawdown = client.get(f'/api/analytics/drawdown?jobId={job_id}').json()
+    assert min(drawdown['y']) == pytest.approx(first.json()['maxDrawdown'], rel=1e-9)
+
+    # a newer backtest is a new source: new result and ETag
+    _run(client, fast=8, slow=30)
+    assert client.get('/api/analytics/performance', headers={'If-None-Match': etag}).status_code == 200
+
+    # materialized bodies survive a restart
+    monkeypatch.setattr(main, 'analytics_results', MaterializedResults(main.analytics_results.root))
+    monkeypatch.setattr(main, 'tear_sheet', lambda *a, **k: pytest.fail('recomputed'))
+    assert client.get(f'/api/analytics/performance?jobId={job_id}').headers['etag'] == etag
+
+    # new benchmark prices are a new source as well
+    providers._provider.version = 'restated'
+    with pytest.raises(pytest.fail.Exception):
+        client.get(f'/api/analytics/performance?jobId={job_id}')
+
+def test_failed_compute_releases_its_lock(tmp_path):
+    results = MaterializedResults(str(tmp_path))
+    with pytest.raises(ZeroDivisionError):
+        results.get('x', 'k', lambda: 1 / 0)
+    assert results._computing == {}
+    assert results.get('x', 'k', lambda: {'ok': True})[0] == b'{"ok":true}'
+
+def test_materialized_disk_is_bounded(tmp_path):
+    results = MaterializedResults(str(tmp_path), max_entries=1, max_disk_bytes=250)
+    body = {'y': list(range(20))}  # ~60 bytes stored, room for four
+    for version in range(6):
+        results.get('x', f'job@{version}', lambda: body)
+        time.sleep(0.01)
+    results.get('x', 'job@2', pytest.fail)  # read back, now recently used
+    time.sleep(0.01)
+    results.get('x', 'job@6', lambda: body)
+    stored = {str(f) for f in (tmp_path / 'x').iterdir()}
+    assert stored == {results._path('x', f'job@{v}') for v in (2, 4, 5, 6)}
+
+def test_shap_features(client):
+    assert client.get('/api/analytics/shap-features').status_code == 404
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 3)), columns=['a', 'b', 'c'])
+    model = GBMModel(background_size=50, n_estimators=20).fit(X, (X['b'] - X['a'] > 0).astype(int))
+    main.model_registry.save('gbm', model)
+    features = client.get('/api/analytics/shap-features')
+    top = {f['feature']: f['direction'] for f in features.json()[:2]}
+    assert top == {'a': 'negative', 'b': 'positive'}
+    assert client.get('/api/analytics/shap-features', headers={'If-None-Match': features.headers['etag']}).status_code == 304
+
+def test_downsampled_series(client, monkeypatch):
+    job_id = _run(client, fast=5, slow=20)
+    full = client.get('/api/analytics/drawdown').json()
+    small = client.get('/api/analytics/drawdown?width=20&method=minmax').json()
+    assert len(small['x']) <= 42 < len(full['x']) and min(small['y']) == min(full['y'])
+    assert set(small['x']) <= set(full['x'])
+    equity = client.get('/api/analytics/equity-curve').json()
+    curve = client.get('/api/analytics/equity-curve?width=20&method=minmax').json()
+    assert len(curve['y']) <= 42 and curve['y'][-1] == equity['y'][-1] and max(curve['y']) == max(equity['y'])
+    page = client.get(f'/api/backtesting/jobs/{job_id}/equity?width=20&method=minmax&limit=100').json()
+    assert [r['date'] for r in page['items']] == curve['x'] and page['total'] == len(curve['x'])
+    # the downsampled table is kept with the job's result, not rebuilt per page
+    monkeypatch.setattr(main, 'downsample_indices', lambda *a: pytest.fail('downsampled again'))
+    again = client.get(f'/api/backtesting/jobs/{job_id}/equity?width=20&method=minmax&offset=5').json()
+    assert [r['date'] for r in again['items']] == curve['x'][5:]
+    assert client.get('/api/analytics/drawdown?width=20&method=median').status_code == 422
+
+def test_drawdown_heatmap(client, make_panel, monkeypatch):
+    url = '/api/analytics/drawdown-heatmap?symbols=bbb,AAA&freq=Q'
+    first = client.get(url)
+    body = first.json()
+    assert body['assets'] == ['AAA', 'BBB'] and body['periods'][0] == '2022Q1'
+    close = make_panel(n_dates=300, symbols=('AAA', 'BBB', 'SPY'))['Close'][['AAA', 'BBB']]
+    quarter = close.loc['2022-04-01':'2022-06-30']
+    start = close.loc[:'2022-03-31'].iloc[-1]
+    expected = (quarter / quarter.cummax().clip(lower=start, axis=1) - 1).min()
+    np.testing.assert_allclose([row[1] for row in body['z']], expected, atol=1e-6)
+    assert client.get(url, headers={'If-None-Match': first.headers['etag']}).status_code == 304
+    misses = main.analytics_results.stats()['misses']
+    providers._provider.version = 'appended'
+    assert client.get(url).json() == body and main.analytics_results.stats()['misses'] == misses + 1
+    assert len(client.get(url + '&bucket=60').json()['periods']) == 5
+    assert client.get('/api/analytics/drawdown-heatmap?symbols=AAA&freq=D').status_code == 422
+    assert client.get('/api/analytics/drawdown-heatmap?symbols=AAA&start=2030-01-01').status_code == 404
@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+from api_backend import main, tables
+from packages.orchestration.flows.backtest import backtest, normalize_request
+from packages.orchestration.jobs import JobQueue, QueueFull, request_key
+
+def _square(payload, progress):
+    progress(0.5, 'halfway')
+    with open(payload['log'], 'a') as f:
+        f.write('run\n')
+    return {'value': payload['x'] ** 2}
+
+def _fail(payload, progress):
+    raise ValueError('boom')
+
+def _crash(payload, progress):
+    if payload.get('crash'):
+        os._exit(1)
+    return payload
+
+_release = threading.Event()
+
+def _block(payload, progress):
+    _release.wait(10)
+    return payload
+
+def _wait(queue, job_id):
+    for _ in range(500):
+        job = queue.status(job_id)
+        if job['status'] in JobQueue.FINAL:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'{job_id} did not finish')
+
+def test_process_queue_dedups_and_persists(tmp_path):
+    log = str(tmp_path / 'runs.log')
+    queue = JobQueue(_square, max_workers=1, result_dir=str(tmp_path / 'results'))
+    try:
+        first = queue.submit({'x': 3, 'log': log})
+        again = queue.submit({'log': log, 'x': 3})
+        assert first['id'] == again['id'] == request_key({'x': 3, 'log': log})
+        assert _wait(queue, first['id'])['progress'] == 1.0
+        assert queue.result(first['id']) == {'value': 9}
+        assert queue.submit({'x': 3, 'log': log})['status'] == 'done'
+    finally:
+        queue.shutdown()
+    with open(log) as f:
+        assert f.read() == 'run\n'
+    # a fresh queue (new process) serves the stored result without running
+    restarted = JobQueue(_fail, processes=False, result_dir=str(tmp_path / 'results'))
+    job = restarted.submit({'x': 3, 'log': log})
+    assert job['status'] == 'done' and job['cached'] and restarted.result(job['id']) == {'value': 9}
+
+def test_failed_jobs_and_backpressure():
+    queue = JobQueue(_fail, processes=False)
+    job = _wait(queue, queue.submit({'x': 1})['id'])
+    assert job['status'] == 'failed' and job['error'] == 'boom'
+    with pytest.raises(KeyError):
+        queue.result(job['id'])
+
+    _release.clear()
+    blocking = JobQueue(_block, max_workers=1, max_pending=1, processes=False)
+    blocking.submit({'n': 1})
+    blocking.submit({'n': 2})
+    with pytest.raises(QueueFull):
+        blocking.submit({'n': 3})
+    _release.set()
+    blocking.shutdown()
+    assert [j['status'] for j in blocking.jobs()] == ['done', 'done']
+
+def test_running_jobs_are_not_cached():
+    _release.clear()
+    queue = JobQueue(_block, max_workers=1, processes=False)
+    job = queue.submit({'n': 1})
+    assert not queue.submit({'n': 1})['cached']
+    _release.set()
+    _wait(queue, job['id'])
+    assert queue.submit({'n': 1})['cached']
+    queue.shutdown()
+
+def test_queue_recovers_from_a_crashed_worker():
+    queue = JobQueue(_crash, max_workers=1)
+    try:
+        crashed = _wait(queue, queue.submit({'crash': True})['id'])
+        assert crashed['status'] == 'failed' and crashed['error']
+        job = _wait(queue, queue.submit({'x': 1})['id'])
+        assert job['status'] == 'done' and queue.result(job['id']) == {'x': 1}
+    finally:
+        queue.shutdown()
+
+def test_views_follow_their_result():
+    runs = []
+    queue = JobQueue(lambda payload, progress: runs.append(payload) or len(runs), max_results=1, processes=False)
+    first = _wait(queue, queue.submit({'n': 1})['id'])['id']
+    assert queue.view(first, lambda r: [r]) == [1]
+
+    def double(r):
+        return 2 * r
+    assert queue.view(first, double) == queue.view(first, double) == 2
+    # evicted by a newer result and rerun: the view is rebuilt from the new result
+    _wait(queue, queue.submit({'n': 2})['id'])
+    with pytest.raises(KeyError):
+        queue.view(first, double)
+    _wait(queue, queue.submit({'n': 1})['id'])
+    assert queue.view(first, double) == 6
+
+def test_normalize_request():
+    a = normalize_request({'symbols': ['msft', 'aapl'], 'params': {'fast': 5.0}})
+    b = normalize_request({'params': {'fast': 5, 'slow': 26}, 'symbols': ['AAPL', 'MSFT'], 'strategy': 'momentum'})
+    assert a == b and request_key(a) == request_key(b)
+    with pytest.raises(ValueError):
+        normalize_request({'strategy': 'ml_factor'})
+    with pytest.raises(ValueError):
+        normalize_request({'params': {'window': 3}})
+    for malformed in ({'symbols': [1, 'AAA']}, {'symbols': []}, {'symbols': ' '}, {'strategy': ['momentum']},
+                      {'params': [1]}, {'params': {'fast': None}}, {'cash': None}):
+        with pytest.raises(ValueError):
+            normalize_request(malformed)
+
+def test_backtest_endpoints(tmp_path, monkeypatch, make_panel, fake_provider):
+    panel = make_panel(n_dates=250, symbols=('AAA', 'BBB'))
+    fake_provider(panel)
+    queue = JobQueue(backtest, max_workers=1, result_dir=str(tmp_path), processes=False)
+    monkeypatch.setattr(main, 'backtest_jobs', queue)
+    client = TestClient(main.app)
+    request = {'symbols': ['AAA', 'BBB'], 'startDate': '2022-01-01', 'endDate': '2023-01-01',
+               'params': {'fast': 5, 'slow': 20}, 'stake': 10}
+    submitted = client.post('/api/backtesting/run', json=request)
+    assert submitted.status_code in (200, 202)
+    job_id = submitted.json()['jobId']
+    assert _wait(queue, job_id)['status'] == 'done'
+    assert client.get(f'/api/backtesting/jobs/{job_id}').json()['progress'] == 1.0
+    result = client.get(f'/api/backtesting/jobs/{job_id}/result').json()
+    assert result['trades'] and len(result['equityCurve']['x']) == len(panel)
+    assert set(result['metrics']) == {'totalReturn', 'sharpeRatio', 'maxDrawdown', 'winRate', 'profitFactor'}
+    repeat = client.post('/api/backtesting/run', json={**request, 'symbols': ['bbb', 'aaa']})
+    assert repeat.status_code == 200 and repeat.json()['jobId'] == job_id
+    assert os.listdir(tmp_path) == [f'{job_id}.json']
+    assert client.post('/api/backtesting/run', json={'strategy': 'nope'}).status_code == 400
+    assert client.post('/api/backtesting/run', json={'symbols': [1, 'AAA']}).status_code == 400
+    assert client.get('/api/backtesting/jobs/unknown').status_code == 404
+
+def test_trades_and_equity_formats(tmp_path, monkeypatch, make_panel, fake_provider):
+    panel = make_panel(n_dates=400, symbols=('AAA', 'BBB', 'CCC'))
+    fake_provider(panel)
+    queue = JobQueue(backtest, result_dir=str(tmp_path), processes=False)
+    monkeypatch.setattr(main, 'backtest_jobs', queue)
+    monkeypatch.setattr(tables, 'BATCH_SIZE', 7)  # several batches per stream
+    client = TestClient(main.app)
+    job_id = client.post('/api/backtesting/run', json={'symbols': ['AAA', 'BBB', 'CCC'], 'startDate': '2022-01-01',
+                                                       'params': {'fast': 3, 'slow': 8}}).json()['jobId']
+    _wait(queue, job_id)
+    result = client.get(f'/api/backtesting/jobs/{job_id}/result').json()
+    trades = result['trades']
+    assert len(trades) > 20
+    assert 'trades' not in client.get(f'/api/backtesting/jobs/{job_id}/result?summary=true').json()
+
+    page = client.get(f'/api/backtesting/jobs/{job_id}/trades?offset=5&limit=10').json()
+    assert page['total'] == len(trades) and page['next'] == 15 and page['items'] == trades[5:15]
+
+    streamed = client.get(f'/api/backtesting/jobs/{job_id}/trades?format=ndjson')
+    assert streamed.headers['content-type'] == tables.NDJSON
+    assert [json.loads(line) for line in streamed.text.splitlines()] == trades
+
+    arrow = client.get(f'/api/backtesting/jobs/{job_id}/equity?format=arrow&offset=100')
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert arrow.headers['x-total-count'] == str(len(panel))
+    assert table.column('equity').to_pylist() == result['equityCurve']['y'][100:]
+    assert client.get(f'/api/backtesting/jobs/{job_id}/trades?format=xml').status_code == 422
+
+    # another queue holding a different result under the same id is not served stale tables
+    other = JobQueue(backtest, result_dir=str(tmp_path / 'other'), processes=False)
+    other._store(job_id, {**result, 'trades': trades[:3]})
+    other._jobs[job_id] = {**queue.status(job_id)}
+    monkeypatch.setattr(main, 'backtest_jobs', other)
+    assert client.get(f'/api/backtesting/jobs/{job_id}/trades').json()['total'] == 3
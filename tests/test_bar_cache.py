@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from packages.data import providers
+from packages.data.cache import BarCache, HistoryCache
+
+class CountingProvider(providers.MarketDataProvider):
+    def __init__(self, panel, delay=0.0):
+        self.panel = panel
+        self.delay = delay
+        self.calls = []
+
+    def history(self, symbols, start=None, end=None, interval='1d', period=None):
+        self.calls.append(sorted(symbols))
+        time.sleep(self.delay)
+        present = [s for s in symbols if s in self.panel['Close']]
+        return self.panel.loc[:, (slice(None), present)] if present else pd.DataFrame()
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_batches_and_expires(make_panel):
+    panel = make_panel(symbols=('AAA', 'BBB', 'CCC'))
+    provider, clock = CountingProvider(panel), Clock()
+    cache = BarCache(provider, ttls={'1m': 30}, stale_while_revalidate=False, clock=clock)
+    bars = cache.bars(['AAA', 'BBB', 'ZZZ'], '1d', '1m')
+    pd.testing.assert_frame_equal(bars, panel.loc[:, (slice(None), ['AAA', 'BBB'])].dropna(how='all'))
+    assert provider.calls == [['AAA', 'BBB', 'ZZZ']]
+    # cached symbols (and the unknown one) are not fetched again; new ones are, alone
+    cache.bars(['BBB', 'ZZZ', 'CCC'], '1d', '1m')
+    assert provider.calls[1:] == [['CCC']]
+    quotes = cache.quotes(['AAA', 'CCC', 'ZZZ'])
+    assert quotes['AAA'] == panel['Close']['AAA'].iloc[-1] and np.isnan(quotes['ZZZ'])
+    assert len(provider.calls) == 2
+    clock.now = 31
+    cache.quotes(['AAA', 'CCC'])
+    assert provider.calls[2:] == [['AAA', 'CCC']]
+
+def test_single_flight_and_stale_while_revalidate(make_panel):
+    panel = make_panel(symbols=('AAA', 'BBB'))
+    provider, clock = CountingProvider(panel, delay=0.2), Clock()
+    cache = BarCache(provider, ttls={'1h': 60}, clock=clock)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.bars(['AAA', 'BBB']))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(provider.calls) == 1 and len(results) == 5 and all(r.equals(results[0]) for r in results)
+
+    clock.now = 61
+    start = time.perf_counter()
+    stale = cache.bars(['AAA', 'BBB'])
+    assert time.perf_counter() - start < 0.1 and stale.equals(results[0])
+    for _ in range(100):
+        if cache.stats()['inflight'] == 0:
+            break
+        time.sleep(0.01)
+    assert len(provider.calls) == 2 and cache.stats()['fetches'] == 2
+
+def test_history_cache_memoizes_and_slices(tmp_path, make_panel):
+    panel = make_panel(n_dates=200, symbols=('AAA', 'BBB', 'SPY'))
+    provider = CountingProvider(panel)
+    cache = HistoryCache(str(tmp_path), provider=provider)
+    full = cache.load(['SPY', 'AAA', 'BBB', 'AAA'], '2022-01-01', '2022-06-01')
+    assert cache.load(['BBB', 'SPY', 'AAA'], '2022-01-01', '2022-06-01') is full
+    pd.testing.assert_frame_equal(cache.load(['AAA', 'SPY'], '2022-01-01', '2022-06-01'),
+                                  full.loc[:, (slice(None), ['AAA', 'SPY'])])
+    assert provider.calls == [['AAA', 'BBB', 'SPY']]
+    # another process (new instance) reads the Parquet copy
+    restarted = HistoryCache(str(tmp_path), provider=provider)
+    pd.testing.assert_frame_equal(restarted.load(['AAA', 'BBB', 'SPY'], '2022-01-01', '2022-06-01'), full,
+                                  check_freq=False)
+    assert len(provider.calls) == 1 and restarted.stats()['disk_panels'] == 1
+    # a different range is a new load
+    cache.load(['AAA'], '2022-02-01', '2022-06-01')
+    assert provider.calls[1:] == [['AAA']]
+
+def test_history_cache_evicts_by_size_and_refreshes_recent(tmp_path, make_panel):
+    provider = CountingProvider(make_panel(n_dates=200, symbols=('AAA', 'BBB', 'CCC')))
+    cache = HistoryCache(str(tmp_path), provider=provider, max_disk_bytes=1)
+    for sym in ('AAA', 'BBB', 'CCC'):
+        cache.load([sym], '2022-01-01', '2022-06-01')
+    assert cache.stats()['disk_panels'] == 1  # only the newest file survives
+    assert len(HistoryCache(str(tmp_path), provider=provider).load(['CCC'], '2022-01-01', '2022-06-01')) > 0
+    assert len(provider.calls) == 3
+
+    recent = HistoryCache(str(tmp_path / 'recent'), provider=provider, recent_ttl=0)
+    recent.load(['AAA'], '2022-01-01', None)
+    recent.load(['AAA'], '2022-01-01', None)
+    assert provider.calls[3:] == [['AAA'], ['AAA']]
+
+def test_history_cache_follows_provider_data_version(tmp_path, make_panel):
+    provider = CountingProvider(make_panel(n_dates=200, symbols=('AAA', 'BBB')))
+    cache = HistoryCache(str(tmp_path), provider=provider)
+    _, first = cache.load_with_version(['AAA', 'BBB'], '2022-01-01', '2022-06-01')
+    assert cache.load_with_version(['AAA'], '2022-01-01', '2022-06-01')[1] == first
+    provider.data_version = lambda: 'appended'
+    _, second = cache.load_with_version(['AAA', 'BBB'], '2022-01-01', '2022-06-01')
+    assert second != first and len(provider.calls) == 2
+
+def test_history_cache_memory_hits_keep_disk_copies(tmp_path, make_panel):
+    provider = CountingProvider(make_panel(n_dates=200, symbols=('AAA', 'BBB', 'CCC')))
+    cache = HistoryCache(str(tmp_path), provider=provider)
+    cache.load(['AAA'], '2022-01-01', '2022-06-01')
+    size = sum(e.stat().st_size for e in os.scandir(tmp_path))
+    cache.max_disk_bytes = int(2.5 * size)
+    cache.load(['BBB'], '2022-01-01', '2022-06-01')
+    time.sleep(0.01)
+    cache.load(['AAA'], '2022-01-01', '2022-06-01')  # memory hit, AAA is now the most recently used
+    cache.load(['CCC'], '2022-01-01', '2022-06-01')
+    restarted = HistoryCache(str(tmp_path), provider=provider)
+    restarted.load(['AAA'], '2022-01-01', '2022-06-01')
+    restarted.load(['BBB'], '2022-01-01', '2022-06-01')
+    assert provider.calls[3:] == [['BBB']]
+    assert (cache.hits, cache.misses) == (1, 3)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from packages.analytics import downsample, downsample_indices, lttb_indices, minmax_indices
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    values = np.cumsum(rng.normal(0, 1, 50000))
+    return pd.Series(values, index=pd.date_range('2020-01-01', periods=50000, freq='min'))
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_bounded_and_keeps_extrema(series, method):
+    idx = downsample_indices(series.to_numpy(), 300, method, series.index)
+    assert len(idx) <= 2 * 300 + 2 and np.all(np.diff(idx) > 0)
+    assert {0, len(series) - 1, series.to_numpy().argmin(), series.to_numpy().argmax()} <= set(idx)
+    drawdown = series / series.cummax() - 1
+    assert downsample(drawdown, 300, method).min() == drawdown.min()
+
+def test_minmax_keeps_every_bucket_extreme():
+    y = np.zeros(1000)
+    y[[17, 333, 999 - 5]] = [-5, 7, -3]
+    assert set(minmax_indices(y, 10)) >= {17, 333, 994}
+
+def test_lttb_matches_reference():
+    # plain loop implementation of the original algorithm
+    rng = np.random.default_rng(1)
+    y = rng.normal(size=997)
+    x = np.arange(997, dtype=float)
+    n_out = 60
+    every = (len(y) - 2) / (n_out - 2)
+    picked, a = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        nlo, nhi = hi, min(int((i + 2) * every) + 1, len(y))
+        mx, my = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        areas = [abs((x[a] - mx) * (y[j] - y[a]) - (x[a] - x[j]) * (my - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        picked.append(a)
+    picked.append(len(y) - 1)
+    expected = sorted(set(picked) | {int(y.argmin()), int(y.argmax())})
+    assert list(lttb_indices(y, n_out // 2)) == expected
+
+def test_short_series_unchanged(series):
+    short = series.iloc[:100]
+    assert downsample(short, 300) is short and downsample(series, None) is series
+    with pytest.raises(ValueError):
+        downsample_indices(series.to_numpy(), 10, 'median')
+
+@pytest.mark.parametrize('width', [-1, 0, 1])
+def test_too_narrow_width_is_rejected(series, width):
+    for method in ('lttb', 'minmax'):
+        with pytest.raises(ValueError):
+            downsample(series, width, method)
+        with pytest.raises(ValueError):
+            downsample_indices(series.to_numpy(), width, method)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from packages.features import technical
+from packages.features.technical import ATR, RSI, SMA, RollReturn, ZScore, compute_panel
+
+FEATURES = [RollReturn(), ZScore(), ATR(), RSI()]
+
+def reference(df):
+    # The original one-frame-at-a-time formulas
+    out = {'roll_return': df['Close'].pct_change(21)}
+    out['zscore'] = (df['Close'] - df['Close'].rolling(20).mean()) / df['Close'].rolling(20).std()
+    high_low = df['High'] - df['Low']
+    high_close = np.abs(df['High'] - df['Close'].shift())
+    low_close = np.abs(df['Low'] - df['Close'].shift())
+    out['atr'] = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1).rolling(14).mean()
+    delta = df['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    out['rsi'] = 100 - (100 / (1 + gain / loss))
+    return out
+
+def test_panel_matches_per_frame_compute(make_panel):
+    panel = make_panel()
+    before = panel.copy()
+    out = compute_panel(panel, FEATURES)
+    pd.testing.assert_frame_equal(panel, before)
+    for sym in panel['Close'].columns:
+        frame = panel.xs(sym, axis=1, level=1).copy()
+        expected = reference(frame)
+        for f in FEATURES:
+            pd.testing.assert_series_equal(f.compute(frame)[f.name], expected[f.name], check_names=False)
+            pd.testing.assert_series_equal(out[f.name][sym], expected[f.name], check_names=False)
+
+def test_plan_computes_shared_intermediates_once(monkeypatch, make_panel):
+    calls = []
+    ops = dict(technical._OPS)
+    for op, fn in technical._OPS.items():
+        ops[op] = lambda *a, _op=op, _fn=fn: calls.append(_op) or _fn(*a)
+    monkeypatch.setattr(technical, '_OPS', ops)
+    out = compute_panel(make_panel(), [ZScore(), SMA(), RSI(), RSI(window=7), ATR()])
+    assert calls.count('rolling_mean') == 6  # sma/zscore share one, 2 per rsi, atr
+    assert calls.count('rolling_std') == 1
+    assert calls.count('diff') == 1
+    assert calls.count('shift') == 1
+    assert {'zscore', 'sma', 'rsi', 'rsi_7', 'atr'} == set(out.columns.get_level_values(0))
+
+def test_stream_matches_batch(make_panel):
+    panel = make_panel(n_dates=200)
+    panel.iloc[50, panel.columns.get_loc(('Close', 'BBB'))] = np.nan
+    features = FEATURES + [SMA(), RSI(window=7)]
+    expected = compute_panel(panel, features)
+    s = technical.stream(features)
+    first = s.update(panel.iloc[0])
+    for label, value in first.items():
+        np.testing.assert_allclose(value, expected[label].iloc[0].to_numpy(), rtol=1e-9)
+    pd.testing.assert_frame_equal(s.update_many(panel.iloc[1:]), expected.iloc[1:], rtol=1e-9)
+
+def test_single_symbol_stream(make_panel):
+    frame = make_panel(n_dates=80).xs('AAA', axis=1, level=1)
+    out = ZScore().stream().update_many(frame)
+    pd.testing.assert_series_equal(out['zscore'], ZScore().compute(frame.copy())['zscore'], rtol=1e-9)
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from packages.models import GBMModel
+
+def _data(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 4)), columns=['a', 'b', 'c', 'd'])
+    return X, (X['a'] + 0.5 * X['b'] > 0).astype(int)
+
+def test_shap_is_lazy_bounded_and_cached():
+    X, y = _data()
+    model = GBMModel(background_size=50, n_estimators=20).fit(X, y)
+    assert model._explainer is None and len(model._background) == 50
+    explanation = model.shap_values(X.iloc[:100])
+    assert model.shap_values(X.iloc[:100]) is explanation
+    margin = model.model.predict(X.iloc[:100], output_margin=True)
+    for exp in (explanation, model.shap_values(X.iloc[:100], approximate=True)):
+        assert exp.values.shape == (100, 4)
+        np.testing.assert_allclose(exp.values.sum(axis=1) + exp.base_values, margin, atol=1e-4)
+
+def test_refit_invalidates_cache():
+    X, y = _data()
+    model = GBMModel(n_estimators=5).fit(X, y)
+    first = model.shap_values(X.iloc[:20])
+    model.model.set_params(n_estimators=10)
+    model.fit(X, y)
+    assert model.shap_values(X.iloc[:20]) is not first
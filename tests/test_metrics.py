@@ -0,0 +1,65 @@
+import empyrical as emp
+import numpy as np
+import pandas as pd
+import pytest
+
+from packages.analytics import metrics
+from packages.analytics import (period_drawdowns, rolling_cvar, rolling_max_drawdown, rolling_metrics, rolling_sharpe, rolling_sortino,
+                                rolling_volatility)
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(0.0005, 0.01, (300, 4)), index=pd.bdate_range('2021-01-01', periods=300),
+                         columns=['a', 'b', 'c', 'd'])
+    frame.iloc[40:43, 2] = np.nan
+    return frame
+
+@pytest.mark.parametrize('ours, reference', [
+    (rolling_sharpe, emp.sharpe_ratio),
+    (rolling_sortino, emp.sortino_ratio),
+    (rolling_volatility, emp.annual_volatility),
+    (rolling_max_drawdown, emp.max_drawdown),
+    (rolling_cvar, emp.conditional_value_at_risk),
+])
+def test_rolling_metrics_match_empyrical(returns, ours, reference, monkeypatch):
+    monkeypatch.setattr(metrics, '_CHUNK', 1000)  # several strided chunks
+    expected = returns.rolling(30).apply(reference, raw=True)
+    pd.testing.assert_frame_equal(ours(returns, 30), expected, rtol=1e-8, atol=1e-12)
+    pd.testing.assert_series_equal(ours(returns['a'], 30), expected['a'], rtol=1e-8, atol=1e-12)
+
+def test_rolling_metrics_frame(returns):
+    table = rolling_metrics(returns, 21, metrics=('sharpe', 'cvar'))
+    assert list(table.columns.unique(level=0)) == ['sharpe', 'cvar'] and table.shape == (300, 8)
+    assert table['sharpe'].iloc[:20].isna().all().all()
+
+def _period_drawdowns_loop(prices, labels):
+    # each period on its own, starting from the previous period's close
+    out = {}
+    for label in pd.unique(labels):
+        pos = np.flatnonzero(labels == label)
+        seg = prices.iloc[max(pos[0] - 1, 0):pos[-1] + 1]
+        drawdown = seg / seg.cummax() - 1
+        out[label] = (drawdown.iloc[1:] if pos[0] else drawdown).min()
+    return pd.DataFrame(out)
+
+@pytest.mark.parametrize('freq', ['M', 'Q', 'Y', 21])
+def test_period_drawdowns_match_loop(returns, freq):
+    prices = 100 * (1 + returns.fillna(0)).cumprod()
+    prices.iloc[:50, 1] = np.nan  # listed later
+    ours = period_drawdowns(prices, freq)
+    if isinstance(freq, int):
+        labels = np.array([str(prices.index[i - i % freq].date()) for i in range(len(prices))])
+    else:
+        labels = prices.index.to_period(freq).astype(str).to_numpy()
+    expected = _period_drawdowns_loop(prices.ffill(), labels)
+    pd.testing.assert_frame_equal(ours, expected, check_names=False)
+    assert (ours.fillna(0) <= 0).all().all()
+
+def test_period_drawdowns_edge_inputs(returns):
+    prices = 100 * (1 + returns.fillna(0)).cumprod()
+    empty = period_drawdowns(prices.iloc[:0], 'M')
+    assert empty.empty and list(empty.index) == list(prices.columns)
+    pd.testing.assert_frame_equal(period_drawdowns(prices, np.int64(21)), period_drawdowns(prices, 21))
+    with pytest.raises(ValueError):
+        period_drawdowns(prices, 0)
@@ -0,0 +1,53 @@
+import backtrader as bt
+import numpy as np
+import xgboost as xgb
+
+from packages.features import RSI, SMA, RollReturn, compute_panel
+from packages.strategies import MLFactorStrategy, precompute_signals
+from packages.strategies import ml_factor
+
+class _Counting(xgb.XGBClassifier):
+    calls = 0
+
+    def predict_proba(self, X, **kwargs):
+        type(self).calls += 1
+        return super().predict_proba(X, **kwargs)
+
+def _fit(panel):
+    features = compute_panel(panel, [RSI(), RollReturn(window=5), SMA(window=10)])
+    rows = features.stack(level=1, future_stack=True).dropna()
+    target = (rows.index.get_level_values(0).dayofweek % 2).to_numpy()
+    model = _Counting(n_estimators=10, max_depth=2).fit(rows.to_numpy(), target)
+    return model, features
+
+def test_batch_signals_match_per_row_predict_and_cache(make_panel):
+    ml_factor._SIGNALS.clear()
+    model, features = _fit(make_panel(n_dates=150))
+    _Counting.calls = 0
+    signals = precompute_signals(model, features)
+    assert _Counting.calls == 1
+    assert precompute_signals(model, features) is signals and _Counting.calls == 1
+    date, sym = features.index[60], 'BBB'
+    row = features.xs(sym, axis=1, level=1).loc[[date]].to_numpy()
+    assert np.isclose(signals.loc[date, sym], model.predict_proba(row)[0, 1])
+    assert signals.iloc[:5].isna().all().all()
+
+def _run(panel, model, features, batch):
+    cerebro = bt.Cerebro(stdstats=False)
+    for sym in panel['Close'].columns:
+        cerebro.adddata(bt.feeds.PandasData(dataname=panel.xs(sym, axis=1, level=1).rename(columns=str.lower)), name=sym)
+    cerebro.addstrategy(MLFactorStrategy, model=model, features=features, batch=batch)
+    cerebro.broker.setcash(10_000)
+    cerebro.run()
+    return cerebro.broker.getvalue()
+
+def test_batch_mode_matches_per_bar_backtest(make_panel):
+    panel = make_panel(n_dates=150)
+    model, features = _fit(panel)
+    _Counting.calls = 0
+    per_bar = _run(panel, model, features, batch=False)
+    assert _Counting.calls > 100 and per_bar != 10_000
+    ml_factor._SIGNALS.clear()
+    _Counting.calls = 0
+    assert _run(panel, model, features, batch=True) == per_bar
+    assert _Counting.calls == 1
@@ -0,0 +1,90 @@
+import time
+
+import gymnasium as gym
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api_backend import main
+from packages.models import GBMModel, ModelCache, ModelRegistry, PPOAllocator
+from packages.orchestration.flows.train import train_gbm
+from packages.orchestration.jobs import JobQueue
+
+def _gbm(seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(300, 3)), columns=['a', 'b', 'c'])
+    return GBMModel(background_size=40, n_estimators=10).fit(X, (X['a'] > 0).astype(int)), X
+
+def test_registry_roundtrip(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    gbm, X = _gbm()
+    meta = registry.save('gbm', gbm, features=list(X.columns))
+    loaded = registry.load('gbm')
+    assert meta['kind'] == 'gbm' and registry.meta('gbm')['features'] == ['a', 'b', 'c']
+    np.testing.assert_allclose(loaded.predict_proba(X), gbm.predict_proba(X))
+    # Background stays memory-mapped (read-only view of the .npy)
+    assert not loaded._background.to_numpy().flags.writeable
+    assert loaded.version == gbm.version
+
+    env = gym.make('CartPole-v1')
+    ppo = PPOAllocator(env)
+    registry.save('ppo', ppo)
+    obs, _ = env.reset(seed=0)
+    assert registry.load('ppo').predict(obs, deterministic=True)[0] == ppo.predict(obs, deterministic=True)[0]
+    assert [m['id'] for m in registry.list()] == ['gbm', 'ppo']
+
+def test_cache_evicts_by_size(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    for name in ('a', 'b', 'c'):
+        registry.save(name, _gbm()[0])
+    size = registry.meta('a')['bytes']
+    cache = ModelCache(registry, max_bytes=2 * size)
+    first = cache.get('a')
+    assert cache.get('a') is first
+    cache.get('b')
+    cache.get('a')
+    cache.get('c')
+    assert cache.stats()['models'] == [f"a@{registry.latest('a')}", f"c@{registry.latest('c')}"]
+    assert (cache.hits, cache.misses) == (2, 3)
+
+def test_train_and_predict_endpoints(tmp_path, monkeypatch, make_panel, fake_provider):
+    fake_provider(make_panel(n_dates=250))
+    registry = ModelRegistry(str(tmp_path / 'models'))
+    monkeypatch.setattr(main, 'model_registry', registry)
+    monkeypatch.setattr(main, 'model_cache', ModelCache(registry))
+    monkeypatch.setattr(main, 'model_jobs', JobQueue(train_gbm, result_dir=str(tmp_path / 'jobs'), processes=False))
+    client = TestClient(main.app)
+    queued = client.post('/api/models/gbm_momentum/train', json={'symbols': ['AAA', 'BBB'], 'nEstimators': 20})
+    assert queued.status_code == 202
+    for _ in range(500):
+        job = client.get(f"/api/models/jobs/{queued.json()['jobId']}").json()
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.01)
+    trained = job['result']
+    assert trained['status'] == 'trained'
+    models = client.get('/api/models').json()
+    assert [m['id'] for m in models] == ['gbm_momentum'] and models[0]['version'] == trained['version']
+    for _ in range(3):
+        scored = client.post('/api/models/gbm_momentum/predict', json={'symbols': ['AAA', 'CCC']}).json()
+    assert [p['key'].split()[0] for p in scored['predictions']] == ['AAA', 'CCC']
+    assert client.get('/api/models/cache').json()['misses'] == 1
+    assert client.post('/api/models/nope/predict', json={'rows': []}).status_code == 404
+    # malformed bodies and ids are client errors
+    assert client.post('/api/models/gbm_momentum/predict', json={}).status_code == 400
+    assert client.post('/api/models/gbm_momentum/predict', json={'rows': [{'x': 1}]}).status_code == 400
+    assert client.post('/api/models/gbm_momentum/train', json={'nEstimators': 'many'}).status_code == 400
+    assert client.post('/api/models/..%2Fescape/train', json={}).status_code in (400, 404)
+    assert client.get('/api/models/bad.id').status_code == 400
+    registry.save('allocator', PPOAllocator(gym.make('CartPole-v1')))
+    assert client.post('/api/models/allocator/train', json={}).status_code == 400
+    assert client.post('/api/models/allocator/predict', json={}).status_code == 400
+
+def test_registry_rejects_unsafe_ids(tmp_path):
+    registry = ModelRegistry(str(tmp_path / 'models'))
+    for bad in ('../x', 'a/b', '', '.hidden'):
+        with pytest.raises(ValueError):
+            registry.save(bad, _gbm()[0])
+    with pytest.raises(ValueError):
+        registry.meta('gbm', '../../etc')
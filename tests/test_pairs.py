@@ -0,0 +1,71 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+from packages.strategies import PairsTradingStrategy, kalman_hedge, screen_pairs
+
+def _prices(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2020-01-01", periods=n)
+    common = np.cumsum(rng.normal(0, 0.01, n))
+    noise = np.zeros(n)
+    for t in range(1, n):
+        noise[t] = 0.7 * noise[t - 1] + rng.normal(0, 0.005)
+    walks = np.cumsum(rng.normal(0, 0.01, (n, 2)), axis=0)
+    return pd.DataFrame({
+        'XA': 50 * np.exp(common),
+        'YA': 20 * np.exp(1.5 * common + noise),
+        'W1': 30 * np.exp(walks[:, 0] + 0.8 * common),
+        'W2': 40 * np.exp(walks[:, 1] + 0.8 * common),
+    }, index=idx)
+
+def test_screen_finds_cointegrated_pair():
+    pairs = screen_pairs(_prices(), min_corr=0.3)
+    assert {frozenset(p) for p in zip(pairs['y'], pairs['x'])} == {frozenset({'XA', 'YA'})}
+    assert 0 < pairs['half_life'].iloc[0] < 20
+    with pytest.raises(ValueError, match='0.01, 0.05, 0.1'):
+        screen_pairs(_prices(), significance=0.2)
+
+def _kalman_loop(y, x, delta, obs_var):
+    theta, cov, Vw = np.zeros(2), np.zeros((2, 2)), delta / (1 - delta) * np.eye(2)
+    out = []
+    for yt, xt in zip(y, x):
+        F = np.array([xt, 1.0])
+        R = cov + Vw
+        e = yt - F @ theta
+        Q = F @ R @ F + obs_var
+        K = R @ F / Q
+        theta = theta + K * e
+        cov = R - np.outer(K, F) @ R
+        out.append((theta[0], e / np.sqrt(Q)))
+    return np.array(out)
+
+def test_kalman_matches_per_pair_filter():
+    prices = _prices()
+    pairs = pd.DataFrame({'y': ['YA', 'W1'], 'x': ['XA', 'W2']})
+    result = kalman_hedge(prices, pairs)
+    for (y, x), name in zip(pairs.itertuples(index=False), result.beta.columns):
+        ref = _kalman_loop(prices[y].to_numpy(), prices[x].to_numpy(), 1e-4, 1e-3)
+        np.testing.assert_allclose(result.beta[name], ref[:, 0], rtol=1e-9)
+        np.testing.assert_allclose(result.zscore[name], ref[:, 1], rtol=1e-9)
+
+class _Counting(PairsTradingStrategy):
+    def start(self):
+        self.filled = 0
+
+    def notify_order(self, order):
+        self.filled += order.status == order.Completed
+
+def test_pairs_strategy_trades_precomputed_signals():
+    prices = _prices()
+    result = kalman_hedge(prices, pd.DataFrame({'y': ['YA'], 'x': ['XA']}))
+    cerebro = bt.Cerebro(stdstats=False)
+    for sym in ('YA', 'XA'):
+        frame = pd.DataFrame({f: prices[sym] for f in ('open', 'high', 'low', 'close')}).assign(volume=1.0)
+        cerebro.adddata(bt.feeds.PandasData(dataname=frame), name=sym)
+    cerebro.addstrategy(_Counting, zscore=result.zscore['YA/XA'], hedge=result.beta['YA/XA'],
+                        entry=0.4, exit=0.1, stake=10)
+    cerebro.broker.setcash(100_000)
+    strat = cerebro.run()[0]
+    assert strat.filled > 4
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from packages.portfolio import (RollingMoments, allocate, covariance, hrp_weights, max_sharpe, portfolio_variance,
+                                risk_contributions, rolling_allocate)
+
+def _returns(n=700, n_assets=5, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range('2018-01-01', periods=n)
+    drift = rng.normal(0.0003, 0.0003, n_assets)
+    return pd.DataFrame(rng.normal(0, 0.01, (n, n_assets)) + drift, index=idx, columns=list('ABCDE')[:n_assets])
+
+def test_allocate_solves_before_cleaning():
+    returns = _returns()
+    for method in ('mv', 'hrp'):
+        weights = allocate(returns, method)
+        assert np.isclose(weights.sum(), 1.0, atol=1e-4) and (weights >= 0).all()
+    assert allocate(returns - 0.01, 'mv').sum() > 0.99
+
+def test_rolling_moments_track_window():
+    values = _returns().to_numpy()
+    moments = RollingMoments(values.shape[1], resum=3)
+    moments.reset(values[:100])
+    for start in range(10, 300, 10):
+        moments.update(values[start:start + 100], added=values[start + 90:start + 100], removed=values[start - 10:start])
+        np.testing.assert_allclose(moments.mean, values[start:start + 100].mean(axis=0), atol=1e-12)
+        np.testing.assert_allclose(moments.cov, np.cov(values[start:start + 100], rowvar=False), atol=1e-12)
+
+def test_rolling_allocate_matches_allocate_per_date():
+    returns = _returns()
+    for method in ('mv', 'hrp'):
+        history = rolling_allocate(returns, 'ME', window=126, method=method)
+        assert len(history) > 20 and np.allclose(history.sum(axis=1), 1.0)
+        for date in history.index[::5]:
+            end = returns.index.get_loc(date) + 1
+            expected = allocate(returns.iloc[end - 126:end], method).reindex(returns.columns)
+            np.testing.assert_allclose(history.loc[date], expected, atol=1e-3)
+
+def _factor_returns(n=250, n_assets=60, seed=1):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (n, 3))
+    loadings = rng.normal(0, 1, (n_assets, 3))
+    values = factors @ loadings.T * 0.5 + rng.normal(0.0004, 0.01, (n, n_assets))
+    return pd.DataFrame(values, columns=[f'S{i:02d}' for i in range(n_assets)])
+
+def test_factor_covariance_structured_ops_match_dense():
+    returns = _factor_returns()
+    fc = covariance(returns, 'factor', n_factors=3)
+    dense = fc.dense().to_numpy()
+    w = np.random.default_rng(0).dirichlet(np.ones(len(fc)))
+    np.testing.assert_allclose(fc.matvec(w), dense @ w)
+    np.testing.assert_allclose(fc.solve(w), np.linalg.solve(dense, w), rtol=1e-8)
+    assert np.isclose(portfolio_variance(fc, w), w @ dense @ w)
+    assert np.isclose(risk_contributions(fc, w).sum(), np.sqrt(w @ dense @ w))
+    np.testing.assert_allclose(np.diag(dense), returns.var(), rtol=1e-8)
+
+def test_structured_allocations_match_dense_paths():
+    returns = _factor_returns()
+    fc = covariance(returns, 'factor', n_factors=3)
+    np.testing.assert_allclose(hrp_weights(fc), hrp_weights(fc.dense()), atol=1e-10)
+    mu = returns.mean().to_numpy()
+    np.testing.assert_allclose(max_sharpe(mu, fc), max_sharpe(mu, fc.dense()), atol=1e-6)
+    lw = covariance(returns, 'ledoit_wolf')
+    assert np.linalg.eigvalsh(lw.to_numpy()).min() > 0
+    for method in ('mv', 'hrp'):
+        for cov in ('ledoit_wolf', 'factor'):
+            weights = allocate(returns, method, cov=cov, n_factors=3)
+            assert np.isclose(weights.sum(), 1.0, atol=1e-4) and (weights >= 0).all()
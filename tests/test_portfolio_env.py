@@ -0,0 +1,49 @@
+import numpy as np
+from stable_baselines3.common.env_checker import check_env
+
+from packages.models import PortfolioEnv, PPOAllocator, make_portfolio_vec_env
+
+def _returns(n_bars=300, n_assets=4, seed=0):
+    return np.random.default_rng(seed).normal(0.0005, 0.01, (n_bars, n_assets))
+
+def test_single_env_is_valid_and_accounts_costs():
+    returns = _returns()
+    env = PortfolioEnv(returns, window=10, episode_length=50, commission=0.01)
+    check_env(env)
+    env.reset(seed=1)
+    t = env._t
+    # All in asset 0 from cash: full turnover on both legs costs 2 * commission
+    action = np.array([1, -1, -1, -1, -1]) * 50.0
+    _, reward, _, _, info = env.step(action)
+    assert np.isclose(info['portfolio_return'], returns[t, 0] - 0.02, atol=1e-6)
+    assert np.isclose(reward, np.log1p(info['portfolio_return']))
+
+def test_batched_vec_env_matches_single_envs():
+    returns = _returns()
+    vec = make_portfolio_vec_env(returns, n_envs=3, window=10, episode_length=40, seed=0)
+    obs = vec.reset()
+    singles = []
+    for i in range(3):
+        env = PortfolioEnv(returns, window=10, episode_length=40)
+        env.reset()
+        env._t, env._end = int(vec._t[i]), int(vec._end[i])
+        np.testing.assert_allclose(env._obs(), obs[i])
+        singles.append(env)
+    rng = np.random.default_rng(0)
+    for _ in range(39):
+        actions = rng.uniform(-1, 1, (3, 5))
+        obs, rewards, dones, _ = vec.step(actions)
+        for i, env in enumerate(singles):
+            single_obs, reward, terminated, truncated, _ = env.step(actions[i])
+            assert np.isclose(rewards[i], reward, atol=1e-6) and dones[i] == truncated and not terminated
+            np.testing.assert_allclose(obs[i], single_obs, atol=1e-6)
+    _, _, dones, infos = vec.step(rng.uniform(-1, 1, (3, 5)))
+    assert dones.all() and all('terminal_observation' in info and info['TimeLimit.truncated'] for info in infos)
+    assert vec.env_method('env_is_wrapped', object, indices=[0, 2]) == [[False] * 3] * 2
+    assert vec.get_attr('commission', indices=1) == [vec.commission]
+
+def test_ppo_allocator_trains_on_vec_env():
+    allocator = PPOAllocator(returns=_returns(), n_envs=4, verbose=0, n_steps=32, batch_size=64, n_epochs=1, seed=0)
+    allocator.train(256)
+    action, _ = allocator.predict(allocator.env.reset())
+    assert action.shape == (4, 5)
@@ -0,0 +1,73 @@
+import pandas as pd
+
+from packages.data import providers
+from packages.data.prices import PriceStore, to_long
+from packages.orchestration.flows import prices as prices_flow
+
+def test_append_dedups_and_tracks_watermarks(tmp_path, make_panel):
+    store = PriceStore(str(tmp_path))
+    long = to_long(make_panel(n_dates=60))
+    assert len(store.append(long.iloc[:100])) == 100
+    # Overlapping batch: only unseen (date, symbol) keys are written
+    assert len(store.append(long.iloc[50:])) == len(long) - 100
+    stored = store.lake.scan()
+    assert len(stored) == len(long)
+    assert not stored.duplicated(['date', 'symbol']).any()
+    marks = store.watermarks()
+    assert (marks['last'] == long['date'].max()).all()
+
+def test_incremental_flow_fetches_only_missing_ranges(tmp_path, make_panel, fake_provider):
+    panel = make_panel(n_dates=60)
+    calls = fake_provider(panel).calls
+    mid = panel.index[30].strftime('%Y-%m-%d')
+    last = (panel.index[-1] + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    run = prices_flow.daily_prices.fn
+    run(['AAA', 'BBB'], '2022-01-01', mid, root=str(tmp_path))
+    calls.clear()
+    new = run(['AAA', 'BBB', 'CCC'], '2022-01-01', last, root=str(tmp_path))
+    assert sorted(calls) == [(('AAA', 'BBB'), mid, last), (('CCC',), '2022-01-01', last)]
+    assert len(new) == len(to_long(panel)) - 2 * 30
+    store = PriceStore(str(tmp_path))
+    pd.testing.assert_frame_equal(store.load(['AAA', 'BBB', 'CCC']), panel, check_freq=False, check_names=False,
+                                  check_column_type=False, check_index_type=False)
+
+def test_replay_provider_serves_stored_bars(tmp_path, make_panel):
+    panel = make_panel(n_dates=40)
+    PriceStore(str(tmp_path)).append(to_long(panel.iloc[:30]))
+    replay = providers.ParquetReplayProvider(str(tmp_path))
+    version = replay.data_version()
+    PriceStore(str(tmp_path)).append(to_long(panel.iloc[30:]))
+    assert replay.data_version() not in (None, version)
+    out = replay.history(['CCC', 'AAA'], start=panel.index[5], end=panel.index[10])
+    assert list(out.index) == list(panel.index[5:10])
+    assert out['Close']['CCC'].equals(panel['Close']['CCC'].iloc[5:10].rename(None))
+    assert len(replay.history(['AAA'], period='5d').index) == 5
+
+def test_yfinance_provider_batches_and_retries(monkeypatch, make_panel):
+    panel = make_panel(n_dates=10, symbols=tuple('ABCDE'))
+    calls = []
+    def fake_download(batch, **kwargs):
+        calls.append(tuple(batch))
+        if calls.count(tuple(batch)) == 1 and batch == ['C', 'D']:
+            raise ConnectionError('flaky')
+        return panel.loc[:, (slice(None), batch)]
+    monkeypatch.setattr(providers.yf, 'download', fake_download)
+    yfp = providers.YFinanceProvider(batch_size=2, max_workers=3, backoff=0, min_interval=0)
+    out = yfp.history(list('ABCDE'), start='2022-01-01', end='2022-02-01')
+    assert sorted(set(calls)) == [('A', 'B'), ('C', 'D'), ('E',)]
+    assert calls.count(('C', 'D')) == 2
+    assert sorted(out['Close'].columns) == list('ABCDE')
+
+def test_failed_and_unfinished_fetches_are_not_marked(tmp_path, make_panel, fake_provider):
+    # CCC's download fails (yfinance gives an empty frame)
+    calls = fake_provider(make_panel(n_dates=60), failing=['CCC']).calls
+    run = prices_flow.daily_prices.fn
+    future = (pd.Timestamp.today() + pd.Timedelta(days=30)).strftime('%Y-%m-%d')
+    run(['AAA', 'CCC'], '2022-01-01', future, root=str(tmp_path))
+    today = pd.Timestamp.today().normalize()
+    assert calls == [(('AAA', 'CCC'), '2022-01-01', today.strftime('%Y-%m-%d'))]
+    marks = PriceStore(str(tmp_path)).watermarks()
+    assert list(marks.index) == ['AAA'] and marks.loc['AAA', 'last'] < today
+    calls.clear()
+    run(['AAA', 'CCC'], '2022-01-01', future, root=str(tmp_path))
+    assert calls == [(('CCC',), '2022-01-01', today.strftime('%Y-%m-%d'))]
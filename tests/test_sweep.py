@@ -0,0 +1,19 @@
+import pytest
+
+from packages.strategies import param_grid, sweep
+
+def test_param_grid():
+    assert param_grid({'fast': [5, 10], 'slow': [20]}) == [{'fast': 5, 'slow': 20}, {'fast': 10, 'slow': 20}]
+
+def test_sweep_engines_agree(make_panel):
+    panel = make_panel(n_dates=200, symbols=('AAA', 'BBB'))
+    grid = {'fast': [5, 12], 'slow': [26, 40]}
+
+    def key(r):
+        return r['symbol'], r['fast'], r['slow']
+    bt_runs = {key(r): r for r in sweep(panel, grid, processes=2, stake=10)}
+    vec_runs = {key(r): r for r in sweep(panel, grid, processes=2, stake=10, engine='vectorized')}
+    assert len(bt_runs) == 8 and bt_runs.keys() == vec_runs.keys()
+    for k, r in bt_runs.items():
+        assert r['final_value'] == pytest.approx(vec_runs[k]['final_value'], rel=1e-10)
+        assert r['max_drawdown'] == pytest.approx(vec_runs[k]['max_drawdown'], rel=1e-6)
@@ -0,0 +1,53 @@
+import empyrical as emp
+import numpy as np
+import pandas as pd
+import pytest
+
+from packages.analytics import bootstrap_sharpe, deflated_sharpe, tear_sheet
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2020-01-01', periods=500)
+    bench = pd.Series(rng.normal(0.0003, 0.01, 500), index=index)
+    returns = pd.DataFrame(rng.normal(0.0004, 0.01, (500, 5)), index=index, columns=list('abcde'))
+    return returns.add(bench * 0.5, axis=0), bench
+
+@pytest.mark.parametrize('gaps', [False, True])
+def test_tear_sheet_matches_empyrical(data, gaps):
+    returns, bench = data
+    if gaps:
+        returns = returns.mask(np.random.default_rng(1).random(returns.shape) < 0.02)
+    table = tear_sheet(returns, bench, n_boot=200)
+    for col in returns:
+        r = returns[col]
+        row = table.loc[col]
+        assert row.sharpe == pytest.approx(emp.sharpe_ratio(r), rel=1e-9)
+        assert row.sortino == pytest.approx(emp.sortino_ratio(r), rel=1e-9)
+        assert row.annual_volatility == pytest.approx(emp.annual_volatility(r), rel=1e-9)
+        assert row.max_drawdown == pytest.approx(emp.max_drawdown(r), rel=1e-9)
+        assert row.annual_return == pytest.approx(emp.annual_return(r), rel=1e-9)
+        assert row.calmar == pytest.approx(emp.calmar_ratio(r), rel=1e-9)
+        assert row.cvar == pytest.approx(emp.conditional_value_at_risk(r.fillna(0)), rel=1e-9)
+        assert (row.alpha, row.beta) == pytest.approx(emp.alpha_beta(r, bench), rel=1e-9)
+        assert row.sharpe_lo < row.sharpe < row.sharpe_hi
+        assert row.observations == r.notna().sum()
+
+def test_deflated_sharpe_penalizes_trials(data):
+    returns, _ = data
+    table = tear_sheet(returns, n_boot=0)
+    assert 'sharpe_lo' not in table
+    assert (table.dsr <= table.psr).all()
+    assert (tear_sheet(returns, n_boot=0, n_trials=1000).dsr < table.dsr).all()
+    assert deflated_sharpe(np.array([0.1]), 250, np.array([0.0]), np.array([3.0]), n_trials=1)[0] > 0.9
+
+def test_bootstrap_sharpe_matches_resampling(data):
+    returns, _ = data
+    values = returns.to_numpy()
+    boot = bootstrap_sharpe(values, n_boot=20, seed=3, chunk=2)
+    # the same draws as explicit resampled indices
+    counts = np.random.default_rng(3).multinomial(len(values), np.full(len(values), 1 / len(values)), size=20)
+    for i, c in enumerate(counts):
+        sample = np.repeat(values, c, axis=0)
+        expected = sample.mean(axis=0) / sample.std(axis=0, ddof=1) * np.sqrt(252)
+        np.testing.assert_allclose(boot[i], expected, rtol=1e-8)
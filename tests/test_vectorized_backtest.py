@@ -0,0 +1,62 @@
+import backtrader as bt
+import numpy as np
+
+from packages.strategies import MomentumStrategy, ema, momentum_positions, run_vectorized
+
+class _Values(bt.Analyzer):
+    def start(self):
+        self.values = []
+
+    def prenext(self):
+        self.next()
+
+    def next(self):
+        self.values.append(self.strategy.broker.getvalue())
+
+def run_backtrader(frame, fast, slow, stake, cash, commission):
+    cerebro = bt.Cerebro()
+    cerebro.adddata(bt.feeds.PandasData(dataname=frame.rename(columns=str.lower)))
+    cerebro.addstrategy(MomentumStrategy, fast=fast, slow=slow)
+    cerebro.addsizer(bt.sizers.FixedSize, stake=stake)
+    cerebro.broker.setcash(cash)
+    cerebro.broker.setcommission(commission=commission)
+    cerebro.addanalyzer(_Values, _name='values')
+    strat = cerebro.run()[0]
+    return np.array(strat.analyzers.values.values), strat
+
+def test_parity_with_backtrader_momentum(make_panel):
+    panel = make_panel(n_dates=300, symbols=('AAA', 'BBB'), seed=3)
+    for fast, slow in [(12, 26), (5, 20)]:
+        target = momentum_positions(panel['Close'], fast=fast, slow=slow, stake=10)
+        for sym in target.columns:
+            result = run_vectorized(panel, target[[sym]], cash=100_000, commission=0.001)
+            values, _ = run_backtrader(panel.xs(sym, axis=1, level=1), fast, slow, 10, 100_000, 0.001)
+            np.testing.assert_allclose(result.equity.to_numpy(), values, rtol=1e-10)
+            assert len(result.trades) > 2
+
+def _ema_loop(values, period):
+    # Reference: seed on the first `period` consecutive valid bars, then skip
+    # NaNs by holding the last close
+    alpha, out, run, last = 2.0 / (period + 1), np.full(len(values), np.nan), [], None
+    for i, v in enumerate(values):
+        if last is None:
+            run = run + [v] if not np.isnan(v) else []
+            if len(run) == period:
+                out[i] = last = np.mean(run)
+                close = v
+            continue
+        close = close if np.isnan(v) else v
+        out[i] = last = alpha * close + (1 - alpha) * last
+    return out
+
+def test_ema_ragged_panel(make_panel):
+    close = make_panel(n_dates=120, symbols=('AAA', 'BBB', 'CCC', 'DDD'), seed=5)['Close'].copy()
+    close.iloc[:15, 1] = np.nan        # late listing
+    close.iloc[40:43, 2] = np.nan      # gap after the seed
+    close.iloc[[3, 8], 3] = np.nan     # gaps inside the first window
+    out = ema(close, 10)
+    for col in close:
+        np.testing.assert_allclose(out[col].to_numpy(), _ema_loop(close[col].to_numpy(), 10), rtol=1e-12)
+    assert out.iloc[24:].notna().all().all()
+    target = momentum_positions(close, fast=5, slow=10)
+    assert target.iloc[60:].sum().gt(0).all()
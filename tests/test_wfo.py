@@ -0,0 +1,34 @@
+import duckdb
+import pandas as pd
+
+from packages.core.shared import SharedFrame
+from packages.orchestration.flows import wfo
+
+def test_rolling_windows():
+    index = pd.bdate_range('2010-01-01', '2015-12-31')
+    windows = wfo.rolling_windows(index, 3, 1)
+    assert len(windows) == 3
+    assert [index[w[1]].year for w in windows] == [2013, 2014, 2015]
+
+def test_chunked_returns_match_single_pass(make_panel):
+    close = make_panel(n_dates=300)['Close']
+    with SharedFrame.create(close.pct_change()) as r, SharedFrame.create(close) as c:
+        wfo._init_worker(r.spec, c.spec)
+        whole = wfo._strategy_returns(5, 20, 50, 250, 0.001)
+        parts = pd.concat([wfo._strategy_returns(5, 20, lo, hi, 0.001) for lo, hi in [(50, 120), (120, 250)]])
+    pd.testing.assert_series_equal(whole, parts)
+    # Only the two requested periods were ever computed
+    assert wfo._ema.cache_info().currsize == 2
+
+def test_walk_forward_flow(tmp_path, make_panel):
+    prices = make_panel(n_dates=252 * 6, symbols=('AAA', 'BBB'))
+    out = tmp_path / 'equity_os.parquet'
+    run = wfo.walk_forward_optimisation.fn
+    result = run(prices=prices, n_trials=12, fast_range=(3, 20), slow_range=(10, 60), processes=2, output=str(out))
+    assert len(result['windows']) == 2
+    assert all(w['params']['fast'] < w['params']['slow'] for w in result['windows'])
+    stored = duckdb.execute(f"SELECT * FROM read_parquet('{out}')").df()
+    assert len(stored) == len(result['equity']) and stored['date'].is_monotonic_increasing
+    # A second run replaces rather than duplicates its dates
+    run(prices=prices, n_trials=6, fast_range=(3, 20), slow_range=(10, 60), processes=2, output=str(out))
+    assert len(duckdb.execute(f"SELECT * FROM read_parquet('{out}')").df()) == len(stored)